@@ -0,0 +1,43 @@
+import os
+import random
+
+from locust import HttpUser, between, task
+
+# locust scenario of the take-a-quiz flow, the same one as the benchmark_flow command,
+# against a running server:
+#
+#   python manage.py benchmark_flow --users 200 --seed-only --password <password>
+#   BENCH_PASSWORD=<password> locust -f benchmarks/locustfile.py --host http://localhost:8000 --users 200 --spawn-rate 20
+#
+# virtual users log in as the seeded bench-flow-<seed>-<n> users
+# seeded users are left in the database, delete them once done
+SEED = int(os.environ.get('BENCH_SEED', 0))
+SEEDED_USERS = int(os.environ.get('BENCH_USERS', 200))
+PASSWORD = os.environ['BENCH_PASSWORD']
+
+class QuizTaker(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        username = f'bench-flow-{SEED}-{random.randrange(SEEDED_USERS)}'
+        response = self.client.post('/user/api/login/', json={'username': username, 'password': PASSWORD}, name='login')
+        data = response.json()
+        self.user_id = data['user_id']
+        self.client.headers['Authorization'] = 'Bearer ' + data['access']
+
+    @task
+    def take_quiz(self):
+        quizzes = self.client.get('/quiz/api/quizzes/?limit=20', name='list').json()
+        if not quizzes:
+            return
+        quiz_id = random.choice(quizzes)['id']
+
+        quiz = self.client.get(f'/quiz/api/quizzes/{quiz_id}/', name='fetch').json()
+        for question in quiz['questions']:
+            self.client.post(
+                '/quiz/api/quizzes/submit/',
+                json={'question_id': question['id'], 'selected_option': random.randint(1, 4)},
+                name='submit'
+            )
+
+        self.client.get(f'/quiz/api/quizzes/{quiz_id}/users/{self.user_id}/results/', name='results')
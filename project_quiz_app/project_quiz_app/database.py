@@ -0,0 +1,89 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+# builds DATABASES from environment variables:
+#   DB_ENGINE             'sqlite' (default) or 'postgresql'
+#   DB_NAME               sqlite file (BASE_DIR/db.sqlite3 by default) or postgresql database
+#   DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   DB_CONN_MAX_AGE       seconds a connection is reused across requests, 0 closes it after each request
+#   DB_POOL               '1' uses psycopg's connection pool instead of persistent connections (postgresql)
+#   DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+#   SQLITE_TUNED          '0' keeps sqlite's defaults instead of the pragmas below
+#   SQLITE_BUSY_TIMEOUT   milliseconds a writer waits for the lock before "database is locked"
+#   SQLITE_MMAP_SIZE      bytes of the database file read through mmap
+#   DB_REPLICAS           comma separated read replicas (sqlite files or postgresql hosts),
+#                         added as replica_1, replica_2, ... with the primary's other settings
+#   DB_REPLICA_WEIGHTS    comma separated share of the reads per replica, equal by default
+def database_settings(base_dir, environ=os.environ):
+    engine = environ.get('DB_ENGINE', 'sqlite')
+    if engine == 'postgresql':
+        primary = postgresql_settings(environ)
+        replicas = [{**primary, 'HOST': host} for host in split_list(environ.get('DB_REPLICAS'))]
+    else:
+        primary = sqlite_settings(environ.get('DB_NAME', base_dir / 'db.sqlite3'), environ)
+        replicas = [sqlite_settings(name, environ) for name in split_list(environ.get('DB_REPLICAS'))]
+
+    databases = {'default': primary}
+    for index, replica in enumerate(replicas, start=1):
+        # tests run every alias against the test database of the primary
+        databases[f'replica_{index}'] = {**replica, 'TEST': {'MIRROR': 'default'}}
+    return databases
+
+# read replicas of DATABASES as {alias: weight}
+def replica_weights(databases, environ=os.environ):
+    aliases = [alias for alias in databases if alias != 'default']
+    weights = [int(weight) for weight in split_list(environ.get('DB_REPLICA_WEIGHTS'))] or [1] * len(aliases)
+    if len(weights) != len(aliases):
+        raise ImproperlyConfigured("DB_REPLICA_WEIGHTS needs one weight per replica in DB_REPLICAS")
+    return dict(zip(aliases, weights))
+
+def sqlite_settings(name, environ):
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        # a connection per request re-runs the pragmas below, keep it for a while
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if environ.get('SQLITE_TUNED', '1') == '1':
+        database['OPTIONS'] = {
+            # readers do not block the writer (and the other way around) in WAL mode,
+            # NORMAL only syncs on checkpoints which is safe with WAL,
+            # writers wait for the lock instead of failing right away
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f"PRAGMA busy_timeout={int(environ.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+                f"PRAGMA mmap_size={int(environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+            ]),
+            # write transactions take the lock when they begin, so busy_timeout applies
+            # instead of failing when a read lock can not be upgraded
+            'transaction_mode': 'IMMEDIATE',
+        }
+    return database
+
+def postgresql_settings(environ):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('DB_NAME', 'quiz'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', ''),
+        'PORT': environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if environ.get('DB_POOL') == '1':
+        # django does not allow persistent connections together with the pool
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(environ.get('DB_POOL_MAX_SIZE', 10)),
+        }
+    return database
+
+def split_list(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
@@ -0,0 +1,65 @@
+import decimal
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson is optional, the renderer and parser fall back to DRF's stdlib json implementation without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# numbers orjson may format differently than python's repr: with an exponent (1e16 for 1e+16,
+# 1e-7 for 1e-07) or below 1e-4 without one (0.00001 for 1e-05), as values, in arrays, or as keys,
+# strings looking like them only cost a fallback
+FLOAT_FORMAT_DIFFERS = re.compile(rb'(?:^|[:,\["])-?(?:\d+(?:\.\d+)?e|0\.0000)')
+
+# JSONRenderer producing the same bytes with orjson when it is installed:
+# dates, times and dataclasses are passed to DRF's encoder so they are formatted like before,
+# non string keys are converted like the json module does, and \u2028/\u2029 are escaped
+# indented output (browsable api, ?indent), UNICODE_JSON=False, COMPACT_JSON=False
+# and anything orjson can not encode (e.g. integers above 64 bits) go through the stdlib renderer,
+# as do NaN and Infinity, which orjson renders as null, so they raise (STRICT_JSON) or are emitted like before,
+# and documents with floats orjson formats differently (see FLOAT_FORMAT_DIFFERS)
+class FastJSONRenderer(JSONRenderer):
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # a null may stand for a non finite float, only then is the data searched for one
+        if b'null' in ret and has_non_finite_number(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        if FLOAT_FORMAT_DIFFERS.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+# whether NaN or Infinity (float or decimal) appears in the dicts, lists and tuples of data
+def has_non_finite_number(data):
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, decimal.Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+    return False
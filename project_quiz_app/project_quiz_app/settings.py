@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
+from .database import database_settings, replica_weights
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,11 +49,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # disabled unless QUIZ_PROFILING['ENABLED'], kept first so it times the whole stack
+    'quiz.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # pins users to the primary database for a moment after they wrote
+    'quiz.routers.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,11 +87,22 @@ WSGI_APPLICATION = 'project_quiz_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# sqlite (tuned for concurrent access) or postgresql, configured from the environment,
+# see project_quiz_app/database.py for the variables
+DATABASES = database_settings(BASE_DIR)
+
+# quiz content is read from the replicas listed in DB_REPLICAS, weighted by DB_REPLICA_WEIGHTS
+DATABASE_ROUTERS = ['quiz.routers.ReadReplicaRouter']
+QUIZ_READ_REPLICAS = replica_weights(DATABASES)
+
+# ROUTE_RESULTS also reads results and answers from the replicas,
+# a user's reads go to the primary for PIN_SECONDS after they wrote,
+# pins are kept in CACHE_ALIAS, an entry of CACHES shared between workers (redis, memcached),
+# without one (or with a process local cache) every read goes to the primary
+QUIZ_REPLICA_ROUTING = {
+    'ROUTE_RESULTS': os.environ.get('DB_REPLICA_RESULTS') == '1',
+    'PIN_SECONDS': 5,
+    'CACHE_ALIAS': os.environ.get('DB_REPLICA_PIN_CACHE') or None,
 }
 
 
@@ -106,6 +124,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# password hashing cost per environment, PASSWORD_HASHER_PROFILE is one of
+#   default - PBKDF2 with django's iteration count, or PASSWORD_HASH_ITERATIONS
+#   fast    - PBKDF2 with 1000 iterations, for load tests only
+#   argon2  - Argon2 (needs argon2-cffi), existing PBKDF2 hashes are upgraded on login
+# a changed cost is applied to every user the next time they log in
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'default')
+
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0)) or (
+    1000 if PASSWORD_HASHER_PROFILE == 'fast' else None
+)
+
+PASSWORD_HASHERS = [
+    'user.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if PASSWORD_HASHER_PROFILE == 'argon2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(2))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -132,18 +171,110 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # default authentication for API views
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # trusts the user claims of the token instead of loading the user on every request
+        'user.authentication.TokenClaimsAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # same output as DRF's json renderer and parser, with orjson when it is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'project_quiz_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'project_quiz_app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7)
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': 'user.serializers.UserClaimsTokenObtainPairSerializer',
 }
 
+# cache of the is_active/is_staff state of users (see user/authentication.py), kept JWT_USER_STATE_TIMEOUT seconds,
+# an entry of CACHES shared between workers (redis, memcached), None or a process local cache
+# reads the state from the database, every worker also keeps its own copy JWT_USER_STATE_LOCAL_MAX_AGE seconds
+JWT_USER_STATE_CACHE = os.environ.get('JWT_USER_STATE_CACHE') or None
+JWT_USER_STATE_TIMEOUT = 60
+JWT_USER_STATE_LOCAL_MAX_AGE = 5
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:4200'
-]
\ No newline at end of file
+]
+
+# serve the quiz read endpoints (list, detail, results) with their async views,
+# meant for ASGI deployments (see project_quiz_app/asgi.py)
+QUIZ_ASYNC_READ_VIEWS = False
+
+# next page link of the paginated quiz list
+CORS_EXPOSE_HEADERS = ['Link', 'Server-Timing']
+
+# cache of rendered quiz payloads used by the get-quiz API
+# CACHE_ALIAS adds an entry of CACHES as shared tier between workers,
+# TIMEOUT only applies to the current version of each quiz, version payloads never expire,
+# the in-process tier serves the current version of a quiz for LOCAL_MAX_AGE seconds
+QUIZ_PAYLOAD_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,
+    'LOCAL_MAX_AGE': 5,
+    'CACHE_ALIAS': None,
+    'TIMEOUT': 300,
+}
+
+# per request query count and timings (Server-Timing header) aggregated per url name,
+# histograms are dumped to DUMP_DIR every FLUSH_EVERY requests, see the profiling_report command
+QUIZ_PROFILING = {
+    'ENABLED': os.environ.get('QUIZ_PROFILING') == '1',
+    'DUMP_DIR': BASE_DIR / 'profiling',
+    'FLUSH_EVERY': 100,
+}
+
+# in-process store of answer keys used to grade submitted answers, reloaded after MAX_AGE seconds
+QUIZ_ANSWER_KEY_STORE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 100000,
+    'MAX_AGE': 5,
+}
+
+# Cache-Control of the quiz detail, quiz version and results endpoints, all answer If-None-Match with 304,
+# QUIZ_CACHE_CONTROL lets a reverse proxy share quizzes between users for s-maxage seconds,
+# published versions never change and may be cached indefinitely (VERSION_CACHE_CONTROL)
+QUIZ_HTTP_CACHE = {
+    'QUIZ_CACHE_CONTROL': 'public, max-age=0, s-maxage=60, must-revalidate',
+    'VERSION_CACHE_CONTROL': 'public, max-age=31536000, immutable',
+    'RESULTS_CACHE_CONTROL': 'private, no-cache',
+}
+
+# per quiz leaderboards ranked in process, reloaded in the background after MAX_AGE seconds,
+# CACHE_ALIAS lets rebuild_leaderboards reach every worker
+QUIZ_LEADERBOARD = {
+    'ENABLED': True,
+    'MAX_QUIZZES': 256,
+    'MAX_AGE': 30,
+    'CACHE_ALIAS': None,
+}
+
+# per question and per score counters behind the quiz stats endpoint, maintained on submission
+QUIZ_STATS = {
+    'ENABLED': True,
+}
+
+# answer ingestion, 'write-behind' grades and acknowledges submissions right away
+# and queues them in the PendingAnswer journal, drained into answers and results
+# by `python manage.py drain_answers --loop`
+QUIZ_ANSWER_INGESTION = {
+    'MODE': os.environ.get('QUIZ_ANSWER_INGESTION', 'sync'),
+    'BATCH_SIZE': 500,
+}
+
+# memory mapped snapshot of the published quizzes and their answer keys shared by all workers,
+# written by `python manage.py compile_quiz_snapshot`, None reads quizzes from the database and caches only
+QUIZ_SNAPSHOT = {
+    'PATH': os.environ.get('QUIZ_SNAPSHOT_PATH') or None,
+    'CHECK_INTERVAL': 1.0,
+    'MAX_DECODED': 1024,
+}
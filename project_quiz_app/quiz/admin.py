@@ -1,8 +1,22 @@
 from django.contrib import admin
 
-from .models import Quiz, Question, Answer, Result
+from .models import Quiz, Question, Answer, Result, QuizVersion
 
 admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Answer)
 admin.site.register(Result)
+
+# published versions are served as immutable and cached without expiry, so they can only be viewed
+@admin.register(QuizVersion)
+class QuizVersionAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'number', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+
+from .cache import LRUCache
+from .models import Question, Quiz
+from .snapshots import quiz_snapshot
+
+# default configuration for the answer key store,
+# can be overridden with QUIZ_ANSWER_KEY_STORE in settings
+DEFAULT_QUIZ_ANSWER_KEY_STORE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 100000, # size bound of the LRU, one entry per question plus one per quiz
+    'MAX_AGE': 5, # seconds the keys of a quiz (or of its snapshot) are graded against before they are reloaded (checked), picks up other workers' edits
+}
+
+# what grading needs to know about a question
+AnswerKey = namedtuple('AnswerKey', ['quiz_id', 'correct_option', 'correct_text'])
+
+# answer keys of all questions of a quiz, its question count for result completion
+# and the quiz version they belong to, recorded with the graded answers
+QuizAnswerKeys = namedtuple('QuizAnswerKeys', ['quiz_id', 'question_count', 'answer_keys', 'version'])
+
+# in-process store of answer keys, so grading is a dict lookup instead of
+# a question fetch decoding the options json
+# keys are loaded per quiz with one query, and bounded by an LRU
+# holding ('quiz', quiz id) -> (QuizAnswerKeys, loaded at), question id -> AnswerKey
+# and ('snapshot', quiz id, version) -> checked at entries
+# invalidations only reach the worker making the edit, so the keys of a quiz are reloaded after max_age
+class AnswerKeyStore:
+    def __init__(self, max_entries=100000, enabled=True, max_age=5):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.local = LRUCache(max_entries)
+        # number of invalidations, keys loaded before an invalidation are not stored
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    # answer keys of the quiz a question belongs to, None when the question does not exist
+    # quizzes of the shared snapshot (see snapshots.py) are read from it instead of the LRU
+    def get_for_question(self, question_id):
+        quiz_id = quiz_snapshot.quiz_for_question(question_id)
+        quiz_keys = None if quiz_id is None else self.get_snapshot_quiz(quiz_id)
+        if quiz_keys is not None:
+            return quiz_keys if question_id in quiz_keys.answer_keys else None
+
+        answer_key = self.local.get(question_id) if self.enabled else None
+        quiz_keys = None if answer_key is None else self.get_quiz(answer_key.quiz_id)
+        if quiz_keys is None or question_id not in quiz_keys.answer_keys:
+            quiz_keys = self.load(Subquery(Question.objects.filter(id=question_id).values('quiz_id')))
+        if quiz_keys is None or question_id not in quiz_keys.answer_keys:
+            return None
+        return quiz_keys
+
+    # answer keys of a quiz, None when it does not exist
+    def get_quiz(self, quiz_id):
+        quiz_keys = self.get_snapshot_quiz(quiz_id)
+        if quiz_keys is None and self.enabled:
+            quiz_keys = self.get_local(quiz_id)
+        if quiz_keys is None:
+            quiz_keys = self.load(quiz_id)
+        return quiz_keys
+
+    # keys of a quiz from the LRU, None once they are older than max_age
+    def get_local(self, quiz_id):
+        entry = self.local.get(('quiz', quiz_id))
+        if entry is None:
+            return None
+        quiz_keys, loaded_at = entry
+        if time.monotonic() - loaded_at >= self.max_age:
+            self.local.delete(('quiz', quiz_id))
+            return None
+        return quiz_keys
+
+    # keys of a quiz from the shared snapshot, which is only rebuilt from time to time:
+    # the version they were compiled for is checked against the quiz once every max_age seconds
+    # (one single column query, remembered in the LRU), keys of an edited quiz are left to the database
+    def get_snapshot_quiz(self, quiz_id):
+        quiz_keys = quiz_snapshot.get_answer_keys(quiz_id, build_snapshot_quiz)
+        if quiz_keys is None:
+            return None
+        key = ('snapshot', quiz_id, quiz_keys.version)
+        checked_at = self.local.get(key) if self.enabled else None
+        if checked_at is not None and time.monotonic() - checked_at < self.max_age:
+            return quiz_keys
+        version = Quiz.objects.filter(id=quiz_id).values_list('version', flat=True).first()
+        if version != quiz_keys.version:
+            return None
+        if self.enabled:
+            self.local.set(key, time.monotonic())
+        return quiz_keys
+
+    # loads a quiz with all of its questions in one (left joined) query,
+    # entries are only stored once the surrounding transaction commits,
+    # and only when the quiz was not invalidated in between
+    def load(self, quiz_id):
+        generation = self.generation
+        rows = list(
+            Quiz.objects.filter(id=quiz_id)
+            .values_list('id', 'question_count', 'version', 'questions__id', 'questions__correct_option', 'questions__options')
+        )
+        if not rows:
+            return None
+
+        quiz_id, question_count, version = rows[0][:3]
+        answer_keys = {
+            question_id: AnswerKey(quiz_id, correct_option, str(options[correct_option - 1]))
+            for _, _, _, question_id, correct_option, options in rows
+            if question_id is not None
+        }
+        quiz_keys = QuizAnswerKeys(quiz_id, question_count, answer_keys, version)
+        if self.enabled:
+            loaded_at = time.monotonic()
+            transaction.on_commit(lambda: self.store(quiz_keys, generation, loaded_at))
+        return quiz_keys
+
+    def store(self, quiz_keys, generation, loaded_at):
+        with self._lock:
+            if self.generation != generation:
+                return
+            self.local.set(('quiz', quiz_keys.quiz_id), (quiz_keys, loaded_at))
+            for question_id, answer_key in quiz_keys.answer_keys.items():
+                self.local.set(question_id, answer_key)
+
+    def invalidate(self, quiz_id):
+        with self._lock:
+            self.generation += 1
+            entry = self.local.get(('quiz', quiz_id))
+            self.local.delete(('quiz', quiz_id))
+        if entry is not None:
+            for question_id in entry[0].answer_keys:
+                self.local.delete(question_id)
+
+    # invalidates right away and again after commit, like QuizPayloadCache
+    def invalidate_on_commit(self, quiz_id):
+        self.invalidate(quiz_id)
+        transaction.on_commit(lambda: self.invalidate(quiz_id))
+
+    # a question entry may outlive its quiz entry after an LRU eviction,
+    # so a single question is dropped on its own too
+    def invalidate_question(self, question_id, quiz_id):
+        self.local.delete(question_id)
+        self.invalidate_on_commit(quiz_id)
+        transaction.on_commit(lambda: self.local.delete(question_id))
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.local.clear()
+
+    def stats(self):
+        return self.local.stats()
+
+def build_snapshot_quiz(quiz_id, data):
+    answer_keys = {
+        question_id: AnswerKey(quiz_id, correct_option, correct_text)
+        for question_id, correct_option, correct_text in data['answer_keys']
+    }
+    return QuizAnswerKeys(quiz_id, data['question_count'], answer_keys, data['version'])
+
+# unsaved quiz carrying the fields add_answers_to_result needs,
+# built from the store without fetching the quiz
+def quiz_from_answer_keys(quiz_keys):
+    return Quiz(id=quiz_keys.quiz_id, question_count=quiz_keys.question_count, version=quiz_keys.version)
+
+def build_answer_key_store():
+    config = {**DEFAULT_QUIZ_ANSWER_KEY_STORE, **getattr(settings, 'QUIZ_ANSWER_KEY_STORE', {})}
+    return AnswerKeyStore(max_entries=config['MAX_ENTRIES'], enabled=config['ENABLED'], max_age=config['MAX_AGE'])
+
+answer_key_store = build_answer_key_store()
@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, HttpResponseNotModified
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from project_quiz_app.renderers import FastJSONRenderer
+from user.authentication import TokenClaimsAuthentication
+
+from .cache import quiz_payload_cache
+from .conditional import add_cache_headers, get_http_cache_config, is_not_modified, quiz_etag, result_etag
+from .models import Quiz
+from .serializers import QuizListSerializer
+from .versions import aload_quiz_payload
+from .views import (next_page_link, parse_page_params, result_answers_queryset,
+                    result_summary_queryset, results_response_data, unfinished_quizzes)
+
+# async-native variants of the read endpoints for ASGI deployments
+# DRF's APIView only runs synchronously, so these are plain django views
+# authenticating the same JWT tokens and returning the same payloads
+# as QuizDetailView, QuizListView and GetResultsView
+
+# renders data with the renderer of the DRF views, so both return the same bytes
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type=FastJSONRenderer.media_type)
+
+# base view authenticating the bearer token before dispatching
+# (InvalidToken is a subclass of AuthenticationFailed),
+# the user is built from the token claims like TokenClaimsAuthentication does,
+# or loaded with the async ORM for tokens without them
+class AsyncJWTView(View):
+    authentication = TokenClaimsAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+        except AuthenticationFailed as e:
+            return self.unauthorized(e.detail)
+        if request.user is None:
+            return self.unauthorized({"detail": "Authentication credentials were not provided."})
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        header = self.authentication.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # token signature and expiry are checked without touching the database
+        validated_token = self.authentication.get_validated_token(raw_token)
+        user = await self.authentication.aget_user_from_claims(validated_token)
+        if user is not None:
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        User = get_user_model()
+        try:
+            user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+    # same body and header as DRF's NotAuthenticated/AuthenticationFailed responses
+    def unauthorized(self, detail):
+        if not isinstance(detail, dict):
+            detail = {"detail": detail}
+        response = json_response(detail, status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = self.authentication.authenticate_header(None)
+        return response
+
+# async variant of QuizDetailView
+class AsyncQuizDetailView(AsyncJWTView):
+    async def get(self, request, quiz_id):
+        cache_control = get_http_cache_config()['QUIZ_CACHE_CONTROL']
+        payload = await quiz_payload_cache.aget(quiz_id)
+        if payload is None and request.META.get('HTTP_IF_NONE_MATCH'):
+            version = await Quiz.objects.filter(id=quiz_id).values_list('version', flat=True).afirst()
+            if version is not None and is_not_modified(request, quiz_etag(quiz_id, version)):
+                return add_cache_headers(HttpResponseNotModified(), quiz_etag(quiz_id, version), cache_control)
+        if payload is None:
+            payload = await quiz_payload_cache.aget_or_load(quiz_id, aload_quiz_payload)
+        if payload is None:
+            return json_response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = quiz_etag(quiz_id, payload['version'])
+        if is_not_modified(request, etag):
+            return add_cache_headers(HttpResponseNotModified(), etag, cache_control)
+        return add_cache_headers(json_response(payload), etag, cache_control)
+
+# async variant of QuizListView
+class AsyncQuizListView(AsyncJWTView):
+    default_limit = 50
+    max_limit = 200
+
+    async def get(self, request):
+        cursor, limit, error = parse_page_params(request.GET, self.default_limit, self.max_limit)
+        if error:
+            return json_response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        quizzes = unfinished_quizzes(request.user, cursor, request.GET.get('search'))
+        page = [quiz async for quiz in quizzes[:limit + 1]]
+        has_next = len(page) > limit
+        page = page[:limit]
+
+        response = json_response(QuizListSerializer(page, many=True).data)
+        if has_next:
+            response['Link'] = next_page_link(request, page[-1].id, limit)
+        return response
+
+# async variant of GetResultsView
+class AsyncGetResultsView(AsyncJWTView):
+    async def get(self, request, quiz_id, user_id):
+        result = await result_summary_queryset(quiz_id, user_id).afirst()
+        if result is None:
+            if not await Quiz.objects.filter(id=quiz_id).aexists():
+                return json_response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+            return json_response({"error": "Results not found for the user in this quiz."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = result_etag(result)
+        cache_control = get_http_cache_config()['RESULTS_CACHE_CONTROL']
+        if is_not_modified(request, etag):
+            return add_cache_headers(HttpResponseNotModified(), etag, cache_control)
+
+        answers = [answer async for answer in result_answers_queryset(result['id'])]
+        return add_cache_headers(json_response(results_response_data(quiz_id, user_id, result, answers)), etag, cache_control)
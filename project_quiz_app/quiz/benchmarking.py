@@ -0,0 +1,71 @@
+import statistics
+
+# helpers shared by the benchmark management commands
+
+# nearest-rank percentile of an already sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+# summary of latencies in milliseconds,
+# throughput is computed when the wall clock duration (seconds) is given
+def summarize(latencies, elapsed=None):
+    values = sorted(latencies)
+    summary = {
+        'count': len(values),
+        'mean': statistics.mean(values) if values else 0.0,
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': values[-1] if values else 0.0,
+    }
+    if elapsed is not None:
+        summary['throughput'] = len(values) / elapsed if elapsed else 0.0
+    return summary
+
+def format_summary(summary):
+    text = (
+        f"mean {summary['mean']:.3f} ms, p50 {summary['p50']:.3f} ms, "
+        f"p95 {summary['p95']:.3f} ms, p99 {summary['p99']:.3f} ms"
+    )
+    if 'throughput' in summary:
+        text = f"{summary['throughput']:.1f} req/s, " + text
+    return text
+
+# compares a benchmark report with a baseline of thresholds
+#   {"tolerance": 0.25, "throughput": 50, "steps": {"<step>": {"p95": 40.0, "queries": 3}}}
+# latencies may exceed the baseline and throughput fall below it by the tolerance,
+# query counts are budgets and must not be exceeded at all
+# returns the list of regressions, empty when the report is within the thresholds
+def check_thresholds(report, baseline, tolerance=None):
+    if tolerance is None:
+        tolerance = baseline.get('tolerance', 0.25)
+    regressions = []
+
+    if 'throughput' in baseline and report['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput']:.1f} req/s is below {baseline['throughput']:.1f} req/s")
+
+    for step, thresholds in baseline.get('steps', {}).items():
+        measured = report['steps'].get(step)
+        if measured is None:
+            regressions.append(f"{step}: not measured")
+            continue
+        for pct in ('p50', 'p95', 'p99'):
+            if pct in thresholds and measured[pct] > thresholds[pct] * (1 + tolerance):
+                regressions.append(f"{step}: {pct} {measured[pct]:.3f} ms is above {thresholds[pct]:.3f} ms")
+        if 'queries' in thresholds and measured['queries_max'] > thresholds['queries']:
+            regressions.append(f"{step}: {measured['queries_max']} queries per request, budget is {thresholds['queries']}")
+    return regressions
+
+# baseline matching a report, used to record a new reference run
+def make_baseline(report, tolerance=0.25):
+    return {
+        'tolerance': tolerance,
+        'throughput': round(report['throughput'], 1),
+        'steps': {
+            step: {'p95': round(measured['p95'], 3), 'queries': measured['queries_max']}
+            for step, measured in report['steps'].items()
+        },
+    }
@@ -0,0 +1,205 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .lru import LRUCache
+from .snapshots import quiz_snapshot
+
+# default configuration for the quiz payload cache,
+# can be overridden with QUIZ_PAYLOAD_CACHE in settings
+DEFAULT_QUIZ_PAYLOAD_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024, # size bound of the in-process LRU
+    'LOCAL_MAX_AGE': 5, # seconds the in-process LRU serves the current version of a quiz, bounds how long other workers' edits go unseen
+    'CACHE_ALIAS': None, # optional django cache backend used as a shared second tier
+    'TIMEOUT': 300, # expiry (in seconds) of the current versions in the shared tier, payloads do not expire
+    'KEY_PREFIX': 'quiz-payload',
+}
+
+# read-through cache of frozen (answer-stripped) quiz payloads, see versions.py
+# holds the current payload of each quiz, dropped whenever the quiz changes,
+# and the payload of each quiz version, which never changes and is never invalidated
+# first tier is the in-process LRU, second tier is an optional django cache backend
+# invalidations only reach the local tier of the worker making the edit, so the current payloads
+# of the local tier expire after local_max_age and are then looked up again (shared tier or database)
+class QuizPayloadCache:
+    def __init__(self, max_entries=1024, cache_alias=None, timeout=300, key_prefix='quiz-payload', enabled=True, local_max_age=5):
+        self.enabled = enabled
+        self.local = LRUCache(max_entries)
+        self.local_max_age = local_max_age
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    @property
+    def shared(self):
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias]
+
+    # key of the current version of a quiz, or of the payload of one of its versions
+    def make_key(self, quiz_id, version=None):
+        if version is None:
+            return f'{self.key_prefix}:{quiz_id}'
+        return f'{self.key_prefix}:{quiz_id}:v{version}'
+
+    # payload of a quiz version, local entries are keyed by (quiz id, version)
+    def get_payload(self, quiz_id, version):
+        if not self.enabled:
+            return None
+        payload = self.local.get((quiz_id, version))
+        if payload is not None or self.shared is None:
+            return payload
+
+        payload = self.shared.get(self.make_key(quiz_id, version))
+        if payload is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        # promote the shared entry to the local tier
+        self.local.set((quiz_id, version), payload)
+        return payload
+
+    # payload of the current version of a quiz, read from the shared snapshot when it has
+    # the quiz (see snapshots.py), or else kept locally under the quiz id,
+    # the shared tier holds the current version number next to the version payloads
+    def get(self, quiz_id):
+        payload = quiz_snapshot.get_payload(quiz_id)
+        if payload is not None or not self.enabled:
+            return payload
+        payload = self.get_local(quiz_id)
+        if payload is not None or self.shared is None:
+            return payload
+
+        version = self.shared.get(self.make_key(quiz_id))
+        if version is None:
+            self.shared_misses += 1
+            return None
+        payload = self.get_payload(quiz_id, version)
+        if payload is not None:
+            self.set_local(quiz_id, payload)
+        return payload
+
+    # current payload of a quiz from the local tier, None once it is older than local_max_age
+    def get_local(self, quiz_id):
+        entry = self.local.get(quiz_id)
+        if entry is None:
+            return None
+        payload, stored_at = entry
+        if time.monotonic() - stored_at >= self.local_max_age:
+            self.local.delete(quiz_id)
+            return None
+        return payload
+
+    def set_local(self, quiz_id, payload):
+        self.local.set(quiz_id, (payload, time.monotonic()))
+
+    def set_payload(self, quiz_id, payload):
+        if not self.enabled:
+            return
+        self.local.set((quiz_id, payload['version']), payload)
+        if self.shared is not None:
+            self.shared.set(self.make_key(quiz_id, payload['version']), payload, None)
+
+    # stores the payload of the current version of a quiz
+    def set(self, quiz_id, payload):
+        if not self.enabled:
+            return
+        self.set_payload(quiz_id, payload)
+        self.set_local(quiz_id, payload)
+        if self.shared is not None:
+            self.shared.set(self.make_key(quiz_id), payload['version'], self.timeout)
+
+    # returns the cached payload or builds it with loader(quiz_id)
+    # the loaded payload is only stored once the surrounding transaction commits,
+    # so data that may still be rolled back never ends up in the cache
+    def get_or_load(self, quiz_id, loader):
+        payload = self.get(quiz_id)
+        if payload is None:
+            payload = self.load(quiz_id, loader)
+        return payload
+
+    def load(self, quiz_id, loader):
+        payload = loader(quiz_id)
+        if payload is not None:
+            transaction.on_commit(lambda: self.set(quiz_id, payload))
+        return payload
+
+    # async variants used by the ASGI views, the shared tier is reached
+    # through the cache backend's async api
+    async def aget(self, quiz_id):
+        payload = quiz_snapshot.get_payload(quiz_id)
+        if payload is not None or not self.enabled:
+            return payload
+        payload = self.get_local(quiz_id)
+        if payload is not None or self.shared is None:
+            return payload
+
+        version = await self.shared.aget(self.make_key(quiz_id))
+        payload = None if version is None else self.local.get((quiz_id, version))
+        if payload is None and version is not None:
+            payload = await self.shared.aget(self.make_key(quiz_id, version))
+        if payload is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        self.set_local(quiz_id, payload)
+        return payload
+
+    async def aset(self, quiz_id, payload):
+        if not self.enabled:
+            return
+        self.local.set((quiz_id, payload['version']), payload)
+        self.set_local(quiz_id, payload)
+        if self.shared is not None:
+            await self.shared.aset(self.make_key(quiz_id, payload['version']), payload, None)
+            await self.shared.aset(self.make_key(quiz_id), payload['version'], self.timeout)
+
+    # async views run outside of transactions,
+    # so a payload loaded with aloader(quiz_id) is stored right away
+    async def aget_or_load(self, quiz_id, aloader):
+        payload = await self.aget(quiz_id)
+        if payload is None:
+            payload = await aloader(quiz_id)
+            if payload is not None:
+                await self.aset(quiz_id, payload)
+        return payload
+
+    # forgets the current version of a quiz, the payloads of its versions stay valid
+    def invalidate(self, quiz_id):
+        self.local.delete(quiz_id)
+        if self.shared is not None:
+            self.shared.delete(self.make_key(quiz_id))
+
+    # invalidates right away and again after commit,
+    # so a concurrent reader can not re-populate the old version in between
+    def invalidate_on_commit(self, quiz_id):
+        self.invalidate(quiz_id)
+        transaction.on_commit(lambda: self.invalidate(quiz_id))
+
+    def clear(self):
+        self.local.clear()
+        self.shared_hits = self.shared_misses = 0
+
+    def stats(self):
+        stats = self.local.stats()
+        stats['shared_hits'] = self.shared_hits
+        stats['shared_misses'] = self.shared_misses
+        return stats
+
+def build_quiz_payload_cache():
+    config = {**DEFAULT_QUIZ_PAYLOAD_CACHE, **getattr(settings, 'QUIZ_PAYLOAD_CACHE', {})}
+    return QuizPayloadCache(
+        max_entries=config['MAX_ENTRIES'],
+        cache_alias=config['CACHE_ALIAS'],
+        timeout=config['TIMEOUT'],
+        key_prefix=config['KEY_PREFIX'],
+        enabled=config['ENABLED'],
+        local_max_age=config['LOCAL_MAX_AGE'],
+    )
+
+quiz_payload_cache = build_quiz_payload_cache()
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+# default caching headers of the quiz and results endpoints,
+# can be overridden with QUIZ_HTTP_CACHE in settings
+DEFAULT_QUIZ_HTTP_CACHE = {
+    # quizzes hold no answers, a reverse proxy may share them for s-maxage seconds
+    # while browsers revalidate with If-None-Match on every fetch
+    'QUIZ_CACHE_CONTROL': 'public, max-age=0, s-maxage=60, must-revalidate',
+    # published quiz versions never change, browsers and proxies keep them for a year
+    'VERSION_CACHE_CONTROL': 'public, max-age=31536000, immutable',
+    # results are per user, only the browser keeps them and revalidates them
+    'RESULTS_CACHE_CONTROL': 'private, no-cache',
+}
+
+def get_http_cache_config():
+    return {**DEFAULT_QUIZ_HTTP_CACHE, **getattr(settings, 'QUIZ_HTTP_CACHE', {})}
+
+# strong validators built from change markers instead of hashing the rendered body:
+# a quiz changes with its version, a result with every answer (answered count and score),
+# its answers' correct options and question count with the quiz version,
+# and a deleted result is recreated with a new id
+def quiz_etag(quiz_id, version):
+    return f'"quiz-{quiz_id}-v{version}"'
+
+def result_etag(result):
+    return f'"result-{result["id"]}-{result["answered_count"]}-{result["score"]}-v{result["quiz__version"]}"'
+
+# whether the request's If-None-Match matches the etag (weak comparison, as required for GET)
+def is_not_modified(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag.removeprefix('W/') in [candidate.removeprefix('W/') for candidate in etags]
+
+# sets the validator and caching headers on a 200 or 304 response
+def add_cache_headers(response, etag, cache_control):
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    # the browsable api renders the same data as html
+    patch_vary_headers(response, ['Accept'])
+    return response
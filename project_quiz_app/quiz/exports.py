@@ -0,0 +1,75 @@
+import csv
+import json
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Result
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CSV_COLUMNS = [
+    'result_id', 'user_id', 'username', 'score', 'answered_count', 'completed_at',
+    'question_id', 'selected_option', 'correct_option', 'is_correct',
+]
+
+# one row per answer of every result of a quiz, ordered by result,
+# read in chunks so memory stays constant regardless of participant count
+def iter_answer_rows(quiz_id, chunk_size=2000):
+    Through = Result.answers.through
+    return (
+        Through.objects.filter(result__quiz_id=quiz_id)
+        .order_by('result_id', 'answer_id')
+        .values_list(
+            'result_id', 'result__user_id', 'result__user__username', 'result__score',
+            'result__answered_count', 'result__completed_at', 'answer__question_id',
+            'answer__selected_option', 'answer__question__correct_option', 'answer__is_correct',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+# file-like object handing back what csv.writer writes, used to stream csv lines
+class _Echo:
+    def write(self, value):
+        return value
+
+def iter_csv(quiz_id, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for row in iter_answer_rows(quiz_id, chunk_size):
+        completed_at = row[5].isoformat() if row[5] else ''
+        yield writer.writerow(row[:5] + (completed_at,) + row[6:])
+
+# one json object per result with its answers nested,
+# consecutive rows of the same result are grouped so only one result is held at a time
+def iter_ndjson(quiz_id, chunk_size=2000):
+    for result_id, rows in groupby(iter_answer_rows(quiz_id, chunk_size), key=lambda row: row[0]):
+        rows = list(rows)
+        _, user_id, username, score, answered_count, completed_at = rows[0][:6]
+        record = {
+            'result_id': result_id,
+            'user_id': user_id,
+            'username': username,
+            'score': score,
+            'answered_count': answered_count,
+            'completed': completed_at is not None,
+            'completed_at': completed_at,
+            'answers': [
+                {
+                    'question_id': question_id,
+                    'selected_option': selected_option,
+                    'correct_option': correct_option,
+                    'is_correct': is_correct
+                }
+                for question_id, selected_option, correct_option, is_correct in (row[6:] for row in rows)
+            ],
+        }
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+def iter_export(quiz_id, export_format, chunk_size=2000):
+    if export_format == 'csv':
+        return iter_csv(quiz_id, chunk_size)
+    return iter_ndjson(quiz_id, chunk_size)
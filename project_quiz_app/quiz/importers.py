@@ -0,0 +1,131 @@
+import codecs
+import csv
+import json
+import time
+
+from django.db import transaction
+
+from .models import Question, Quiz
+from .serializers import QuizSerializer
+from .versions import publish_quiz_versions
+
+IMPORT_FORMATS = ('jsonl', 'csv')
+
+# header of csv imports, consecutive rows with the same title form one quiz
+CSV_COLUMNS = ['title', 'text', 'option_1', 'option_2', 'option_3', 'option_4', 'correct_option']
+
+# outcome of an import: counts, throughput and per-row errors
+class ImportReport:
+    def __init__(self, max_errors=1000):
+        self.quizzes = 0
+        self.questions = 0
+        self.failed = 0
+        self.errors = [] # (line number, errors), at most max_errors are kept
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'quizzes': self.quizzes,
+            'questions': self.questions,
+            'failed': self.failed,
+            'seconds': round(self.elapsed, 3),
+            'quizzes_per_second': round(self.quizzes / self.elapsed, 1) if self.elapsed else None,
+            'errors': self.errors,
+        }
+
+# yields (line number, quiz data) from a json-lines file,
+# one quiz object {"title": ..., "questions": [...]} per line
+def iter_jsonl_records(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+# yields (line number, quiz data) from a csv file with CSV_COLUMNS,
+# the line number is the one of the quiz's first row
+def iter_csv_records(lines):
+    reader = csv.DictReader(lines)
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        yield 1, ValueError(f"Missing columns: {', '.join(sorted(missing))}.")
+        return
+
+    record = None
+    for row in reader:
+        if record is None or row['title'] != record[1]['title']:
+            if record is not None:
+                yield record
+            record = (reader.line_num, {'title': row['title'], 'questions': []})
+        record[1]['questions'].append({
+            'text': row['text'],
+            'options': [row[f'option_{index}'] for index in range(1, 5)],
+            'correct_option': row['correct_option'],
+        })
+    if record is not None:
+        yield record
+
+# checks that a binary file is valid utf-8 by decoding it chunk by chunk, then rewinds it,
+# so an undecodable upload is rejected before any of its batches is committed
+# raises UnicodeDecodeError
+def check_utf8(binary_file, chunk_size=1 << 20):
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in iter(lambda: binary_file.read(chunk_size), b''):
+        decoder.decode(chunk)
+    decoder.decode(b'', final=True)
+    binary_file.seek(0)
+
+def iter_records(lines, import_format):
+    if import_format == 'csv':
+        return iter_csv_records(lines)
+    return iter_jsonl_records(lines)
+
+# validates quizzes with QuizSerializer (and its QuestionSerializer rules)
+# and inserts them in batches, one transaction per batch,
+# with the first version of each quiz published in the same transaction
+def import_quizzes(records, batch_size=500, max_errors=1000):
+    report = ImportReport(max_errors=max_errors)
+    batch = []
+    for line_number, data in records:
+        if isinstance(data, Exception):
+            report.add_error(line_number, [str(data)])
+            continue
+        serializer = QuizSerializer(data=data)
+        if not serializer.is_valid():
+            report.add_error(line_number, serializer.errors)
+            continue
+        batch.append(serializer.validated_data)
+        if len(batch) >= batch_size:
+            _insert_batch(batch, report)
+            batch = []
+    if batch:
+        _insert_batch(batch, report)
+    report.finish()
+    return report
+
+def _insert_batch(batch, report):
+    with transaction.atomic():
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(title=quiz_data['title'], question_count=len(quiz_data['questions']))
+            for quiz_data in batch
+        ])
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, **question_data)
+            for quiz, quiz_data in zip(quizzes, batch)
+            for question_data in quiz_data['questions']
+        ])
+        publish_quiz_versions(quizzes, questions)
+    report.quizzes += len(quizzes)
+    report.questions += len(questions)
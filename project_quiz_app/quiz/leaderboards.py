@@ -0,0 +1,240 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections, transaction
+
+from .cache import LRUCache
+from .models import Result
+
+# default configuration of the leaderboards,
+# can be overridden with QUIZ_LEADERBOARD in settings
+DEFAULT_QUIZ_LEADERBOARD = {
+    'ENABLED': True, # rank from the in-process boards, the database is queried otherwise
+    'MAX_QUIZZES': 256, # size bound of the LRU of boards
+    'MAX_AGE': 30, # seconds after which a board is reloaded in the background, picks up other workers' writes
+    'CACHE_ALIAS': None, # optional shared django cache through which rebuild_leaderboards reaches every worker
+    'KEY_PREFIX': 'quiz-leaderboard',
+}
+
+def get_leaderboard_config():
+    return {**DEFAULT_QUIZ_LEADERBOARD, **getattr(settings, 'QUIZ_LEADERBOARD', {})}
+
+# scores of a quiz's participants kept sorted by (-score, user id),
+# ranks are found by bisection instead of counting the better results
+# ties share a rank (1, 1, 3)
+class Leaderboard:
+    def __init__(self, scores=(), generation=None):
+        self.scores = dict(scores)
+        self.keys = sorted((-score, user_id) for user_id, score in self.scores.items())
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    # adds to a user's score, a user without result enters the board
+    def add_score(self, user_id, delta):
+        with self.lock:
+            score = self.scores.get(user_id)
+            if score is not None:
+                del self.keys[bisect_left(self.keys, (-score, user_id))]
+            score = (score or 0) + delta
+            self.scores[user_id] = score
+            insort(self.keys, (-score, user_id))
+
+    def remove(self, user_id):
+        with self.lock:
+            score = self.scores.pop(user_id, None)
+            if score is not None:
+                del self.keys[bisect_left(self.keys, (-score, user_id))]
+
+    def rank_of_score(self, score):
+        return bisect_left(self.keys, (-score,)) + 1
+
+    # (rank, score) of a user, None when they did not take part
+    def rank(self, user_id):
+        with self.lock:
+            score = self.scores.get(user_id)
+            if score is None:
+                return None
+            return self.rank_of_score(score), score
+
+    # [(rank, user id, score)] of the best participants
+    def top(self, limit):
+        with self.lock:
+            return [(self.rank_of_score(-key), user_id, -key) for key, user_id in self.keys[:limit]]
+
+# in-process leaderboards, one per quiz, loaded with a single query over the quiz's results
+# and updated on commit by the submissions and deletions of this process,
+# boards older than MAX_AGE keep being served while a background thread reloads them,
+# so the writes of other workers show up without a full reload in the request path
+# rebuild() reloads the boards of every worker sharing CACHE_ALIAS on their next read
+class LeaderboardStore:
+    def __init__(self, max_quizzes=256, max_age=30, cache_alias=None, key_prefix='quiz-leaderboard', enabled=True):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.local = LRUCache(max_quizzes)
+        # number of updates per quiz, a load overlapping with an update is not kept
+        self.updates = {}
+        # quizzes whose board is being reloaded in the background
+        self.refreshing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias]
+
+    def generation_key(self, quiz_id):
+        return f'{self.key_prefix}:{quiz_id}:generation'
+
+    def get_generation(self, quiz_id):
+        return self.shared.get(self.generation_key(quiz_id), 0) if self.shared is not None else None
+
+    # a board is loaded in the request on its first read and after a rebuild,
+    # an expired one is served as is and reloaded in the background
+    def get(self, quiz_id):
+        board = self.local.get(quiz_id)
+        if board is None or board.generation != self.get_generation(quiz_id):
+            return self.load(quiz_id)
+        if time.monotonic() - board.loaded_at > self.max_age:
+            self.refresh_in_background(quiz_id)
+        return board
+
+    def refresh_in_background(self, quiz_id):
+        with self._lock:
+            if quiz_id in self.refreshing:
+                return
+            self.refreshing.add(quiz_id)
+        self.run_in_background(lambda: self.refresh(quiz_id))
+
+    # reloads a board outside of any transaction, so it is stored right away
+    def refresh(self, quiz_id):
+        try:
+            updates = self.updates.get(quiz_id, 0)
+            self.store(quiz_id, self.read_board(quiz_id), updates)
+        finally:
+            with self._lock:
+                self.refreshing.discard(quiz_id)
+
+    def run_in_background(self, function):
+        def run():
+            try:
+                function()
+            finally:
+                # the thread's own connections
+                connections.close_all()
+        threading.Thread(target=run, daemon=True).start()
+
+    # kept once the surrounding transaction commits, unless the quiz's scores changed meanwhile
+    def load(self, quiz_id):
+        updates = self.updates.get(quiz_id, 0)
+        board = self.read_board(quiz_id)
+        transaction.on_commit(lambda: self.store(quiz_id, board, updates))
+        return board
+
+    def read_board(self, quiz_id):
+        generation = self.get_generation(quiz_id)
+        return Leaderboard(Result.objects.filter(quiz_id=quiz_id).values_list('user_id', 'score'), generation)
+
+    def store(self, quiz_id, board, updates):
+        with self._lock:
+            if self.updates.get(quiz_id, 0) == updates:
+                self.local.set(quiz_id, board)
+
+    def apply(self, quiz_id, update):
+        with self._lock:
+            self.updates[quiz_id] = self.updates.get(quiz_id, 0) + 1
+            board = self.local.get(quiz_id)
+        if board is not None:
+            update(board)
+
+    # score increments and result deletions, applied to the board once committed
+    def add_score_on_commit(self, quiz_id, user_id, delta):
+        if self.enabled:
+            transaction.on_commit(lambda: self.apply(quiz_id, lambda board: board.add_score(user_id, delta)))
+
+    def remove_on_commit(self, quiz_id, user_id):
+        if self.enabled:
+            transaction.on_commit(lambda: self.apply(quiz_id, lambda board: board.remove(user_id)))
+
+    def invalidate(self, quiz_id):
+        with self._lock:
+            self.updates[quiz_id] = self.updates.get(quiz_id, 0) + 1
+            self.local.delete(quiz_id)
+
+    # reloads the board of this process, and of the other workers through the shared generation
+    def rebuild(self, quiz_id):
+        if self.shared is not None:
+            try:
+                self.shared.incr(self.generation_key(quiz_id))
+            except ValueError:
+                self.shared.set(self.generation_key(quiz_id), 1, None)
+        self.invalidate(quiz_id)
+        return self.get(quiz_id)
+
+    def clear(self):
+        with self._lock:
+            self.updates.clear()
+            self.refreshing.clear()
+            self.local.clear()
+
+    def stats(self):
+        return self.local.stats()
+
+def build_leaderboard_store():
+    config = get_leaderboard_config()
+    return LeaderboardStore(
+        max_quizzes=config['MAX_QUIZZES'],
+        max_age=config['MAX_AGE'],
+        cache_alias=config['CACHE_ALIAS'],
+        key_prefix=config['KEY_PREFIX'],
+        enabled=config['ENABLED']
+    )
+
+leaderboard_store = build_leaderboard_store()
+
+# leaderboard of a quiz as {'participants', 'top': [(rank, user id, score)], 'me': (rank, score) or None}
+# from the in-process board, or from the database when the store is disabled
+def get_leaderboard(quiz_id, user_id, limit):
+    if not leaderboard_store.enabled:
+        return query_leaderboard(quiz_id, user_id, limit)
+    board = leaderboard_store.get(quiz_id)
+    return {'participants': len(board), 'top': board.top(limit), 'me': board.rank(user_id)}
+
+# fallback on the (quiz, -score) index: the top is an index range read,
+# a rank counts the better results of the quiz
+def query_leaderboard(quiz_id, user_id, limit):
+    results = Result.objects.filter(quiz_id=quiz_id)
+    top = []
+    for position, (top_user_id, score) in enumerate(results.order_by('-score', 'user_id').values_list('user_id', 'score')[:limit]):
+        rank = top[-1][0] if top and top[-1][2] == score else position + 1
+        top.append((rank, top_user_id, score))
+
+    me = None
+    score = results.filter(user_id=user_id).values_list('score', flat=True).first()
+    if score is not None:
+        me = (results.filter(score__gt=score).count() + 1, score)
+    return {'participants': results.count(), 'top': top, 'me': me}
+
+# leaderboard response with the usernames of the top entries, looked up in one query
+def leaderboard_response_data(quiz_id, leaderboard):
+    usernames = dict(User.objects.filter(id__in=[user_id for _, user_id, _ in leaderboard['top']]).values_list('id', 'username'))
+    me = leaderboard['me']
+    return {
+        "quiz_id": quiz_id,
+        "participants": leaderboard['participants'],
+        "top": [
+            {"rank": rank, "user_id": user_id, "username": usernames.get(user_id), "score": score}
+            for rank, user_id, score in leaderboard['top']
+        ],
+        "me": {"rank": me[0], "score": me[1]} if me is not None else None
+    }
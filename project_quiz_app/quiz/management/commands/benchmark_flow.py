@@ -0,0 +1,181 @@
+import json
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from quiz.benchmarking import check_thresholds, format_summary, make_baseline, summarize
+from quiz.answer_keys import answer_key_store
+from quiz.cache import quiz_payload_cache
+from quiz.seeding import seed_dataset, seeded_dataset
+
+STEPS = ('login', 'list', 'fetch', 'submit', 'results')
+
+# load benchmark of the take-a-quiz flow of the frontend:
+# every virtual user logs in, lists the quizzes, fetches one, submits its answers
+# (one request per answer, or all at once with --bulk) and fetches the result
+# reports throughput, latency percentiles and queries per request of every step,
+# and fails when a --baseline of thresholds is regressed
+# requests are dispatched in-process with django's test client,
+# see benchmarks/locustfile.py for the same scenario against a running server
+# the seeded users get a random password and are deleted with their quizzes afterwards,
+# only --seed-only leaves them in the database, with the --password given
+class Command(BaseCommand):
+    help = "Benchmark the take-a-quiz flow (login, list, fetch, submit, results) against a seeded dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Virtual users, each takes one quiz.")
+        parser.add_argument('--quizzes', type=int, default=20)
+        parser.add_argument('--questions', type=int, default=10, help="Questions per quiz.")
+        parser.add_argument('--attempt-ratio', type=float, default=0.2, help="Share of quizzes already completed by each user.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Virtual users running at the same time.")
+        parser.add_argument('--bulk', action='store_true', help="Submit all answers in one request.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--seed-only', action='store_true', help="Only seed the users and quizzes and keep them, e.g. for locust.")
+        parser.add_argument('--password', help="Password of the seeded users, required with --seed-only.")
+        parser.add_argument('--output', help="File the json report is written to.")
+        parser.add_argument('--baseline', help="Json thresholds the run must stay within.")
+        parser.add_argument('--tolerance', type=float, help="Overrides the tolerance of the baseline.")
+        parser.add_argument('--save-baseline', help="File a baseline matching this run is written to.")
+
+    def handle(self, *args, **options):
+        dataset = {
+            'users': options['users'],
+            'quizzes': options['quizzes'],
+            'questions_per_quiz': options['questions'],
+            'attempt_ratio': options['attempt_ratio'],
+            'seed': options['seed'],
+            'username_prefix': f"bench-flow-{options['seed']}",
+        }
+        if options['seed_only']:
+            if not options['password']:
+                raise CommandError("--seed-only requires a --password for the seeded users.")
+            summary = seed_dataset(password=options['password'], **dataset)
+            self.stdout.write(f"Seeded {summary['users']} users bench-flow-{options['seed']}-<n>.")
+            return
+
+        password = options['password'] or secrets.token_urlsafe()
+        with seeded_dataset(password=password, **dataset) as summary:
+            usernames = [f"bench-flow-{options['seed']}-{index}" for index in range(summary['users'])]
+            self.benchmark(usernames, password, options)
+
+    def benchmark(self, usernames, password, options):
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+
+        def run(index):
+            rng = random.Random(options['seed'] * 100003 + index)
+            return self.take_quiz(usernames[index], password, rng, options['bulk'])
+
+        # the in-process test client uses the "testserver" host
+        with override_settings(ALLOWED_HOSTS=['*']):
+            started = time.perf_counter()
+            if options['concurrency'] > 1:
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                    flows = list(executor.map(run, range(len(usernames))))
+            else:
+                flows = [run(index) for index in range(len(usernames))]
+            elapsed = time.perf_counter() - started
+
+        report = self.build_report([sample for samples in flows for sample in samples], elapsed)
+        self.stdout.write(
+            f"{len(flows)} flows, {report['requests']} requests in {elapsed:.2f}s, "
+            f"{report['throughput']:.1f} req/s, {report['errors']} errors"
+        )
+        for step, measured in report['steps'].items():
+            self.stdout.write(
+                f"{step:<8} {format_summary(measured)}, "
+                f"{measured['queries_mean']:.1f} queries/request (max {measured['queries_max']})"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as output:
+                json.dump(make_baseline(report), output, indent=2)
+
+        if report['errors']:
+            raise CommandError(f"{report['errors']} requests failed.")
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = check_thresholds(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Regressed against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Within the baseline."))
+
+    # one virtual user, returns (step, milliseconds, queries, status code) per request
+    def take_quiz(self, username, password, rng, bulk):
+        client = Client()
+        samples = []
+
+        def send(step, method, path, data=None):
+            queries = 0
+
+            def count_query(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_query):
+                if method == 'post':
+                    response = client.post(path, data, content_type='application/json')
+                else:
+                    response = client.get(path)
+            samples.append((step, (time.perf_counter() - started) * 1000, queries, response.status_code))
+            return response
+
+        response = send('login', 'post', '/user/api/login/', {'username': username, 'password': password})
+        if response.status_code != 200:
+            return samples
+        user_id = response.json()['user_id']
+        client.defaults['HTTP_AUTHORIZATION'] = 'Bearer ' + response.json()['access']
+
+        response = send('list', 'get', '/quiz/api/quizzes/?limit=20')
+        if response.status_code != 200 or not response.json():
+            return samples
+        quiz_id = rng.choice(response.json())['id']
+
+        response = send('fetch', 'get', f'/quiz/api/quizzes/{quiz_id}/')
+        if response.status_code != 200:
+            return samples
+        answers = [
+            {'question_id': question['id'], 'selected_option': rng.randint(1, 4)}
+            for question in response.json()['questions']
+        ]
+
+        if bulk:
+            send('submit', 'post', f'/quiz/api/quizzes/{quiz_id}/submit/', {'answers': answers})
+        else:
+            for answer in answers:
+                send('submit', 'post', '/quiz/api/quizzes/submit/', answer)
+
+        send('results', 'get', f'/quiz/api/quizzes/{quiz_id}/users/{user_id}/results/')
+        return samples
+
+    def build_report(self, samples, elapsed):
+        steps = {}
+        for step in STEPS:
+            step_samples = [sample for sample in samples if sample[0] == step]
+            if not step_samples:
+                continue
+            queries = [sample[2] for sample in step_samples]
+            steps[step] = {
+                **summarize([sample[1] for sample in step_samples]),
+                'queries_mean': sum(queries) / len(queries),
+                'queries_max': max(queries),
+            }
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for sample in samples if sample[3] >= 400),
+            'elapsed': elapsed,
+            'throughput': len(samples) / elapsed if elapsed else 0.0,
+            'steps': steps,
+        }
@@ -0,0 +1,69 @@
+import io
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from project_quiz_app.parsers import FastJSONParser
+from project_quiz_app.renderers import FastJSONRenderer, orjson
+from quiz.serializers import serialize_answer_summaries
+
+# micro-benchmark of DRF's json renderer and parser against the fast ones of REST_FRAMEWORK,
+# on a large quiz payload and a large results payload built in memory (no database)
+class Command(BaseCommand):
+    help = "Benchmark JSON rendering and parsing of large quiz and results payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=500, help="Questions of the quiz payload.")
+        parser.add_argument('--answers', type=int, default=500, help="Answers of the results payload.")
+        parser.add_argument('--repeat', type=int, default=200, help="Calls timed per case.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        payloads = {
+            'quiz': {
+                'version': 3,
+                'title': "Benchmark Quiz",
+                'questions': [
+                    {'id': index, 'text': f"Question {index} of the benchmark quiz, été?", 'options': [f"Option {option} ✓" for option in range(1, 5)]}
+                    for index in range(options['questions'])
+                ],
+            },
+            'results': {
+                'quiz_id': 1,
+                'user_id': 1,
+                'total_score': options['answers'] // 2,
+                'question_count': options['answers'],
+                'answered_count': options['answers'],
+                'completed': True,
+                'completed_at': timezone.now(),
+                'quiz_version': 3,
+                'answers': serialize_answer_summaries(
+                    (index, rng.randint(1, 4), rng.randint(1, 4), rng.random() < 0.5) for index in range(options['answers'])
+                ),
+            },
+        }
+        if orjson is None:
+            self.stdout.write("orjson is not installed, the fast classes use the stdlib json module.")
+
+        self.stdout.write(f"{'case':<16} {'drf':>10} {'fast':>10} {'speedup':>8}")
+        for name, payload in payloads.items():
+            body = JSONRenderer().render(payload)
+            self.report(
+                f'render {name}', options['repeat'],
+                lambda: JSONRenderer().render(payload), lambda: FastJSONRenderer().render(payload)
+            )
+            self.report(
+                f'parse {name}', options['repeat'],
+                lambda: JSONParser().parse(io.BytesIO(body)), lambda: FastJSONParser().parse(io.BytesIO(body))
+            )
+            self.stdout.write(f"{'':<16} {len(body) / 1024:.0f} KiB body")
+
+    # best of 3 runs, in microseconds per call
+    def report(self, case, repeat, baseline, fast):
+        timings = [min(timeit.repeat(function, number=repeat, repeat=3)) / repeat * 1e6 for function in (baseline, fast)]
+        self.stdout.write(f"{case:<16} {timings[0]:>8.0f}us {timings[1]:>8.0f}us {timings[0] / timings[1]:>7.1f}x")
@@ -0,0 +1,99 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from quiz.benchmarking import format_summary, summarize
+from quiz.models import Answer, Question, Quiz, Result
+from quiz.seeding import seeded_dataset
+
+# seeds a large dataset and reports query plans and timings
+# of the lookups done by the quiz API on every request
+#
+# the seeded rows are deleted afterwards, unless --keep is passed
+# to compare before/after an index migration, run it once with --keep,
+# migrate back (e.g. `migrate quiz 0003`), run it again with --skip-seed,
+# and migrate forward again
+class Command(BaseCommand):
+    help = "Seed a benchmark dataset and report query plans and timings of the quiz API lookups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--quizzes', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=10, help="Questions per quiz.")
+        parser.add_argument('--attempt-ratio', type=float, default=0.3, help="Share of quizzes attempted by each user.")
+        parser.add_argument('--repeat', type=int, default=200, help="Timed executions per query.")
+        parser.add_argument('--skip-seed', action='store_true', help="Reuse the data already in the database.")
+        parser.add_argument('--keep', action='store_true', help="Leave the seeded data in the database.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            self.benchmark(options)
+            return
+
+        started = time.perf_counter()
+        with seeded_dataset(
+            keep=options['keep'],
+            users=options['users'],
+            quizzes=options['quizzes'],
+            questions_per_quiz=options['questions'],
+            attempt_ratio=options['attempt_ratio'],
+            seed=options['seed']
+        ) as summary:
+            self.stdout.write(
+                f"Seeded {summary['users']} users, {summary['quizzes']} quizzes, {summary['questions']} questions, "
+                f"{summary['answers']} answers, {summary['results']} results "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        rng = random.Random(options['seed'])
+
+        answer_keys = list(Answer.objects.values_list('question_id', 'user_id')[:1000])
+        result_keys = list(Result.objects.values_list('id', 'user_id', 'quiz_id')[:1000])
+        quiz_ids = list(Quiz.objects.values_list('id', flat=True)[:1000])
+        if not (answer_keys and result_keys and quiz_ids):
+            self.stderr.write("Not enough data to benchmark, run without --skip-seed.")
+            return
+
+        # one factory per access pattern, returning a queryset for random existing keys
+        def answer_lookup():
+            question_id, user_id = rng.choice(answer_keys)
+            return Answer.objects.filter(question_id=question_id, user_id=user_id)
+
+        def result_lookup():
+            _, user_id, quiz_id = rng.choice(result_keys)
+            return Result.objects.filter(user_id=user_id, quiz_id=quiz_id)
+
+        def quiz_list():
+            _, user_id, _ = rng.choice(result_keys)
+            return Quiz.objects.exclude(id__in=Result.objects.filter(user_id=user_id).values('quiz_id'))
+
+        def quiz_questions():
+            return Question.objects.filter(quiz_id=rng.choice(quiz_ids)).order_by('id')
+
+        def result_answers():
+            result_id, _, _ = rng.choice(result_keys)
+            return Answer.objects.filter(result=result_id).values_list('question_id', 'question__correct_option')
+
+        benchmarks = [
+            ('answer by (question, user)', answer_lookup),
+            ('result by (user, quiz)', result_lookup),
+            ('unattempted quizzes of user', quiz_list),
+            ('questions of quiz by id', quiz_questions),
+            ('answers of result', result_answers),
+        ]
+
+        for name, factory in benchmarks:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(factory().explain())
+
+            timings = []
+            for _ in range(options['repeat']):
+                queryset = factory()
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"  {format_summary(summarize(timings))}\n")
@@ -0,0 +1,39 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quiz.models import Question, Quiz
+from quiz.serializers import QuizSerializer
+from quiz.versions import build_quiz_payload
+
+# compares building a quiz payload with QuizSerializer (prefetched questions, field by field)
+# and with build_quiz_payload (one values() query into plain dicts), per quiz size
+# the quizzes are created in a transaction that is rolled back afterwards
+class Command(BaseCommand):
+    help = "Benchmark the quiz payload built by QuizSerializer against the values() fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, nargs='+', default=[10, 100, 500], help="Quiz sizes to measure.")
+        parser.add_argument('--repeat', type=int, default=50, help="Payloads built per size and path.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'questions':>9} {'serializer':>12} {'values()':>12} {'per question':>22} {'speedup':>8}")
+        with transaction.atomic():
+            for size in options['questions']:
+                quiz = Quiz.objects.create(title=f"Benchmark Quiz {size}", question_count=size)
+                Question.objects.bulk_create([
+                    Question(quiz=quiz, text=f"Question {index}?", options=[f"Option {option}" for option in range(1, 5)], correct_option=1)
+                    for index in range(size)
+                ])
+                serializer = self.measure(lambda: QuizSerializer(Quiz.objects.prefetch_related('questions').get(id=quiz.id)).data, options['repeat'])
+                fast = self.measure(lambda: build_quiz_payload(quiz.id), options['repeat'])
+                self.stdout.write(
+                    f"{size:>9} {serializer / 1000:>10.2f}ms {fast / 1000:>10.2f}ms "
+                    f"{serializer / size:>9.1f}us -> {fast / size:>6.1f}us {serializer / fast:>7.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    # best of 3 runs, in microseconds per payload
+    def measure(self, function, repeat):
+        return min(timeit.repeat(function, number=repeat, repeat=3)) / repeat * 1e6
@@ -0,0 +1,123 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from quiz.benchmarking import format_summary, summarize
+from quiz.cache import quiz_payload_cache
+from quiz.models import Quiz, Result
+from quiz.seeding import seeded_dataset
+
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+# compares throughput of the quiz read endpoints at high concurrency:
+#   wsgi       - sync views through the WSGI handler, one thread per concurrent client
+#   asgi-sync  - sync views through the ASGI handler (each request hops to the thread executor)
+#   asgi-async - async views through the ASGI handler
+# requests are dispatched in-process with django's test clients,
+# so the numbers compare handler overhead rather than a full server stack
+# the seeded rows are deleted afterwards, unless --keep is passed
+class Command(BaseCommand):
+    help = "Benchmark sync (WSGI) against async (ASGI) quiz read views at high concurrency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per mode.")
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=20, help="Questions per quiz.")
+        parser.add_argument('--skip-seed', action='store_true', help="Reuse the data already in the database.")
+        parser.add_argument('--keep', action='store_true', help="Leave the seeded data in the database.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            self.benchmark(options)
+            return
+
+        with seeded_dataset(
+            keep=options['keep'],
+            users=options['users'],
+            quizzes=options['quizzes'],
+            questions_per_quiz=options['questions'],
+            attempt_ratio=0.5,
+            seed=options['seed']
+        ):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        results = list(Result.objects.values_list('user_id', 'quiz_id')[:1000])
+        quiz_ids = list(Quiz.objects.values_list('id', flat=True)[:1000])
+        if not results:
+            raise CommandError("Not enough data to benchmark, run without --skip-seed.")
+        tokens = {
+            user.id: str(RefreshToken.for_user(user).access_token)
+            for user in User.objects.filter(id__in={user_id for user_id, _ in results})
+        }
+
+        # the same random request mix is replayed in every mode
+        rng = random.Random(options['seed'])
+        plan = []
+        for _ in range(options['requests']):
+            user_id, quiz_id = rng.choice(results)
+            path = rng.choice([
+                'api/quizzes/?limit=20',
+                f'api/quizzes/{rng.choice(quiz_ids)}/',
+                f'api/quizzes/{quiz_id}/users/{user_id}/results/',
+            ])
+            plan.append((path, tokens[user_id]))
+
+        # the in-process test clients use the "testserver" host
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for mode in options['modes']:
+                quiz_payload_cache.clear()
+                if mode == 'wsgi':
+                    latencies, elapsed, errors = self.run_wsgi(plan, options['concurrency'])
+                else:
+                    prefix = '/quiz/api/async/' if mode == 'asgi-async' else '/quiz/api/'
+                    latencies, elapsed, errors = asyncio.run(self.run_asgi(plan, options['concurrency'], prefix))
+                self.stdout.write(f"{mode:<11} {format_summary(summarize(latencies, elapsed))}, {errors} errors")
+
+    def run_wsgi(self, plan, concurrency):
+        local = threading.local()
+
+        def send(request):
+            path, token = request
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            started = time.perf_counter()
+            response = local.client.get(f'/quiz/{path}', headers={'Authorization': f'Bearer {token}'})
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(send, plan))
+        return self.collect(outcomes, time.perf_counter() - started)
+
+    async def run_asgi(self, plan, concurrency, prefix):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(request):
+            path, token = request
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(prefix + path.replace('api/', '', 1), headers={'Authorization': f'Bearer {token}'})
+                return (time.perf_counter() - started) * 1000, response.status_code
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(send(request) for request in plan))
+        return self.collect(outcomes, time.perf_counter() - started)
+
+    def collect(self, outcomes, elapsed):
+        latencies = [latency for latency, _ in outcomes]
+        errors = sum(1 for _, status_code in outcomes if status_code >= 400)
+        return latencies, elapsed, errors
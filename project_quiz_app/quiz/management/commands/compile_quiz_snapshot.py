@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.snapshots import compile_snapshot, get_snapshot_config
+
+# compiles the shared quiz snapshot read by every worker (see quiz/snapshots.py),
+# the new file replaces the old one atomically and workers map it within CHECK_INTERVAL seconds
+# rerun it after quizzes are edited, other workers keep serving the compiled quizzes until then
+class Command(BaseCommand):
+    help = "Compile the published quizzes and their answer keys into the memory mapped snapshot file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Snapshot file, defaults to QUIZ_SNAPSHOT['PATH'].")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Quizzes read per query.")
+
+    def handle(self, *args, **options):
+        path = options['output'] or get_snapshot_config()['PATH']
+        if not path:
+            raise CommandError("No snapshot file, set QUIZ_SNAPSHOT['PATH'] or pass --output.")
+
+        started = time.perf_counter()
+        quizzes, questions = compile_snapshot(path, chunk_size=options['chunk_size'])
+        self.stdout.write(f"Compiled {quizzes} quizzes and {questions} questions into {path} in {time.perf_counter() - started:.2f}s.")
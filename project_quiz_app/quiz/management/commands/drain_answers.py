@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quiz.models import PendingAnswer
+from quiz.submissions import drain_pending_answers, get_ingestion_config
+
+# worker of the write-behind answer ingestion (QUIZ_ANSWER_INGESTION['MODE'] = 'write-behind'),
+# moves the queued answers into Answer/Result in batches
+# runs once by default, or keeps polling the journal with --loop
+class Command(BaseCommand):
+    help = "Move answers queued in write-behind mode into answers and results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=get_ingestion_config()['BATCH_SIZE'])
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches.")
+        parser.add_argument('--loop', action='store_true', help="Keep draining until interrupted.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between two polls of an empty journal.")
+
+    def handle(self, *args, **options):
+        while True:
+            summary = drain_pending_answers(options['batch_size'], options['max_batches'])
+            if summary['batches'] or not options['loop']:
+                self.stdout.write(
+                    f"Stored {summary['stored']} answers in {summary['batches']} batches, "
+                    f"dropped {summary['dropped']} already answered, {PendingAnswer.objects.count()} still pending."
+                )
+            if not options['loop']:
+                return
+            if not summary['batches']:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.exports import EXPORT_FORMATS, iter_export
+from quiz.models import Quiz
+
+# writes every result of a quiz as csv or ndjson,
+# streamed in chunks like the export API
+class Command(BaseCommand):
+    help = "Export all results of a quiz as csv (one line per answer) or ndjson (one object per result)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help="File to write to, defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched from the database at a time.")
+
+    def handle(self, *args, **options):
+        quiz_id = options['quiz_id']
+        if not Quiz.objects.filter(id=quiz_id).exists():
+            raise CommandError(f"Quiz {quiz_id} not found.")
+
+        lines = iter_export(quiz_id, options['export_format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
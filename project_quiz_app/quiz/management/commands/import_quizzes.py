@@ -0,0 +1,42 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.importers import IMPORT_FORMATS, check_utf8, import_quizzes, iter_records
+
+# imports quizzes from a json-lines or csv file,
+# see quiz/importers.py for the expected layout
+class Command(BaseCommand):
+    help = "Import quizzes with their questions from a json-lines or csv file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS,
+                            help="File format, guessed from the file extension by default.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Quizzes inserted per transaction.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['import_format'] or path.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"Unknown format, use --format with one of: {', '.join(IMPORT_FORMATS)}.")
+
+        try:
+            with open(path, 'rb') as binary_file:
+                # checked before the first batch is committed
+                check_utf8(binary_file)
+                lines = io.TextIOWrapper(binary_file, encoding='utf-8', newline='')
+                report = import_quizzes(iter_records(lines, import_format), batch_size=options['batch_size'])
+        except UnicodeDecodeError:
+            raise CommandError(f"{path} is not UTF-8 encoded, nothing was imported.")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        summary = report.as_dict()
+        self.stdout.write(
+            f"Imported {summary['quizzes']} quizzes and {summary['questions']} questions "
+            f"in {summary['seconds']}s ({summary['quizzes_per_second']} quizzes/s), {summary['failed']} failed."
+        )
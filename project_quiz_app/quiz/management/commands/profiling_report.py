@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.profiling import get_config, load_profiles
+
+# merges the histograms dumped by the profiling middleware of every worker
+# and prints the latency percentiles per url name
+class Command(BaseCommand):
+    help = "Print p50/p95/p99 of the request timings and query counts recorded by the profiling middleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', dest='directory', help="Directory of the dumps, defaults to QUIZ_PROFILING['DUMP_DIR'].")
+        parser.add_argument('--metric', choices=['total', 'db', 'app', 'render', 'queries'], default='total',
+                            help="Metric the views are sorted by (p95, descending).")
+        parser.add_argument('--reset', action='store_true', help="Delete the dumps after printing them.")
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or get_config()['DUMP_DIR']
+        if not directory or not Path(directory).is_dir():
+            raise CommandError("No profiling dumps found, enable QUIZ_PROFILING and set its DUMP_DIR.")
+
+        profiles = load_profiles(directory)
+        if not profiles:
+            self.stdout.write("No requests recorded.")
+            return
+
+        self.stdout.write(
+            f"{'view':<28} {'requests':>8} {'total p50/p95/p99 ms':>24} {'db p95 ms':>10} "
+            f"{'app p95 ms':>10} {'render p95 ms':>13} {'queries p50/p99':>16}"
+        )
+        ordered = sorted(profiles.items(), key=lambda item: item[1][options['metric']].percentile(95), reverse=True)
+        for view_name, histograms in ordered:
+            total = histograms['total']
+            queries = histograms['queries']
+            self.stdout.write(
+                f"{view_name:<28} {total.count:>8} "
+                f"{total.percentile(50):>8.2f}/{total.percentile(95):.2f}/{total.percentile(99):.2f} "
+                f"{histograms['db'].percentile(95):>10.2f} {histograms['app'].percentile(95):>10.2f} "
+                f"{histograms['render'].percentile(95):>13.2f} "
+                f"{queries.percentile(50):>10.0f}/{queries.percentile(99):.0f}"
+            )
+
+        if options['reset']:
+            for path in Path(directory).glob('profile-*.json'):
+                path.unlink()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from quiz.leaderboards import leaderboard_store
+from quiz.models import Result
+
+# reloads leaderboards from the results, after results were changed outside the api
+# (imports, raw sql, a drain in another process), the workers sharing
+# QUIZ_LEADERBOARD['CACHE_ALIAS'] reload their boards on the next read
+class Command(BaseCommand):
+    help = "Rebuild the leaderboards of the given quizzes, or of every quiz with results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids'] or Result.objects.values_list('quiz_id', flat=True).distinct().order_by('quiz_id')
+        for quiz_id in quiz_ids:
+            board = leaderboard_store.rebuild(quiz_id)
+            leader = board.top(1)
+            self.stdout.write(
+                f"Quiz {quiz_id}: {len(board)} participants"
+                + (f", leader user {leader[0][1]} with {leader[0][2]}" if leader else "")
+            )
+        if leaderboard_store.shared is None:
+            self.stdout.write("QUIZ_LEADERBOARD['CACHE_ALIAS'] is not set, running workers keep their boards until MAX_AGE.")
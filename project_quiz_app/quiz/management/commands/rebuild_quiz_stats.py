@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quiz.stats import rebuild_quiz_stats
+
+# recomputes the quiz statistics counters from the stored answers and results,
+# fills them for answers stored before they existed or with QUIZ_STATS['ENABLED'] off
+class Command(BaseCommand):
+    help = "Rebuild the statistics counters of the given quizzes, or of every quiz."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_quiz_stats(options['quiz_ids'] or None)
+        self.stdout.write(f"Rebuilt the statistics of {rebuilt} quizzes.")
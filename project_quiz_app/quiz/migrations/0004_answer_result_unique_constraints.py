@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-17 22:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# rows duplicated by concurrent submissions before the constraints existed,
+# the earliest row of each group is kept
+def remove_duplicates(apps, schema_editor):
+    for model_name, fields in (('Answer', ('question', 'user')), ('Result', ('user', 'quiz'))):
+        model = apps.get_model('quiz', model_name)
+        duplicates = model.objects.values(*fields).annotate(first_id=Min('id'), rows=Count('id')).filter(rows__gt=1)
+        for group in duplicates:
+            lookup = {field: group[field] for field in fields}
+            model.objects.filter(**lookup).exclude(id=group['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_alter_question_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='unique_answer_per_user_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='result',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='unique_result_per_user_quiz'),
+        ),
+    ]
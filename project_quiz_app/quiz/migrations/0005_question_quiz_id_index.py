@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0004_answer_result_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quiz', 'id'], name='question_quiz_id_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.3 on 2026-10-17 22:29
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+# fills the new counters from the existing rows,
+# results answering every question of their quiz are marked completed
+def backfill_counts(apps, schema_editor):
+    Quiz = apps.get_model('quiz', 'Quiz')
+    Question = apps.get_model('quiz', 'Question')
+    Result = apps.get_model('quiz', 'Result')
+
+    question_counts = Question.objects.filter(quiz=OuterRef('pk')).values('quiz').annotate(total=Count('id')).values('total')
+    Quiz.objects.update(question_count=Coalesce(Subquery(question_counts), 0))
+
+    Through = Result.answers.through
+    answered_counts = Through.objects.filter(result=OuterRef('pk')).values('result').annotate(total=Count('id')).values('total')
+    Result.objects.update(answered_count=Coalesce(Subquery(answered_counts), 0))
+
+    Result.objects.filter(
+        quiz__question_count__gt=0,
+        answered_count__gte=F('quiz__question_count')
+    ).update(completed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_question_quiz_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='answered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-17 23:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_pending_answer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['quiz', '-score', 'user'], name='result_quiz_score_idx'),
+        ),
+    ]
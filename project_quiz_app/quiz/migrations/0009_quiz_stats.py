@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-17 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0008_result_quiz_score_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionOptionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_option', models.PositiveIntegerField()),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_stats', to='quiz.question')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_stats', to='quiz.quiz')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['quiz'], name='option_stats_quiz_idx')],
+                'constraints': [models.UniqueConstraint(fields=('question', 'selected_option'), name='unique_option_stats_per_question_option')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizScoreStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField()),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_stats', to='quiz.quiz')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'score'), name='unique_score_stats_per_quiz_score')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_quiz_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-17 23:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0010_quiz_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='quiz_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pendinganswer',
+            name='quiz_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='quiz_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='QuizVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='quiz.quiz')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'number'), name='unique_version_per_quiz_number')],
+            },
+        ),
+    ]
@@ -3,21 +3,106 @@ from django.contrib.auth.models import User
 
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
+    question_count = models.PositiveIntegerField(default=0) # maintained on question create/delete
+    version = models.PositiveIntegerField(default=1) # bumped on every edit of the quiz or its questions, see signals.py
+
+# frozen rendering of a published quiz version, never changed once written (see versions.py)
+class QuizVersion(models.Model):
+    quiz = models.ForeignKey(Quiz, related_name='versions', on_delete=models.CASCADE)
+    number = models.PositiveIntegerField() # Quiz.version at publication
+    payload = models.JSONField() # answer-stripped quiz as served by the quiz detail endpoint
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'number'], name='unique_version_per_quiz_number'),
+        ]
 
 class Question(models.Model):
     quiz = models.ForeignKey(Quiz, related_name="questions", on_delete=models.CASCADE) # foreign key to map with quiz object
     text = models.CharField(max_length=500)
     options = models.JSONField(default=list)
     correct_option = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # questions of a quiz are always read ordered by id
+            models.Index(fields=['quiz', 'id'], name='question_quiz_id_idx'),
+        ]
     
 class Answer(models.Model):
     question = models.ForeignKey(Question, related_name="answers", on_delete=models.CASCADE) # foreign key to map with question object
     user = models.ForeignKey(User, related_name='answer_user', on_delete=models.CASCADE) # foreign key to map with user object
     selected_option = models.PositiveIntegerField()
     is_correct = models.BooleanField()
+    quiz_version = models.PositiveIntegerField(null=True, blank=True) # quiz version the answer was graded against
+
+    class Meta:
+        constraints = [
+            # one answer per user and question
+            models.UniqueConstraint(fields=['question', 'user'], name='unique_answer_per_user_question'),
+        ]
     
 class Result(models.Model):
     quiz = models.ForeignKey(Quiz, related_name='results_quiz', on_delete=models.CASCADE) # foreign key to map with quiz object
     user = models.ForeignKey(User, related_name='results_user', on_delete=models.CASCADE) # foreign key to map with user object
     score = models.PositiveIntegerField()
-    answers = models.ManyToManyField(Answer)
\ No newline at end of file
+    answers = models.ManyToManyField(Answer)
+    answered_count = models.PositiveIntegerField(default=0) # maintained on answer submission
+    completed_at = models.DateTimeField(null=True, blank=True) # set once every question is answered
+    quiz_version = models.PositiveIntegerField(null=True, blank=True) # quiz version of the first answer
+
+    class Meta:
+        constraints = [
+            # one result per user and quiz
+            models.UniqueConstraint(fields=['user', 'quiz'], name='unique_result_per_user_quiz'),
+        ]
+        indexes = [
+            # leaderboard reads: best results of a quiz, and the results scoring above a user
+            models.Index(fields=['quiz', '-score', 'user'], name='result_quiz_score_idx'),
+        ]
+
+# number of stored answers per question and selected option,
+# maintained on answer submission (see stats.py) instead of aggregating the answers
+class QuestionOptionStats(models.Model):
+    quiz = models.ForeignKey(Quiz, related_name='option_stats', on_delete=models.CASCADE) # denormalized, stats are read per quiz
+    question = models.ForeignKey(Question, related_name='option_stats', on_delete=models.CASCADE)
+    selected_option = models.PositiveIntegerField()
+    answer_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'selected_option'], name='unique_option_stats_per_question_option'),
+        ]
+        indexes = [
+            models.Index(fields=['quiz'], name='option_stats_quiz_idx'),
+        ]
+
+# number of completed results per score of a quiz, maintained like QuestionOptionStats
+class QuizScoreStats(models.Model):
+    quiz = models.ForeignKey(Quiz, related_name='score_stats', on_delete=models.CASCADE)
+    score = models.PositiveIntegerField()
+    result_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'score'], name='unique_score_stats_per_quiz_score'),
+        ]
+
+# answers accepted in write-behind mode (QUIZ_ANSWER_INGESTION), already graded
+# and waiting to be moved into Answer/Result in batches by the drain_answers command
+class PendingAnswer(models.Model):
+    quiz = models.ForeignKey(Quiz, related_name='pending_answers', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, related_name='pending_answers', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='pending_answers', on_delete=models.CASCADE)
+    selected_option = models.PositiveIntegerField()
+    is_correct = models.BooleanField()
+    quiz_version = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # one pending answer per user and question, like Answer
+            models.UniqueConstraint(fields=['question', 'user'], name='unique_pending_answer_per_user_question'),
+        ]
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# default configuration of the profiling middleware,
+# can be overridden with QUIZ_PROFILING in settings
+DEFAULT_QUIZ_PROFILING = {
+    'ENABLED': False,
+    'DUMP_DIR': None, # directory the per-process histograms are written to, None keeps them in memory
+    'FLUSH_EVERY': 100, # requests between two dumps
+}
+
+METRICS = ('total', 'db', 'app', 'render', 'queries')
+
+def get_config():
+    return {**DEFAULT_QUIZ_PROFILING, **getattr(settings, 'QUIZ_PROFILING', {})}
+
+# histogram with logarithmic buckets (25% apart, from 0.1 up to about 100 000),
+# histograms of different processes can be merged by adding their counts
+class Histogram:
+    BOUNDS = tuple(0.1 * 1.25 ** index for index in range(63))
+
+    def __init__(self, counts=None, count=0, total=0.0, maximum=0.0):
+        self.counts = counts or [0] * (len(self.BOUNDS) + 1)
+        self.count = count
+        self.total = total
+        self.maximum = maximum
+
+    def add(self, value):
+        index = 0
+        while index < len(self.BOUNDS) and value > self.BOUNDS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    # upper bound of the bucket holding the percentile, capped by the largest value seen
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                bound = self.BOUNDS[index] if index < len(self.BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {'counts': self.counts, 'count': self.count, 'total': self.total, 'maximum': self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(counts=list(data['counts']), count=data['count'], total=data['total'], maximum=data['maximum'])
+
+# per url name histograms of every metric, shared by the threads of a process
+class ProfileStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+        self.requests = 0
+
+    def record(self, view_name, metrics):
+        with self._lock:
+            histograms = self.views.setdefault(view_name, {metric: Histogram() for metric in METRICS})
+            for metric, value in metrics.items():
+                histograms[metric].add(value)
+            self.requests += 1
+            return self.requests
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {metric: histogram.as_dict() for metric, histogram in histograms.items()}
+                for view_name, histograms in self.views.items()
+            }
+
+    # writes the histograms of this process next to the ones of the other workers
+    def dump(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'profile-{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def clear(self):
+        with self._lock:
+            self.views.clear()
+            self.requests = 0
+
+profile_store = ProfileStore()
+
+# merges the histograms dumped by all processes into {view name: {metric: Histogram}}
+def load_profiles(directory):
+    merged = {}
+    for path in sorted(Path(directory).glob('profile-*.json')):
+        for view_name, metrics in json.loads(path.read_text()).items():
+            histograms = merged.setdefault(view_name, {})
+            for metric, data in metrics.items():
+                histogram = Histogram.from_dict(data)
+                if metric in histograms:
+                    histograms[metric].merge(histogram)
+                else:
+                    histograms[metric] = histogram
+    return merged
+
+# opt-in middleware (QUIZ_PROFILING['ENABLED']) recording per request
+# the number of queries, time spent in the database, in the view outside the database
+# (serializers and python code), rendering the response, and in total
+# timings are returned in the Server-Timing header and aggregated per url name
+# should be the first entry of MIDDLEWARE so the total covers the whole stack
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.start(request)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, state)
+            response = self.get_response(request)
+        return self.finish(request, response, state, started)
+
+    # the queries of async views run in the thread of the request's thread sensitive
+    # sync_to_async calls, so the wrappers are installed on the connections of that thread
+    async def __acall__(self, request):
+        state = self.start(request)
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, state, started)
+
+    def start(self, request):
+        state = {'queries': 0, 'db': 0.0, 'view_started': None, 'view_finished': None}
+        request._profiling = state
+        return state
+
+    def wrap_connections(self, stack, state):
+        def record_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                state['queries'] += 1
+                state['db'] += time.perf_counter() - started
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record_query))
+
+    def finish(self, request, response, state, started):
+        metrics = self.metrics(state, started, time.perf_counter())
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics["db"]:.3f};desc="{state["queries"]} queries"',
+            f'app;dur={metrics["app"]:.3f}',
+            f'render;dur={metrics["render"]:.3f}',
+            f'total;dur={metrics["total"]:.3f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            requests = profile_store.record(match.view_name, metrics)
+            if self.config['DUMP_DIR'] and requests % self.config['FLUSH_EVERY'] == 0:
+                profile_store.dump(self.config['DUMP_DIR'])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._profiling['view_started'] = time.perf_counter()
+
+    # called once the view returned a DRF/template response, right before it is rendered
+    def process_template_response(self, request, response):
+        request._profiling['view_finished'] = time.perf_counter()
+        return response
+
+    def metrics(self, state, started, finished):
+        view_started = state['view_started'] or started
+        view_finished = state['view_finished'] or finished
+        db = state['db'] * 1000
+        return {
+            'total': (finished - started) * 1000,
+            'db': db,
+            'app': max((view_finished - view_started) * 1000 - db, 0.0),
+            'render': (finished - view_finished) * 1000,
+            'queries': state['queries'],
+        }
@@ -0,0 +1,157 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# default configuration of the replica routing,
+# can be overridden with QUIZ_REPLICA_ROUTING in settings
+DEFAULT_QUIZ_REPLICA_ROUTING = {
+    'ROUTE_RESULTS': False, # also read results and answers from the replicas
+    'PIN_SECONDS': 5, # reads of a user stay on the primary this long after they wrote
+    'CACHE_ALIAS': None, # cache holding the pins, has to be shared between workers (redis, memcached)
+}
+
+def get_routing_config():
+    return {**DEFAULT_QUIZ_REPLICA_ROUTING, **getattr(settings, 'QUIZ_REPLICA_ROUTING', {})}
+
+# cache holding the pins, None without a cache shared between workers:
+# a pin kept in a process local cache would not be seen by the worker serving the next read
+def get_pin_cache():
+    alias = get_routing_config()['CACHE_ALIAS']
+    if alias is None:
+        return None
+    cache = caches[alias]
+    return None if isinstance(cache, (LocMemCache, DummyCache)) else cache
+
+# replicas as {alias: weight}, QUIZ_READ_REPLICAS may also list aliases of equal weight,
+# none are used without a shared pin cache, as users could not read their own writes
+def get_replica_weights():
+    replicas = getattr(settings, 'QUIZ_READ_REPLICAS', {})
+    if not replicas or get_pin_cache() is None:
+        return {}
+    if isinstance(replicas, dict):
+        return replicas
+    return {alias: 1 for alias in replicas}
+
+def pin_key(user_id):
+    return f'quiz-replica-pin:{user_id}'
+
+def pin_to_primary(user_id):
+    get_pin_cache().set(pin_key(user_id), True, get_routing_config()['PIN_SECONDS'])
+
+async def apin_to_primary(user_id):
+    await get_pin_cache().aset(pin_key(user_id), True, get_routing_config()['PIN_SECONDS'])
+
+def is_pinned_to_primary(user_id):
+    return get_pin_cache().get(pin_key(user_id), False)
+
+# routing state of the request being served, set by ReplicaPinningMiddleware
+current_request_state = ContextVar('quiz_replica_routing_state', default=None)
+
+# sends reads of quiz content (quizzes, questions and published versions, optionally results and answers)
+# to a read replica picked by weight, every other read and all writes go to the primary
+# reads stay on the primary inside transactions, for the rest of a request that wrote,
+# and for PIN_SECONDS after a user's write so they read their own writes
+class ReadReplicaRouter:
+    read_models = {'quiz.quiz', 'quiz.question', 'quiz.quizversion'}
+    result_models = {'quiz.result', 'quiz.answer', 'quiz.result_answers'}
+
+    def db_for_read(self, model, **hints):
+        weights = get_replica_weights()
+        if not weights or not self.is_routed(model) or self.use_primary():
+            return None
+        aliases = list(weights)
+        return random.choices(aliases, weights=[weights[alias] for alias in aliases])[0]
+
+    def db_for_write(self, model, **hints):
+        state = current_request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def is_routed(self, model):
+        label = model._meta.label_lower
+        return label in self.read_models or (get_routing_config()['ROUTE_RESULTS'] and label in self.result_models)
+
+    def use_primary(self):
+        if connections['default'].in_atomic_block:
+            return True
+        state = current_request_state.get()
+        if state is None:
+            return False
+        if state['wrote']:
+            return True
+        if state['pinned'] is None:
+            # the user is known once DRF authenticated the request, the pin is looked up once
+            user = getattr(state['request'], 'user', None)
+            if user is None or not user.is_authenticated:
+                return False
+            state['pinned'] = is_pinned_to_primary(user.pk)
+        return state['pinned']
+
+    # replicas hold the same rows as the primary
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *get_replica_weights()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    # migrations are applied to the primary and replicated from there
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+# tracks the request for ReadReplicaRouter and pins its user to the primary after a write
+# runs natively in both sync and async stacks, so ASGI requests are not serialized
+# through a thread-sensitive adapter, and is left out when no replicas are routed to
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replica_weights():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = {'request': request, 'wrote': False, 'pinned': None}
+        token = current_request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request_state.reset(token)
+
+        user = self.user_to_pin(request, state)
+        if user is not None:
+            pin_to_primary(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        state = {'request': request, 'wrote': False, 'pinned': None}
+        token = current_request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request_state.reset(token)
+
+        # the user may still be a lazy session lookup, only resolved after a write
+        user = await sync_to_async(self.user_to_pin)(request, state) if state['wrote'] else None
+        if user is not None:
+            await apin_to_primary(user.pk)
+        return response
+
+    def user_to_pin(self, request, state):
+        user = getattr(request, 'user', None)
+        if state['wrote'] and user is not None and user.is_authenticated:
+            return user
+        return None
@@ -0,0 +1,122 @@
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Answer, Question, Quiz, Result
+from .versions import publish_quiz_versions
+
+# seeds a synthetic dataset for benchmarks:
+# users, quizzes with questions, and for a share of (user, quiz) pairs
+# a complete attempt (answers, result and result-answer links)
+# all rows are inserted with bulk_create in batches
+def seed_dataset(users=100, quizzes=50, questions_per_quiz=10, attempt_ratio=0.5,
+                 batch_size=1000, seed=0, username_prefix='bench-user', password=None):
+    rng = random.Random(seed)
+
+    with transaction.atomic():
+        # password is hashed once and shared, hashing per user would dominate seeding time,
+        # without one the users get an unusable password
+        password_hash = make_password(password)
+        User.objects.bulk_create(
+            [User(username=f'{username_prefix}-{index}', password=password_hash) for index in range(users)],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=f'{username_prefix}-').values_list('id', flat=True)[:users]
+        )
+
+        quiz_objects = Quiz.objects.bulk_create(
+            [Quiz(title=f'Benchmark Quiz {index}', question_count=questions_per_quiz) for index in range(quizzes)],
+            batch_size=batch_size
+        )
+
+        questions = Question.objects.bulk_create(
+            [
+                Question(
+                    quiz=quiz,
+                    text=f'Question {index} of {quiz.title}?',
+                    options=[f'Option {option}' for option in range(1, 5)],
+                    correct_option=rng.randint(1, 4)
+                )
+                for quiz in quiz_objects
+                for index in range(questions_per_quiz)
+            ],
+            batch_size=batch_size
+        )
+        publish_quiz_versions(quiz_objects, questions)
+        questions_by_quiz = {}
+        for question in questions:
+            questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+
+        answer_count = 0
+        result_count = 0
+        completed_at = timezone.now()
+        for user_id in user_ids:
+            attempted = [quiz for quiz in quiz_objects if rng.random() < attempt_ratio]
+            answers = []
+            results = []
+            for quiz in attempted:
+                quiz_answers = []
+                for question in questions_by_quiz.get(quiz.id, []):
+                    selected_option = rng.randint(1, 4)
+                    quiz_answers.append(Answer(
+                        question=question,
+                        user_id=user_id,
+                        selected_option=selected_option,
+                        is_correct=selected_option == question.correct_option
+                    ))
+                answers.append(quiz_answers)
+                results.append(Result(
+                    quiz=quiz,
+                    user_id=user_id,
+                    score=sum(1 for answer in quiz_answers if answer.is_correct),
+                    answered_count=len(quiz_answers),
+                    completed_at=completed_at
+                ))
+
+            Answer.objects.bulk_create([answer for quiz_answers in answers for answer in quiz_answers], batch_size=batch_size)
+            Result.objects.bulk_create(results, batch_size=batch_size)
+            Through = Result.answers.through
+            Through.objects.bulk_create(
+                [
+                    Through(result_id=result.id, answer_id=answer.id)
+                    for result, quiz_answers in zip(results, answers)
+                    for answer in quiz_answers
+                ],
+                batch_size=batch_size
+            )
+            answer_count += sum(len(quiz_answers) for quiz_answers in answers)
+            result_count += len(results)
+
+    return {
+        'users': len(user_ids),
+        'user_ids': user_ids,
+        'quizzes': len(quiz_objects),
+        'quiz_ids': [quiz.id for quiz in quiz_objects],
+        'questions': len(questions),
+        'answers': answer_count,
+        'results': result_count,
+    }
+
+# removes the rows created by seed_dataset,
+# questions, answers, results and versions go with their quizzes and users
+def delete_dataset(summary):
+    with transaction.atomic():
+        Quiz.objects.filter(id__in=summary['quiz_ids']).delete()
+        User.objects.filter(id__in=summary['user_ids']).delete()
+
+# seeds a dataset for the duration of a benchmark and deletes it afterwards,
+# unless keep is set (e.g. to run a benchmark again with --skip-seed)
+@contextmanager
+def seeded_dataset(keep=False, **options):
+    summary = seed_dataset(**options)
+    try:
+        yield summary
+    finally:
+        if not keep:
+            delete_dataset(summary)
@@ -28,6 +28,19 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'text', 'options', 'correct_option']
 
+# lightweight variant of QuestionSerializer's read representation,
+# builds the same fields from (id, text, options) rows, correct_option is never needed
+# (used for quiz payloads, see versions.py)
+def serialize_question_payloads(rows):
+    return [
+        {
+            'id': question_id,
+            'text': str(text),
+            'options': [None if option is None else str(option) for option in options]
+        }
+        for question_id, text, options in rows
+    ]
+
 # validates and serializes fields 
 # for create quiz API and Get quiz API
 class QuizSerializer(serializers.ModelSerializer):
@@ -60,18 +73,39 @@ class AnswerSummarySerializer(serializers.ModelSerializer):
         model = Answer
         fields = ['question_id', 'selected_option', 'correct_option', 'is_correct']
 
+# lightweight variant of AnswerSummarySerializer for result lists,
+# builds the same fields from (question_id, selected_option, correct_option, is_correct) rows
+# without model instances or per-field serializer calls
+def serialize_answer_summaries(rows):
+    return [
+        {
+            'question_id': question_id,
+            'selected_option': selected_option,
+            'correct_option': correct_option,
+            'is_correct': is_correct
+        }
+        for question_id, selected_option, correct_option, is_correct in rows
+    ]
+
 # validates submit answer request
 class SubmitAnswerSerializer(serializers.Serializer):
     question_id = serializers.IntegerField()
     selected_option = serializers.IntegerField(min_value=1, max_value=4)
 
+# validates bulk submit request, list variant of SubmitAnswerSerializer
+class BulkSubmitAnswerSerializer(serializers.Serializer):
+    answers = SubmitAnswerSerializer(many=True, allow_empty=False, max_length=500)
+
 # validates the answer feedback received by user after answer submission
 class AnswerFeedbackSerializer(serializers.Serializer):
     is_correct = serializers.BooleanField()
     correct_option = serializers.IntegerField(min_value=1, max_value=4)
     message = serializers.CharField()
     
+# answered_count is annotated by the list view (0 for quizzes not started yet)
 class QuizListSerializer(serializers.ModelSerializer):
+    answered_count = serializers.IntegerField(read_only=True, default=0)
+
     class Meta:
         model = Quiz
-        fields = ['id', 'title']
\ No newline at end of file
+        fields = ['id', 'title', 'question_count', 'answered_count']
\ No newline at end of file
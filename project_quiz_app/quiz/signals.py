@@ -0,0 +1,93 @@
+from django.db.models import Case, F, When
+from django.db.models.expressions import Combinable
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .answer_keys import answer_key_store
+from .cache import quiz_payload_cache
+from .leaderboards import leaderboard_store
+from .models import Answer, Question, Quiz, Result
+from .snapshots import quiz_snapshot
+from .stats import forget_answer_stats, forget_result_stats
+from .versions import freeze_quiz_version_on_commit
+
+# drop cached quiz payloads whenever a quiz or one of its questions changes
+# (admin edits, serializer based creation, deletes)
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz_payload(sender, instance, **kwargs):
+    quiz_payload_cache.invalidate_on_commit(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_quiz_payload(sender, instance, **kwargs):
+    quiz_payload_cache.invalidate_on_commit(instance.quiz_id)
+
+# the shared snapshot keeps the quiz as compiled, this process stops reading it from there
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz_snapshot(sender, instance, **kwargs):
+    quiz_snapshot.invalidate_on_commit(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_quiz_snapshot(sender, instance, **kwargs):
+    quiz_snapshot.invalidate_on_commit(instance.quiz_id)
+
+# same for the answer keys used by grading, a quiz save may change its question count
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz_answer_keys(sender, instance, **kwargs):
+    answer_key_store.invalidate_on_commit(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    answer_key_store.invalidate_question(instance.pk, instance.quiz_id)
+
+# deleted results leave the leaderboard of their quiz
+@receiver(post_delete, sender=Result)
+def remove_result_from_leaderboard(sender, instance, **kwargs):
+    leaderboard_store.remove_on_commit(instance.quiz_id, instance.user_id)
+
+# deleted answers and completed results leave the quiz statistics
+@receiver(post_delete, sender=Answer)
+def remove_answer_from_stats(sender, instance, **kwargs):
+    forget_answer_stats(instance)
+
+@receiver(post_delete, sender=Result)
+def remove_result_from_stats(sender, instance, **kwargs):
+    forget_result_stats(instance)
+
+# bumps Quiz.version on every edit of a quiz, the version is incremented in the update itself
+# so saves of instances loaded before another edit can not reuse a version
+@receiver(pre_save, sender=Quiz)
+def increment_quiz_version(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance.version = F('version') + 1
+
+@receiver(post_save, sender=Quiz)
+def reload_quiz_version(sender, instance, **kwargs):
+    if isinstance(instance.version, Combinable):
+        instance.refresh_from_db(fields=['version'])
+
+# every version an edit creates is published, answers may be graded against it
+@receiver(post_save, sender=Quiz)
+def publish_edited_quiz_version(sender, instance, created, **kwargs):
+    if not created:
+        freeze_quiz_version_on_commit(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def publish_question_quiz_version(sender, instance, **kwargs):
+    freeze_quiz_version_on_commit(instance.quiz_id)
+
+# keeps Quiz.question_count in step with questions created or deleted one by one,
+# bulk inserts (QuizCreateView) set the count themselves
+# any change of a question is a new version of its quiz
+@receiver(post_save, sender=Question)
+def update_quiz_on_question_save(sender, instance, created, **kwargs):
+    changes = {'version': F('version') + 1}
+    if created:
+        changes['question_count'] = F('question_count') + 1
+    Quiz.objects.filter(pk=instance.quiz_id).update(**changes)
+
+@receiver(post_delete, sender=Question)
+def update_quiz_on_question_delete(sender, instance, **kwargs):
+    Quiz.objects.filter(pk=instance.quiz_id).update(
+        version=F('version') + 1,
+        question_count=Case(When(question_count__gt=0, then=F('question_count') - 1), default=0)
+    )
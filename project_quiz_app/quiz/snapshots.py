@@ -0,0 +1,291 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .lru import LRUCache
+from .models import Question, Quiz, QuizVersion
+from .versions import freeze_quiz_version
+
+logger = logging.getLogger(__name__)
+
+# default configuration of the shared quiz snapshot,
+# can be overridden with QUIZ_SNAPSHOT in settings
+DEFAULT_QUIZ_SNAPSHOT = {
+    'PATH': None, # snapshot file written by the compile_quiz_snapshot command, None disables the snapshot
+    'CHECK_INTERVAL': 1.0, # seconds between two checks of the file for a rebuilt snapshot
+    'MAX_DECODED': 1024, # decoded payloads and answer keys kept per process, the rest is decoded again on read
+}
+
+def get_snapshot_config():
+    return {**DEFAULT_QUIZ_SNAPSHOT, **getattr(settings, 'QUIZ_SNAPSHOT', {})}
+
+# binary layout, all integers little endian:
+# header: magic, format version, creation time, quiz and question counts, offsets of both indexes
+# quiz index: (quiz id, payload offset, payload length, answer keys offset, answer keys length) sorted by quiz id
+# question index: (question id, quiz id) sorted by question id
+# data: compact json of each quiz payload and of its answer keys
+MAGIC = b'QUIZSNAP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIdIIQQ')
+QUIZ_ENTRY = struct.Struct('<QQIQI')
+QUESTION_ENTRY = struct.Struct('<QQ')
+
+def encode(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+# writes the published payload and answer keys of every quiz to path, chunk by chunk,
+# into a temporary file of the same directory renamed over path once complete,
+# so readers only ever map a whole snapshot
+# quizzes edited since their last publication are published first
+# returns the numbers of quizzes and questions written
+def compile_snapshot(path, chunk_size=500):
+    path = Path(path)
+    created_at = time.time()
+    quiz_entries = []
+    question_entries = []
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(b'\0' * HEADER.size)
+            offset = HEADER.size
+            last_id = 0
+            while True:
+                quizzes = list(
+                    Quiz.objects.filter(id__gt=last_id).order_by('id')
+                    .values_list('id', 'version', 'question_count')[:chunk_size]
+                )
+                if not quizzes:
+                    break
+                last_id = quizzes[-1][0]
+                for quiz_id, payload, answer_keys in _compile_chunk(quizzes):
+                    question_entries.extend((question_id, quiz_id) for question_id, _, _ in answer_keys['answer_keys'])
+                    payload, answer_keys = encode(payload), encode(answer_keys)
+                    output.write(payload)
+                    output.write(answer_keys)
+                    quiz_entries.append((quiz_id, offset, len(payload), offset + len(payload), len(answer_keys)))
+                    offset += len(payload) + len(answer_keys)
+
+            question_entries.sort()
+            quiz_index_offset = offset
+            output.write(b''.join(QUIZ_ENTRY.pack(*entry) for entry in quiz_entries))
+            question_index_offset = quiz_index_offset + QUIZ_ENTRY.size * len(quiz_entries)
+            output.write(b''.join(QUESTION_ENTRY.pack(*entry) for entry in question_entries))
+            output.seek(0)
+            output.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, created_at, len(quiz_entries), len(question_entries),
+                quiz_index_offset, question_index_offset
+            ))
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return len(quiz_entries), len(question_entries)
+
+# (quiz id, payload, answer keys) of a chunk of (id, version, question count) rows,
+# payloads are the published ones, answer keys are read with them
+def _compile_chunk(quizzes):
+    quiz_ids = [quiz_id for quiz_id, _, _ in quizzes]
+    payloads = {
+        (quiz_id, number): payload
+        for quiz_id, number, payload in QuizVersion.objects.filter(quiz_id__in=quiz_ids).values_list('quiz_id', 'number', 'payload')
+    }
+    answer_keys = {quiz_id: [] for quiz_id in quiz_ids}
+    questions = (
+        Question.objects.filter(quiz_id__in=quiz_ids).order_by('quiz_id', 'id')
+        .values_list('quiz_id', 'id', 'correct_option', 'options')
+    )
+    for quiz_id, question_id, correct_option, options in questions:
+        answer_keys[quiz_id].append((question_id, correct_option, str(options[correct_option - 1])))
+
+    for quiz_id, version, question_count in quizzes:
+        payload = payloads.get((quiz_id, version)) or freeze_quiz_version(quiz_id)
+        if payload is None or payload['version'] != version:
+            continue # deleted or edited since the chunk was read, left to the database
+        yield quiz_id, payload, {
+            'version': version,
+            'question_count': question_count,
+            'answer_keys': answer_keys[quiz_id],
+        }
+
+# a mapped snapshot file, entries are found by binary search over the indexes,
+# and decoded from the shared pages on read, the most recently read ones are kept
+# decoded with the mapping in an LRU bounded by max_decoded
+class QuizSnapshot:
+    def __init__(self, path, max_decoded=1024):
+        with open(path, 'rb') as snapshot_file:
+            self.buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            raise ValueError(f"{path} is truncated.")
+        magic, format_version, self.created_at, self.quiz_count, self.question_count, \
+            self.quiz_index_offset, self.question_index_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a quiz snapshot.")
+        if self.question_index_offset + QUESTION_ENTRY.size * self.question_count != len(self.buffer) \
+                or self.quiz_index_offset + QUIZ_ENTRY.size * self.quiz_count != self.question_index_offset:
+            raise ValueError(f"{path} is truncated.")
+        self.decoded = LRUCache(max_decoded)
+
+    # value of key, built again once evicted from the LRU
+    def memoized(self, key, build):
+        value = self.decoded.get(key)
+        if value is None:
+            value = build()
+            self.decoded.set(key, value)
+        return value
+
+    # returns the index entry with the given id, or None
+    def find(self, entry, index_offset, count, entry_id):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            found = entry.unpack_from(self.buffer, index_offset + middle * entry.size)
+            if found[0] < entry_id:
+                low = middle + 1
+            elif found[0] > entry_id:
+                high = middle
+            else:
+                return found
+        return None
+
+    def find_quiz(self, quiz_id):
+        return self.find(QUIZ_ENTRY, self.quiz_index_offset, self.quiz_count, quiz_id)
+
+    def get_payload(self, quiz_id):
+        entry = self.find_quiz(quiz_id)
+        if entry is None:
+            return None
+        _, offset, length, _, _ = entry
+        return self.memoized(('payload', quiz_id), lambda: json.loads(self.buffer[offset:offset + length]))
+
+    # answer keys as {'version', 'question_count', 'answer_keys': [[question id, correct option, correct text], ...]},
+    # or as converted by build(quiz_id, answer keys), only the converted ones are then kept
+    def get_answer_keys(self, quiz_id, build=None):
+        entry = self.find_quiz(quiz_id)
+        if entry is None:
+            return None
+        _, _, _, offset, length = entry
+        if build is None:
+            return self.memoized(('answer_keys', quiz_id), lambda: json.loads(self.buffer[offset:offset + length]))
+        return self.memoized(('answer_keys', quiz_id, build), lambda: build(quiz_id, json.loads(self.buffer[offset:offset + length])))
+
+    def quiz_for_question(self, question_id):
+        entry = self.find(QUESTION_ENTRY, self.question_index_offset, self.question_count, question_id)
+        return None if entry is None else entry[1]
+
+# per process access to the snapshot file of QUIZ_SNAPSHOT['PATH']
+# the file is mapped read only, so every worker shares the same pages through the page cache,
+# a rebuilt file (a new inode, see compile_snapshot) is mapped on the next check,
+# mappings still used by other threads are released once unreferenced
+# quizzes changed after the snapshot was compiled are skipped until a newer one is mapped
+class SnapshotReader:
+    def __init__(self):
+        self.snapshot = None
+        self.identity = None
+        self.checked_at = None
+        self.changed = {} # quiz id -> time of its last change in this process
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def current(self):
+        config = get_snapshot_config()
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= config['CHECK_INTERVAL']:
+            with self._lock:
+                self.checked_at = now
+                self.refresh(config['PATH'], config['MAX_DECODED'])
+        return self.snapshot
+
+    def refresh(self, path, max_decoded=1024):
+        try:
+            stat = os.stat(path) if path else None
+        except FileNotFoundError:
+            stat = None
+        identity = None if stat is None else (path, stat.st_ino, stat.st_mtime_ns)
+        if identity == self.identity:
+            return
+        if identity is None:
+            self.identity = self.snapshot = None
+            return
+        try:
+            snapshot = QuizSnapshot(path, max_decoded)
+        except (OSError, ValueError, struct.error):
+            # the previous snapshot (if any) keeps being served, the file is tried again on the next check
+            logger.exception("Could not map the quiz snapshot %s", path)
+            return
+        self.identity, self.snapshot = identity, snapshot
+        self.changed = {
+            quiz_id: changed_at for quiz_id, changed_at in self.changed.items()
+            if changed_at >= snapshot.created_at
+        }
+
+    def lookup(self, quiz_id):
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        if self.changed.get(quiz_id, 0) >= snapshot.created_at:
+            return None
+        return snapshot
+
+    # published payload of the current version of a quiz, None when not in the snapshot
+    def get_payload(self, quiz_id):
+        snapshot = self.lookup(quiz_id)
+        payload = None if snapshot is None else snapshot.get_payload(quiz_id)
+        self.count(payload)
+        return payload
+
+    def get_answer_keys(self, quiz_id, build=None):
+        snapshot = self.lookup(quiz_id)
+        answer_keys = None if snapshot is None else snapshot.get_answer_keys(quiz_id, build)
+        self.count(answer_keys)
+        return answer_keys
+
+    def quiz_for_question(self, question_id):
+        snapshot = self.current()
+        return None if snapshot is None else snapshot.quiz_for_question(question_id)
+
+    def count(self, entry):
+        if self.identity is None:
+            return
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    # the snapshot keeps serving the quiz as compiled, so a change made by this process
+    # is read from the database (and the in-process caches) until a newer snapshot is mapped,
+    # other workers only see the change once the snapshot is rebuilt
+    def invalidate(self, quiz_id):
+        self.changed[quiz_id] = time.time()
+
+    # marks the change right away and again after commit, so a snapshot compiled
+    # before the change was committed is not taken for a newer one
+    def invalidate_on_commit(self, quiz_id):
+        self.invalidate(quiz_id)
+        transaction.on_commit(lambda: self.invalidate(quiz_id))
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'path': None if self.identity is None else str(self.identity[0]),
+            'quizzes': 0 if snapshot is None else snapshot.quiz_count,
+            'questions': 0 if snapshot is None else snapshot.question_count,
+            'created_at': None if snapshot is None else snapshot.created_at,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+quiz_snapshot = SnapshotReader()
@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, UniqueConstraint
+
+from .models import Answer, Question, QuestionOptionStats, Quiz, QuizScoreStats, Result
+
+# default configuration of the quiz statistics,
+# can be overridden with QUIZ_STATS in settings
+DEFAULT_QUIZ_STATS = {
+    'ENABLED': True, # counters are maintained on submission, rebuild_quiz_stats fills them otherwise
+    'AFTER_COMMIT': None, # counters are incremented once the submission commits, None does so except on sqlite
+}
+
+def get_stats_config():
+    return {**DEFAULT_QUIZ_STATS, **getattr(settings, 'QUIZ_STATS', {})}
+
+def is_stats_enabled():
+    return get_stats_config()['ENABLED']
+
+# sqlite has a single writer and submissions already hold its lock (IMMEDIATE transactions),
+# incrementing after the commit would only take the lock again for each upsert
+def increments_after_commit():
+    after_commit = get_stats_config()['AFTER_COMMIT']
+    return connection.vendor != 'sqlite' if after_commit is None else after_commit
+
+# adds rows to counter tables in a single INSERT ... ON CONFLICT DO UPDATE (sqlite and postgresql)
+# on the model's unique constraint, rows maps the values of the key fields to the increments of the counter fields
+def increment_counters(model, key_fields, counter_fields, rows):
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [model._meta.get_field(name).column for name in key_fields + counter_fields]
+    unique_fields = next(constraint.fields for constraint in model._meta.constraints if isinstance(constraint, UniqueConstraint))
+    keys = ', '.join(quote(model._meta.get_field(name).column) for name in unique_fields)
+    updates = ', '.join(
+        f'{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}'
+        for column in columns[len(key_fields):]
+    )
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    params = [value for key, counters in rows.items() for value in (*key, *counters)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}) VALUES {placeholders} '
+            f'ON CONFLICT ({keys}) DO UPDATE SET {updates}',
+            params
+        )
+
+# counts stored answers per question and selected option, and the score of a result
+# completed by them, one query each
+# on databases with row locks (postgresql) the upserts run once the transaction storing the answers commits:
+# the counter rows are shared by every submitter of a quiz, so their row locks are only
+# held for the upsert itself instead of the whole grading transaction,
+# a failing upsert is logged instead of failing the committed submission
+# (counters lost to a crash or an error after the commit are restored by rebuild_quiz_stats)
+def record_answer_stats(quiz_id, answers, completed_score=None):
+    if not is_stats_enabled():
+        return
+    tallies = {}
+    for answer in answers:
+        answer_count, correct_count = tallies.get((quiz_id, answer.question_id, answer.selected_option), (0, 0))
+        tallies[(quiz_id, answer.question_id, answer.selected_option)] = (answer_count + 1, correct_count + answer.is_correct)
+    if increments_after_commit():
+        transaction.on_commit(lambda: increment_answer_stats(quiz_id, tallies, completed_score), robust=True)
+    else:
+        increment_answer_stats(quiz_id, tallies, completed_score)
+
+# after a commit each upsert commits on its own, the two counter tables are independent
+def increment_answer_stats(quiz_id, tallies, completed_score):
+    increment_counters(QuestionOptionStats, ['quiz', 'question', 'selected_option'], ['answer_count', 'correct_count'], tallies)
+    if completed_score is not None:
+        increment_counters(QuizScoreStats, ['quiz', 'score'], ['result_count'], {(quiz_id, completed_score): (1,)})
+
+# removes a deleted answer from the counters
+def forget_answer_stats(answer):
+    if not is_stats_enabled():
+        return
+    QuestionOptionStats.objects.filter(
+        question_id=answer.question_id, selected_option=answer.selected_option, answer_count__gt=0
+    ).update(
+        answer_count=F('answer_count') - 1,
+        correct_count=F('correct_count') - int(answer.is_correct)
+    )
+
+# removes a deleted completed result from the score histogram
+def forget_result_stats(result):
+    if not is_stats_enabled() or result.completed_at is None:
+        return
+    QuizScoreStats.objects.filter(quiz_id=result.quiz_id, score=result.score, result_count__gt=0).update(
+        result_count=F('result_count') - 1
+    )
+
+# recomputes the counters of the given quizzes (all by default) from answers and results,
+# one transaction per quiz
+def rebuild_quiz_stats(quiz_ids=None):
+    if quiz_ids is None:
+        quiz_ids = Quiz.objects.order_by('id').values_list('id', flat=True)
+    rebuilt = 0
+    for quiz_id in quiz_ids:
+        with transaction.atomic():
+            QuestionOptionStats.objects.filter(quiz_id=quiz_id).delete()
+            QuizScoreStats.objects.filter(quiz_id=quiz_id).delete()
+            QuestionOptionStats.objects.bulk_create([
+                QuestionOptionStats(quiz_id=quiz_id, **row)
+                for row in Answer.objects.filter(question__quiz_id=quiz_id)
+                .values('question_id', 'selected_option')
+                .annotate(answer_count=Count('id'), correct_count=Count('id', filter=Q(is_correct=True)))
+                .order_by()
+            ])
+            QuizScoreStats.objects.bulk_create([
+                QuizScoreStats(quiz_id=quiz_id, **row)
+                for row in Result.objects.filter(quiz_id=quiz_id, completed_at__isnull=False)
+                .values('score')
+                .annotate(result_count=Count('id'))
+                .order_by()
+            ])
+        rebuilt += 1
+    return rebuilt
+
+# statistics of a quiz from the counters, None when it does not exist
+# per question: answers, correct answers and rate, answers per option,
+# per quiz: histogram and average of the scores of completed results
+def quiz_stats(quiz_id):
+    quiz = Quiz.objects.filter(id=quiz_id).values('id', 'title', 'question_count').first()
+    if quiz is None:
+        return None
+
+    tallies = {}
+    for question_id, selected_option, answer_count, correct_count in (
+        QuestionOptionStats.objects.filter(quiz_id=quiz_id).values_list('question_id', 'selected_option', 'answer_count', 'correct_count')
+    ):
+        tallies.setdefault(question_id, {})[selected_option] = (answer_count, correct_count)
+
+    questions = []
+    for question_id, text, options, correct_option in (
+        Question.objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', 'text', 'options', 'correct_option')
+    ):
+        question_tallies = tallies.get(question_id, {})
+        attempts = sum(answer_count for answer_count, _ in question_tallies.values())
+        correct = sum(correct_count for _, correct_count in question_tallies.values())
+        questions.append({
+            "question_id": question_id,
+            "text": text,
+            "correct_option": correct_option,
+            "attempts": attempts,
+            "correct": correct,
+            "correct_rate": round(correct / attempts, 4) if attempts else None,
+            "options": [
+                {"option": option, "text": option_text, "answers": question_tallies.get(option, (0, 0))[0]}
+                for option, option_text in enumerate(options, start=1)
+            ]
+        })
+
+    histogram = list(
+        QuizScoreStats.objects.filter(quiz_id=quiz_id, result_count__gt=0).order_by('score').values_list('score', 'result_count')
+    )
+    completed = sum(result_count for _, result_count in histogram)
+    return {
+        "quiz_id": quiz['id'],
+        "title": quiz['title'],
+        "question_count": quiz['question_count'],
+        "completed_results": completed,
+        "average_score": round(sum(score * result_count for score, result_count in histogram) / completed, 4) if completed else None,
+        "score_histogram": [{"score": score, "results": result_count} for score, result_count in histogram],
+        "questions": questions
+    }
@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .answer_keys import answer_key_store, quiz_from_answer_keys
+from .leaderboards import leaderboard_store
+from .stats import record_answer_stats
+from .models import Answer, PendingAnswer, Result
+
+# default configuration of answer ingestion,
+# can be overridden with QUIZ_ANSWER_INGESTION in settings
+DEFAULT_QUIZ_ANSWER_INGESTION = {
+    'MODE': 'sync', # 'sync' stores answers and results in the request, 'write-behind' queues them
+    'BATCH_SIZE': 500, # pending answers moved per transaction by drain_pending_answers
+}
+
+def get_ingestion_config():
+    return {**DEFAULT_QUIZ_ANSWER_INGESTION, **getattr(settings, 'QUIZ_ANSWER_INGESTION', {})}
+
+def is_write_behind():
+    return get_ingestion_config()['MODE'] == 'write-behind'
+
+# grades a selected option against the answer key of a question (see answer_keys.py),
+# returns the feedback in the shape of AnswerFeedbackSerializer
+def grade_answer(answer_key, selected_option):
+    correct_option = answer_key.correct_option
+    is_correct = selected_option == correct_option
+    message = "Correct answer!" if is_correct else f"Incorrect. The correct answer is {correct_option}: {answer_key.correct_text}."
+    return {
+        'is_correct': is_correct,
+        'correct_option': correct_option,
+        'message': message
+    }
+
+# adds stored answers to the user's result of a quiz,
+# creating the result on the first answer
+# must run inside a transaction, score and answered count are incremented with F()
+# so concurrent submissions can not overwrite each other, the result row is locked
+# (postgresql) so the completion seen here matches the one stamped by the update
+# the increment reaches the quiz's leaderboard once committed,
+# and the answers (and the score of a result they complete) the quiz statistics
+def add_answers_to_result(user, quiz, answers):
+    correct_count = sum(1 for answer in answers if answer.is_correct)
+    leaderboard_store.add_score_on_commit(quiz.id, user.id, correct_count)
+
+    results = Result.objects.filter(user=user, quiz=quiz)
+    result = results.select_for_update().values_list('id', 'score', 'answered_count', 'completed_at').first()
+    if result is None:
+        result_id, completed_score = create_result(results, user, quiz, correct_count, len(answers), answers[0].quiz_version)
+    else:
+        result_id, score, answered_count, completed_at = result
+        update_result(results, quiz, correct_count, len(answers))
+        completed = completed_at is None and answered_count + len(answers) >= quiz.question_count
+        completed_score = score + correct_count if completed else None
+
+    # link all answers in one insert, without the select done by answers.add()
+    Through = Result.answers.through
+    Through.objects.bulk_create([Through(result_id=result_id, answer_id=answer.id) for answer in answers])
+    record_answer_stats(quiz.id, answers, completed_score)
+    return result_id
+
+# returns the id of the new result, and its score when it is completed right away
+# the result is taken against the quiz version of its first answers
+def create_result(results, user, quiz, score, answered_count, quiz_version=None):
+    completed = answered_count >= quiz.question_count
+    try:
+        with transaction.atomic():
+            result_id = Result.objects.create(
+                user=user,
+                quiz=quiz,
+                score=score,
+                answered_count=answered_count,
+                completed_at=timezone.now() if completed else None,
+                quiz_version=quiz_version
+            ).id
+            return result_id, score if completed else None
+    except IntegrityError:
+        # created by a concurrent submission in the meantime
+        update_result(results, quiz, score, answered_count)
+        result_id, score, completed_answered_count = results.values_list('id', 'score', 'answered_count').get()
+        completed = completed_answered_count - answered_count < quiz.question_count <= completed_answered_count
+        return result_id, score if completed else None
+
+# increments score and answered count, and stamps completed_at
+# when the increment reaches the quiz's question count
+def update_result(results, quiz, score, answered_count):
+    results.update(
+        score=F('score') + score,
+        answered_count=F('answered_count') + answered_count,
+        completed_at=Case(
+            When(
+                completed_at__isnull=True,
+                answered_count__gte=quiz.question_count - answered_count,
+                then=Now()
+            ),
+            default=F('completed_at')
+        )
+    )
+
+# write-behind mode: stores graded (unsaved) answers of a quiz in the PendingAnswer journal,
+# a single insert instead of the answer, result and link writes
+# raises IntegrityError when one of the questions was already answered or is already pending
+def enqueue_answers(user, quiz_id, answers):
+    question_ids = [answer.question_id for answer in answers]
+    if Answer.objects.filter(user=user, question_id__in=question_ids).exists():
+        raise IntegrityError("Answer already exists for this question.")
+    PendingAnswer.objects.bulk_create([
+        PendingAnswer(
+            quiz_id=quiz_id,
+            question_id=answer.question_id,
+            user=user,
+            selected_option=answer.selected_option,
+            is_correct=answer.is_correct,
+            quiz_version=answer.quiz_version
+        )
+        for answer in answers
+    ])
+
+# moves pending answers into Answer/Result, oldest first, one transaction per batch:
+# answers are bulk inserted, results updated once per (user, quiz) of the batch,
+# and the batch is deleted from the journal in the same transaction,
+# so a crash leaves the batch pending and the next drain picks it up again
+# answers already stored (answered again while pending) are dropped
+# returns the numbers of stored and dropped answers
+def drain_pending_answers(batch_size=None, max_batches=None):
+    batch_size = batch_size or get_ingestion_config()['BATCH_SIZE']
+    stored = dropped = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            pending = list(PendingAnswer.objects.order_by('id')[:batch_size])
+            if not pending:
+                break
+            answers = _store_pending_answers(pending)
+            PendingAnswer.objects.filter(id__in=[entry.id for entry in pending]).delete()
+        stored += len(answers)
+        dropped += len(pending) - len(answers)
+        batches += 1
+    return {'stored': stored, 'dropped': dropped, 'batches': batches}
+
+def _store_pending_answers(pending):
+    existing = set(
+        Answer.objects.filter(
+            user_id__in={entry.user_id for entry in pending},
+            question_id__in={entry.question_id for entry in pending}
+        ).values_list('question_id', 'user_id')
+    )
+    answers = []
+    quiz_ids = []
+    for entry in pending:
+        key = (entry.question_id, entry.user_id)
+        if key in existing:
+            continue
+        existing.add(key)
+        answers.append(Answer(
+            question_id=entry.question_id,
+            user_id=entry.user_id,
+            selected_option=entry.selected_option,
+            is_correct=entry.is_correct,
+            quiz_version=entry.quiz_version
+        ))
+        quiz_ids.append(entry.quiz_id)
+    Answer.objects.bulk_create(answers)
+
+    groups = {}
+    for answer, quiz_id in zip(answers, quiz_ids):
+        groups.setdefault((answer.user_id, quiz_id), []).append(answer)
+    for (user_id, quiz_id), group in groups.items():
+        quiz_keys = answer_key_store.get_quiz(quiz_id)
+        add_answers_to_result(User(id=user_id), quiz_from_answer_keys(quiz_keys), group)
+    return answers
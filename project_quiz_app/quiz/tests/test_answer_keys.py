@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import AnswerKey, answer_key_store
+from quiz.models import Question, Quiz, Result
+
+class AnswerKeyStoreTest(TestCase):
+
+    def setUp(self):
+        answer_key_store.clear()
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["1", "2", "3", "4"], correct_option=index + 1)
+            for index in range(3)
+        ]
+
+    def tearDown(self):
+        answer_key_store.clear()
+
+    # test that all answer keys of a quiz are loaded in one query and kept after commit
+    def test_loaded_per_quiz(self):
+        with self.assertNumQueries(1):
+            with self.captureOnCommitCallbacks(execute=True):
+                quiz_keys = answer_key_store.get_for_question(self.questions[0].id)
+
+        self.assertEqual(quiz_keys.question_count, 3)
+        self.assertEqual(quiz_keys.answer_keys[self.questions[2].id], AnswerKey(self.quiz.id, 3, "3"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(answer_key_store.get_for_question(self.questions[1].id), quiz_keys)
+            self.assertEqual(answer_key_store.get_quiz(self.quiz.id), quiz_keys)
+
+    def test_missing(self):
+        self.assertIsNone(answer_key_store.get_for_question(0))
+        self.assertIsNone(answer_key_store.get_quiz(0))
+
+        # an empty quiz still has (no) answer keys
+        empty_quiz = Quiz.objects.create(title="Empty Quiz")
+        self.assertEqual(answer_key_store.get_quiz(empty_quiz.id).answer_keys, {})
+
+    # test that editing or adding a question drops the keys of its quiz
+    def test_question_changes_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            answer_key_store.get_quiz(self.quiz.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.questions[0].correct_option = 4
+            self.questions[0].save()
+
+        quiz_keys = answer_key_store.get_for_question(self.questions[0].id)
+        self.assertEqual(quiz_keys.answer_keys[self.questions[0].id].correct_option, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            answer_key_store.get_quiz(self.quiz.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(quiz=self.quiz, text="Question 4?", options=["1", "2", "3", "4"], correct_option=1)
+
+        self.assertEqual(answer_key_store.get_quiz(self.quiz.id).question_count, 4)
+
+    # test that keys loaded before a concurrent edit committed are not stored
+    def test_not_stored_after_invalidation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            answer_key_store.get_quiz(self.quiz.id)
+            answer_key_store.invalidate(self.quiz.id)
+
+        self.assertEqual(len(answer_key_store.local), 0)
+
+    # test that keys are reloaded after max_age, so edits of other workers are graded against
+    def test_reloaded_after_max_age(self):
+        with mock.patch('quiz.answer_keys.time.monotonic', return_value=100.0):
+            with self.captureOnCommitCallbacks(execute=True):
+                answer_key_store.get_quiz(self.quiz.id)
+
+        # edited by another worker, without invalidating this one
+        Question.objects.filter(id=self.questions[0].id).update(correct_option=4)
+        with mock.patch('quiz.answer_keys.time.monotonic', return_value=100.0 + answer_key_store.max_age - 1):
+            with self.assertNumQueries(0):
+                self.assertEqual(answer_key_store.get_for_question(self.questions[0].id).answer_keys[self.questions[0].id].correct_option, 1)
+        with mock.patch('quiz.answer_keys.time.monotonic', return_value=100.0 + answer_key_store.max_age):
+            self.assertEqual(answer_key_store.get_for_question(self.questions[0].id).answer_keys[self.questions[0].id].correct_option, 4)
+
+class SubmitWithAnswerKeysTest(APITestCase):
+
+    def setUp(self):
+        answer_key_store.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["A", "B", "C", "D"], correct_option=2)
+            for index in range(3)
+        ]
+
+    def tearDown(self):
+        answer_key_store.clear()
+
+    # test that grading reads no question once the answer keys are stored
+    def test_submit_graded_from_store(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.questions[0].id, 'selected_option': 1}, format='json')
+        self.assertEqual(response.data['message'], "Incorrect. The correct answer is 2: B.")
+
+        # savepoint + release, answer insert, result lookup, score update, result-answer link, option stats
+        with self.assertNumQueries(7):
+            response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.questions[1].id, 'selected_option': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_correct'])
+
+        data = {'answers': [{'question_id': self.questions[2].id, 'selected_option': 2}]}
+        # savepoint + release, answered check, answer insert, result lookup, score update, result-answer link,
+        # option stats, score histogram (the result is completed)
+        with self.assertNumQueries(9):
+            response = self.client.post(f'/quiz/api/quizzes/{self.quiz.id}/submit/', data, format='json')
+        self.assertEqual(response.data['accepted'], 1)
+
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual((result.score, result.answered_count), (2, 3))
+        self.assertIsNotNone(result.completed_at)
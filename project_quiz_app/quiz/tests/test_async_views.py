@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from quiz.cache import quiz_payload_cache
+from quiz.models import Answer, Question, Quiz, Result
+from user.authentication import UserClaimsRefreshToken
+
+class AsyncReadViewsTest(TestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.headers = {'Authorization': 'Bearer ' + self.token}
+
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["1", "2", "3", "4"], correct_option=2)
+            for index in range(2)
+        ]
+        self.result = Result.objects.create(quiz=self.quiz, user=self.user, score=1, answered_count=1)
+        self.result.answers.add(
+            Answer.objects.create(user=self.user, question=self.questions[0], selected_option=2, is_correct=True)
+        )
+        Quiz.objects.create(title="Other Quiz")
+
+        # responses of the sync views to compare with
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+
+    async def test_quiz_detail(self):
+        response = await self.async_client.get(f'/quiz/api/async/quizzes/{self.quiz.id}/', headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            'version': 3, # bumped by each added question
+            'title': "Sample Quiz",
+            'questions': [
+                {'id': question.id, 'text': question.text, 'options': ["1", "2", "3", "4"]}
+                for question in self.questions
+            ]
+        })
+
+    async def test_quiz_detail_not_found(self):
+        response = await self.async_client.get('/quiz/api/async/quizzes/99999/', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()['error'], "Quiz not found.")
+
+    async def test_quiz_list(self):
+        response = await self.async_client.get('/quiz/api/async/quizzes/', {'limit': 1}, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [{'id': self.quiz.id, 'title': "Sample Quiz", 'question_count': 2, 'answered_count': 1}])
+        self.assertIn('rel="next"', response['Link'])
+
+    async def test_results(self):
+        response = await self.async_client.get(
+            f'/quiz/api/async/quizzes/{self.quiz.id}/users/{self.user.id}/results/', headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_score'], 1)
+        self.assertEqual(response.json()['answers'], [
+            {'question_id': self.questions[0].id, 'selected_option': 2, 'correct_option': 2, 'is_correct': True}
+        ])
+
+    async def test_unauthenticated(self):
+        response = await self.async_client.get(f'/quiz/api/async/quizzes/{self.quiz.id}/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()['detail'], "Authentication credentials were not provided.")
+
+        response = await self.async_client.get(f'/quiz/api/async/quizzes/{self.quiz.id}/', headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # tokens carrying the user claims are authenticated without loading the user
+    async def test_user_claims_token(self):
+        token = str(UserClaimsRefreshToken.for_user(self.user).access_token)
+
+        response = await self.async_client.get('/quiz/api/async/quizzes/', headers={'Authorization': 'Bearer ' + token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([quiz['title'] for quiz in response.json()], ["Sample Quiz", "Other Quiz"])
+
+    # the async views return the same bytes as the sync views
+    def test_same_payload_as_sync_views(self):
+        for path in [
+            f'api/quizzes/{self.quiz.id}/',
+            'api/quizzes/',
+            f'api/quizzes/{self.quiz.id}/users/{self.user.id}/results/',
+        ]:
+            quiz_payload_cache.clear()
+            sync_response = self.sync_client.get(f'/quiz/{path}')
+            quiz_payload_cache.clear()
+            async_response = self.client.get(f'/quiz/{path.replace("api/", "api/async/", 1)}', headers=self.headers)
+            self.assertEqual(async_response.content, sync_response.content)
+            self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
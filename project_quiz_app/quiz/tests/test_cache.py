@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.cache import LRUCache, QuizPayloadCache, quiz_payload_cache
+from quiz.models import Question, Quiz
+
+class LRUCacheTest(TestCase):
+
+    # test that the least recently used entry is evicted first
+    def test_eviction_order(self):
+        cache = LRUCache(max_entries=2)
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        cache.get(1) # 1 is now most recently used
+        cache.set(3, 'c')
+
+        self.assertEqual(cache.get(1), 'a')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 'c')
+        self.assertEqual(cache.evictions, 1)
+
+    # test hit and miss counters
+    def test_counters(self):
+        cache = LRUCache(max_entries=2)
+        cache.get(1)
+        cache.set(1, 'a')
+        cache.get(1)
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+@override_settings(CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SharedTierTest(TestCase):
+
+    # test that a payload stored by one worker is visible to another through the shared tier
+    def test_shared_tier_promotes_to_local(self):
+        first = QuizPayloadCache(cache_alias='shared')
+        second = QuizPayloadCache(cache_alias='shared')
+        payload = {'version': 1, 'title': 'Quiz', 'questions': []}
+        first.set(1, payload)
+
+        self.assertEqual(second.get(1), payload)
+        self.assertEqual(second.stats()['shared_hits'], 1)
+        self.assertEqual(len(second.local), 2) # current payload and version payload
+
+        # invalidation drops the current version only, version payloads stay valid
+        first.invalidate(1)
+        second.local.clear()
+        self.assertIsNone(second.get(1))
+        self.assertEqual(second.get_payload(1, 1), payload)
+
+    # test that a worker picks up an edit made by another one once its local entry expired
+    def test_local_entries_expire(self):
+        first = QuizPayloadCache(cache_alias='shared')
+        second = QuizPayloadCache(cache_alias='shared', local_max_age=5)
+        first.set(1, {'version': 1, 'title': 'Quiz', 'questions': []})
+        with mock.patch('quiz.cache.time.monotonic', return_value=100.0):
+            self.assertEqual(second.get(1)['version'], 1)
+
+        first.invalidate(1)
+        first.set(1, {'version': 2, 'title': 'Renamed Quiz', 'questions': []})
+        with mock.patch('quiz.cache.time.monotonic', return_value=104.0):
+            self.assertEqual(second.get(1)['version'], 1)
+        with mock.patch('quiz.cache.time.monotonic', return_value=105.0):
+            self.assertEqual(second.get(1)['version'], 2)
+
+class QuizDetailCacheTest(APITestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.question = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample Question?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=2
+        )
+        self.url = f'/quiz/api/quizzes/{self.quiz.id}/'
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+
+    # test that a repeated fetch is served without touching the database
+    def test_cached_payload_served_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], "Sample Quiz")
+        self.assertNotIn('correct_option', response.data['questions'][0])
+        self.assertEqual(quiz_payload_cache.stats()['hits'], 1)
+
+    # test that editing a question invalidates the cached payload
+    def test_question_edit_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = "Edited Question?"
+            self.question.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['questions'][0]['text'], "Edited Question?")
+
+    # test that editing the quiz invalidates the cached payload
+    def test_quiz_edit_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.title = "Renamed Quiz"
+            self.quiz.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['title'], "Renamed Quiz")
+
+    # test that payloads are not cached before the transaction commits
+    def test_not_cached_without_commit(self):
+        self.client.get(self.url)
+        self.assertEqual(len(quiz_payload_cache.local), 0)
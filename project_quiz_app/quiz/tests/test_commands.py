@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from quiz.benchmarking import check_thresholds
+from quiz.models import Answer, Question, Quiz, Result
+from quiz.seeding import seed_dataset
+
+class SeedDatasetTest(TestCase):
+
+    # test that the seeded attempts are consistent
+    def test_seed_dataset(self):
+        summary = seed_dataset(users=5, quizzes=4, questions_per_quiz=3, attempt_ratio=1)
+
+        self.assertEqual(Quiz.objects.count(), 4)
+        self.assertEqual(Question.objects.count(), 12)
+        self.assertEqual(Result.objects.count(), 20)
+        self.assertEqual(Answer.objects.count(), summary['answers'])
+
+        result = Result.objects.first()
+        self.assertEqual(result.answers.count(), 3)
+        self.assertEqual(result.score, result.answers.filter(is_correct=True).count())
+
+class BenchmarkQueriesCommandTest(TestCase):
+
+    def test_benchmark_queries(self):
+        out = StringIO()
+        call_command('benchmark_queries', users=3, quizzes=3, questions=2, attempt_ratio=1, repeat=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('result by (user, quiz)', output)
+        self.assertIn('p95', output)
+        self.assertFalse(Quiz.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    # test that --keep leaves the seeded data for a --skip-seed run
+    def test_keep_seeded_data(self):
+        call_command('benchmark_queries', users=2, quizzes=2, questions=1, attempt_ratio=1, repeat=1, keep=True, stdout=StringIO())
+        self.assertEqual(Quiz.objects.count(), 2)
+
+        out = StringIO()
+        call_command('benchmark_queries', skip_seed=True, repeat=1, stdout=out)
+        self.assertNotIn('Seeded', out.getvalue())
+        self.assertEqual(Quiz.objects.count(), 2)
+
+class ExportResultsCommandTest(TestCase):
+
+    def test_export_results(self):
+        summary = seed_dataset(users=3, quizzes=1, questions_per_quiz=2, attempt_ratio=1)
+
+        out = StringIO()
+        call_command('export_results', summary['quiz_ids'][0], export_format='ndjson', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+
+        out = StringIO()
+        call_command('export_results', summary['quiz_ids'][0], chunk_size=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1 + 3 * 2)
+
+class ImportQuizzesCommandTest(TestCase):
+
+    def test_import_quizzes(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as source:
+            source.write(json.dumps({
+                'title': "Imported Quiz",
+                'questions': [{'text': "Question?", 'options': ["A", "B", "C", "D"], 'correct_option': 1}]
+            }) + "\n")
+        self.addCleanup(os.remove, source.name)
+
+        out = StringIO()
+        call_command('import_quizzes', source.name, stdout=out)
+
+        self.assertIn('Imported 1 quizzes and 1 questions', out.getvalue())
+        self.assertEqual(Quiz.objects.get().question_count, 1)
+
+# runs outside of a test transaction, so query counts match the ones of a real server
+class BenchmarkFlowCommandTest(TransactionTestCase):
+
+    # test that the flow stays within the query budgets of the committed baseline,
+    # latency and throughput thresholds are relaxed since they depend on the machine
+    def test_benchmark_flow_within_baseline(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command(
+                'benchmark_flow', users=2, quizzes=2, questions=3, attempt_ratio=0,
+                baseline=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'), tolerance=100,
+                output=output, stdout=out
+            )
+            with open(output) as report_file:
+                report = json.load(report_file)
+
+        self.assertIn('Within the baseline.', out.getvalue())
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['steps']['login']['count'], 2)
+        self.assertEqual(report['steps']['submit']['count'], 6)
+        self.assertEqual(report['steps']['results']['count'], 2)
+        self.assertFalse(Quiz.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    # test that seeded users only stay with --seed-only and an explicit password
+    def test_seed_only(self):
+        with self.assertRaisesMessage(CommandError, '--seed-only requires a --password'):
+            call_command('benchmark_flow', users=1, quizzes=1, seed_only=True, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+        call_command('benchmark_flow', users=2, quizzes=1, seed_only=True, password='secret-password', stdout=StringIO())
+        self.assertEqual(Quiz.objects.count(), 1)
+        self.assertTrue(User.objects.get(username='bench-flow-0-0').check_password('secret-password'))
+
+    def test_benchmark_flow_regression(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            with open(baseline, 'w') as baseline_file:
+                json.dump({'steps': {'submit': {'queries': 1}}}, baseline_file)
+
+            with self.assertRaisesMessage(CommandError, 'queries per request, budget is 1'):
+                call_command(
+                    'benchmark_flow', users=1, quizzes=1, questions=2, attempt_ratio=0, bulk=True,
+                    baseline=baseline, stdout=StringIO()
+                )
+
+class CheckThresholdsTest(TestCase):
+
+    def test_check_thresholds(self):
+        report = {
+            'throughput': 100.0,
+            'steps': {'list': {'p50': 5.0, 'p95': 10.0, 'p99': 12.0, 'queries_max': 2}},
+        }
+
+        self.assertEqual(check_thresholds(report, {'throughput': 110, 'steps': {'list': {'p95': 9.0, 'queries': 2}}}), [])
+        self.assertEqual(
+            check_thresholds(report, {'tolerance': 0, 'throughput': 110, 'steps': {'list': {'p95': 9.0}, 'fetch': {}}}),
+            [
+                "throughput 100.0 req/s is below 110.0 req/s",
+                "list: p95 10.000 ms is above 9.000 ms",
+                "fetch: not measured",
+            ]
+        )
@@ -0,0 +1,149 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from quiz.cache import quiz_payload_cache
+from quiz.models import Answer, Question, Quiz, Result
+
+class QuizVersionTest(TestCase):
+
+    # test that edits of a quiz or its questions bump its version
+    def test_version_bumped_on_edits(self):
+        quiz = Quiz.objects.create(title="Sample Quiz")
+        self.assertEqual(quiz.version, 1)
+
+        question = Question.objects.create(quiz=quiz, text="Question?", options=["A", "B"], correct_option=1)
+        question.text = "Edited?"
+        question.save()
+        self.assertEqual(Quiz.objects.get(id=quiz.id).version, 3)
+
+        # a stale instance still moves the version forward
+        quiz.title = "Renamed Quiz"
+        quiz.save()
+        self.assertEqual(quiz.version, 4)
+
+        question.delete()
+        quiz.refresh_from_db()
+        self.assertEqual((quiz.version, quiz.question_count), (5, 0))
+
+class QuizDetailConditionalTest(APITestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="Question?", options=["A", "B"], correct_option=1)
+        self.url = f'/quiz/api/quizzes/{self.quiz.id}/'
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+
+    def test_etag_and_cache_control(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['ETag'], f'"quiz-{self.quiz.id}-v2"')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=0, s-maxage=60, must-revalidate')
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(response.data['version'], 2)
+
+    # test that an unchanged uncached quiz is revalidated without reading its questions
+    def test_not_modified_before_loading_questions(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_not_modified_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    # test that an edit changes the etag, so the new content is sent
+    def test_modified_after_edit(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = "Edited?"
+            self.question.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['questions'][0]['text'], "Edited?")
+
+    def test_not_found(self):
+        response = self.client.get('/quiz/api/quizzes/0/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ResultsConditionalTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["A", "B"], correct_option=1)
+            for index in range(2)
+        ]
+        self.url = f'/quiz/api/quizzes/{self.quiz.id}/users/{self.user.id}/results/'
+        self.submit(self.questions[0])
+
+    def submit(self, question):
+        return self.client.post('/quiz/api/quizzes/submit/', {'question_id': question.id, 'selected_option': 1}, format='json')
+
+    # test that an unchanged result is answered after the result lookup only
+    def test_not_modified_before_loading_answers(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.submit(self.questions[1])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['answered_count'], 2)
+
+    # test that a result deleted and answered again does not match the old etag
+    def test_recreated_result(self):
+        etag = self.client.get(self.url)['ETag']
+        Answer.objects.filter(user=self.user).delete()
+        Result.objects.filter(user=self.user).delete()
+        self.submit(self.questions[0])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+class AsyncConditionalTest(TestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.headers = {'Authorization': 'Bearer ' + str(RefreshToken.for_user(self.user).access_token)}
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        Question.objects.create(quiz=self.quiz, text="Question?", options=["A", "B"], correct_option=1)
+        Result.objects.create(quiz=self.quiz, user=self.user, score=0, answered_count=0)
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+
+    async def test_not_modified(self):
+        for url in [f'/quiz/api/async/quizzes/{self.quiz.id}/', f'/quiz/api/async/quizzes/{self.quiz.id}/users/{self.user.id}/results/']:
+            response = await self.async_client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = await self.async_client.get(url, headers={**self.headers, 'If-None-Match': response['ETag']})
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.db import connection
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase
+from project_quiz_app.database import database_settings, replica_weights
+
+class DatabaseSettingsTest(SimpleTestCase):
+
+    def test_sqlite_defaults(self):
+        databases = database_settings(Path('/app'), {})
+
+        self.assertEqual(list(databases), ['default'])
+        default = databases['default']
+        self.assertEqual(default['NAME'], Path('/app/db.sqlite3'))
+        self.assertEqual(default['CONN_MAX_AGE'], 60)
+        self.assertIn('PRAGMA journal_mode=WAL', default['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA busy_timeout=5000', default['OPTIONS']['init_command'])
+        self.assertEqual(default['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+    def test_sqlite_untuned_with_replicas(self):
+        databases = database_settings(Path('/app'), {
+            'SQLITE_TUNED': '0', 'DB_CONN_MAX_AGE': '0', 'DB_REPLICAS': '/data/replica-1.sqlite3, /data/replica-2.sqlite3',
+        })
+
+        self.assertEqual(list(databases), ['default', 'replica_1', 'replica_2'])
+        self.assertEqual(databases['default']['OPTIONS'], {})
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases['replica_2']['NAME'], '/data/replica-2.sqlite3')
+        self.assertEqual(databases['replica_2']['TEST'], {'MIRROR': 'default'})
+
+    def test_postgresql_pool(self):
+        databases = database_settings(Path('/app'), {
+            'DB_ENGINE': 'postgresql', 'DB_NAME': 'quiz', 'DB_HOST': 'primary', 'DB_POOL': '1',
+            'DB_POOL_MAX_SIZE': '20', 'DB_REPLICAS': 'replica',
+        })
+
+        default = databases['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertEqual(default['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20})
+        self.assertEqual((databases['replica_1']['HOST'], databases['replica_1']['NAME']), ('replica', 'quiz'))
+
+    def test_replica_weights(self):
+        databases = database_settings(Path('/app'), {'DB_REPLICAS': 'a.sqlite3,b.sqlite3'})
+
+        self.assertEqual(replica_weights(databases, {}), {'replica_1': 1, 'replica_2': 1})
+        self.assertEqual(replica_weights(databases, {'DB_REPLICA_WEIGHTS': '3, 1'}), {'replica_1': 3, 'replica_2': 1})
+        self.assertEqual(replica_weights({'default': {}}, {}), {})
+        with self.assertRaises(ImproperlyConfigured):
+            replica_weights(databases, {'DB_REPLICA_WEIGHTS': '3'})
+
+class SqlitePragmasTest(TestCase):
+
+    # test that the pragmas are applied to new connections
+    def test_busy_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
@@ -0,0 +1,102 @@
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.importers import import_quizzes, iter_records
+from quiz.models import Question, Quiz
+
+VALID_QUIZ = {
+    'title': "Imported Quiz",
+    'questions': [
+        {'text': "Question 1?", 'options': ["A", "B", "C", "D"], 'correct_option': 2},
+        {'text': "Question 2?", 'options': ["A", "B", "C", "D"], 'correct_option': 4},
+    ]
+}
+
+CSV_DATA = (
+    "title,text,option_1,option_2,option_3,option_4,correct_option\n"
+    "Quiz A,Question 1?,A,B,C,D,1\n"
+    "Quiz A,Question 2?,A,B,C,D,2\n"
+    "Quiz B,Question 1?,A,B,C,D,9\n"
+    "Quiz C,Question 1?,A,B,C,D,3\n"
+)
+
+class ImportQuizzesTest(TestCase):
+
+    # test that valid lines are inserted in batches and invalid ones reported with their line
+    def test_import_jsonl(self):
+        lines = io.StringIO("\n".join([
+            json.dumps(VALID_QUIZ),
+            "{not json",
+            json.dumps({'title': "Broken", 'questions': [{'text': "Q?", 'options': ["A"], 'correct_option': 1}]}),
+            json.dumps(VALID_QUIZ),
+            json.dumps(VALID_QUIZ),
+        ]))
+        report = import_quizzes(iter_records(lines, 'jsonl'), batch_size=2)
+
+        self.assertEqual(report.quizzes, 3)
+        self.assertEqual(report.questions, 6)
+        self.assertEqual([error['line'] for error in report.errors], [2, 3])
+        self.assertIn('questions', report.errors[1]['errors'])
+
+        self.assertEqual(Quiz.objects.count(), 3)
+        quiz = Quiz.objects.first()
+        self.assertEqual(quiz.question_count, 2)
+        self.assertEqual(list(quiz.questions.values_list('correct_option', flat=True)), [2, 4])
+
+    # test that consecutive csv rows of the same title form one quiz
+    def test_import_csv(self):
+        report = import_quizzes(iter_records(io.StringIO(CSV_DATA), 'csv'))
+
+        self.assertEqual(report.quizzes, 2)
+        self.assertEqual(report.questions, 3)
+        self.assertEqual(report.errors[0]['line'], 4)
+        self.assertEqual(Quiz.objects.get(title="Quiz A").question_count, 2)
+
+    def test_import_csv_missing_columns(self):
+        report = import_quizzes(iter_records(io.StringIO("title,text\nQuiz,Question?\n"), 'csv'))
+
+        self.assertEqual(report.quizzes, 0)
+        self.assertIn('Missing columns', report.errors[0]['errors'][0])
+
+class QuizImportViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='adminpassword', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/quiz/api/quizzes/import/'
+
+    def test_upload_csv(self):
+        upload = SimpleUploadedFile('quizzes.csv', CSV_DATA.encode(), content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['quizzes'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual(Question.objects.count(), 3)
+
+    # test that a file with an invalid byte after the first batch imports nothing
+    def test_upload_invalid_utf8(self):
+        data = (json.dumps(VALID_QUIZ) + "\n") * 600 + '{"title": "Quiz \xe9"}\n'
+        upload = SimpleUploadedFile('quizzes.jsonl', data.encode('latin-1'))
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "File must be UTF-8 encoded.")
+        self.assertFalse(Quiz.objects.exists())
+
+    def test_upload_unknown_format(self):
+        upload = SimpleUploadedFile('quizzes.xml', b'<quizzes/>')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_requires_staff(self):
+        self.client.force_authenticate(user=User.objects.create_user(username='testuser', password='testpassword'))
+        upload = SimpleUploadedFile('quizzes.csv', CSV_DATA.encode())
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.leaderboards import Leaderboard, leaderboard_store
+from quiz.models import Question, Quiz, Result
+
+class LeaderboardTest(SimpleTestCase):
+
+    # test that ties share a rank and score changes move users
+    def test_ranks(self):
+        board = Leaderboard([(1, 5), (2, 7), (3, 5), (4, 0)])
+
+        self.assertEqual(board.top(10), [(1, 2, 7), (2, 1, 5), (2, 3, 5), (4, 4, 0)])
+        self.assertEqual(board.rank(3), (2, 5))
+        self.assertIsNone(board.rank(5))
+
+        board.add_score(3, 3)
+        board.add_score(5, 0)
+        board.remove(2)
+
+        self.assertEqual(board.top(2), [(1, 3, 8), (2, 1, 5)])
+        self.assertEqual(board.rank(5), (3, 0))
+        self.assertEqual(len(board), 4)
+
+class LeaderboardViewTest(APITestCase):
+
+    def setUp(self):
+        answer_key_store.clear()
+        leaderboard_store.clear()
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["A", "B", "C", "D"], correct_option=2)
+            for index in range(3)
+        ]
+        self.users = [User.objects.create_user(username=f'user{index}', password='testpassword') for index in range(4)]
+        for user, score in zip(self.users[:3], [1, 2, 1]):
+            Result.objects.create(quiz=self.quiz, user=user, score=score, answered_count=score)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[3])
+
+    def tearDown(self):
+        answer_key_store.clear()
+        leaderboard_store.clear()
+
+    def get_leaderboard(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/leaderboard/', params)
+
+    def submit(self, question, selected_option=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/quiz/api/quizzes/submit/', {'question_id': question.id, 'selected_option': selected_option}, format='json')
+
+    def test_leaderboard(self):
+        response = self.get_leaderboard()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['participants'], 3)
+        self.assertEqual(response.data['top'], [
+            {'rank': 1, 'user_id': self.users[1].id, 'username': 'user1', 'score': 2},
+            {'rank': 2, 'user_id': self.users[0].id, 'username': 'user0', 'score': 1},
+            {'rank': 2, 'user_id': self.users[2].id, 'username': 'user2', 'score': 1},
+        ])
+        self.assertIsNone(response.data['me'])
+
+        self.assertEqual(len(self.get_leaderboard(limit=1).data['top']), 1)
+        self.assertEqual(self.get_leaderboard(limit=0).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/quiz/api/quizzes/0/leaderboard/').status_code, status.HTTP_404_NOT_FOUND)
+
+    # test that submissions update the loaded board, which is then ranked without reading results
+    def test_updated_incrementally(self):
+        self.get_leaderboard()
+
+        self.submit(self.questions[0])
+        self.submit(self.questions[1])
+        self.submit(self.questions[2], selected_option=1)
+
+        # usernames of the top entries
+        with self.assertNumQueries(1):
+            response = self.get_leaderboard()
+        self.assertEqual(response.data['me'], {'rank': 1, 'score': 2})
+        self.assertEqual(response.data['participants'], 4)
+        self.assertEqual([entry['rank'] for entry in response.data['top']], [1, 1, 3, 3])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.get(quiz=self.quiz, user=self.users[1]).delete()
+        response = self.get_leaderboard()
+        self.assertEqual(response.data['participants'], 3)
+        self.assertEqual(response.data['top'][0]['user_id'], self.users[3].id)
+
+    # test that the database fallback ranks like the board
+    def test_database_fallback(self):
+        self.submit(self.questions[0])
+        expected = self.get_leaderboard().data
+
+        with mock.patch.object(leaderboard_store, 'enabled', False):
+            # answer keys are stored, top entries, my score, my rank, participants, usernames
+            with self.assertNumQueries(5):
+                response = self.get_leaderboard()
+        self.assertEqual(response.data, expected)
+
+    # test that writes made elsewhere show up once the board older than MAX_AGE was reloaded in the background
+    def test_reloaded_when_stale(self):
+        self.get_leaderboard()
+        Result.objects.filter(user=self.users[0]).update(score=5)
+
+        self.assertEqual(self.get_leaderboard().data['top'][0]['score'], 2)
+        with mock.patch.object(leaderboard_store, 'max_age', 0), mock.patch.object(leaderboard_store, 'run_in_background') as run:
+            # the stale board is served without reading results (usernames only)
+            with self.assertNumQueries(1):
+                self.assertEqual(self.get_leaderboard().data['top'][0]['score'], 2)
+            # a single reload is started, run here so it sees the test's transaction
+            self.get_leaderboard()
+            self.assertEqual(run.call_count, 1)
+            run.call_args.args[0]()
+        self.assertEqual(self.get_leaderboard().data['top'][0]['score'], 5)
+
+    # test that a rebuild reloads the boards, other workers through the generation in the shared cache
+    def test_rebuild_command(self):
+        self.addCleanup(caches['default'].clear)
+        with mock.patch.object(leaderboard_store, 'cache_alias', 'default'):
+            self.get_leaderboard()
+            Result.objects.filter(user=self.users[0]).update(score=5)
+
+            out = StringIO()
+            call_command('rebuild_leaderboards', stdout=out)
+
+            self.assertIn(f"Quiz {self.quiz.id}: 3 participants, leader user {self.users[0].id} with 5", out.getvalue())
+            self.assertEqual(caches['default'].get(leaderboard_store.generation_key(self.quiz.id)), 1)
+            self.assertEqual(self.get_leaderboard().data['top'][0]['score'], 5)
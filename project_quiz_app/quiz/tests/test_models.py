@@ -1,3 +1,4 @@
+from django.db import IntegrityError
 from django.forms import ValidationError
 from django.test import TestCase
 from django.contrib.auth.models import User
@@ -40,6 +41,21 @@ class TestQuestionModel(TestCase):
         self.assertEqual(question.correct_option, 1)
         self.assertEqual(question.options, ["Option 1", "Option 2", "Option 3", "Option 4"])
 
+    # test that the quiz's question count follows creates and deletes
+    def test_question_count_maintained(self):
+        question = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample Question?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=1
+        )
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 1)
+
+        question.delete()
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 0)
+
     # test that title field has max length of 500
     def test_text_field_max_length(self):
         question = Question(
@@ -85,7 +101,7 @@ class TestAnswerModel(TestCase):
     def test_selected_option_field(self):
         answer = Answer.objects.create(
             question=self.question,
-            user=self.user,
+            user=User.objects.create(username="otheruser"),
             selected_option=3,
             is_correct=False
         )
@@ -95,7 +111,7 @@ class TestAnswerModel(TestCase):
     def test_is_correct_field(self):
         answer = Answer.objects.create(
             question=self.question,
-            user=self.user,
+            user=User.objects.create(username="otheruser1"),
             selected_option=2,
             is_correct=True
         )
@@ -103,12 +119,22 @@ class TestAnswerModel(TestCase):
 
         answer = Answer.objects.create(
             question=self.question,
-            user=self.user,
+            user=User.objects.create(username="otheruser2"),
             selected_option=3,
             is_correct=False
         )
         self.assertFalse(answer.is_correct)
 
+    # test that a user can answer a question only once
+    def test_unique_answer_per_user_question(self):
+        with self.assertRaises(IntegrityError):
+            Answer.objects.create(
+                question=self.question,
+                user=self.user,
+                selected_option=2,
+                is_correct=False
+            )
+
 class TestResultModel(TestCase):
     
     # this will run before each test
@@ -153,4 +179,10 @@ class TestResultModel(TestCase):
         
         self.assertEqual(result.answers.count(), 2)
         self.assertIn(self.answer1, result.answers.all())
-        self.assertIn(self.answer2, result.answers.all())
\ No newline at end of file
+        self.assertIn(self.answer2, result.answers.all())
+
+    # test that a user has only one result per quiz
+    def test_unique_result_per_user_quiz(self):
+        Result.objects.create(quiz=self.quiz, user=self.user, score=0)
+        with self.assertRaises(IntegrityError):
+            Result.objects.create(quiz=self.quiz, user=self.user, score=1)
@@ -0,0 +1,132 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from quiz.cache import quiz_payload_cache
+from quiz.models import Question, Quiz
+from quiz.profiling import Histogram, ProfileStore, ProfilingMiddleware, load_profiles, profile_store
+from quiz.versions import freeze_quiz_version
+
+class HistogramTest(TestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.maximum, 100)
+        self.assertAlmostEqual(histogram.mean, 50.5)
+        # bucket bounds are 25% apart, percentiles are upper bounds within that error
+        self.assertTrue(50 <= histogram.percentile(50) <= 50 * 1.25)
+        self.assertTrue(95 <= histogram.percentile(95) <= 100)
+        self.assertEqual(histogram.percentile(100), 100)
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+    def test_merge(self):
+        first, second = Histogram(), Histogram()
+        first.add(1)
+        second.add(1000)
+        second.add(1000)
+        first.merge(Histogram.from_dict(second.as_dict()))
+
+        self.assertEqual(first.count, 3)
+        self.assertEqual(first.maximum, 1000)
+        self.assertTrue(first.percentile(10) <= 1.25)
+        self.assertEqual(first.percentile(99), 1000)
+
+class ProfileStoreTest(TestCase):
+
+    # test that the dumps of several processes are merged per view
+    def test_dump_and_load(self):
+        metrics = {'total': 10, 'db': 2, 'app': 5, 'render': 3, 'queries': 4}
+        with tempfile.TemporaryDirectory() as directory:
+            store = ProfileStore()
+            store.record('retrieve-quiz', metrics)
+            store.dump(directory)
+            # a second worker's dump
+            (Path(directory) / 'profile-0.json').write_text(json.dumps(store.snapshot()))
+
+            profiles = load_profiles(directory)
+
+        self.assertEqual(list(profiles), ['retrieve-quiz'])
+        self.assertEqual(profiles['retrieve-quiz']['total'].count, 2)
+        self.assertEqual(profiles['retrieve-quiz']['queries'].maximum, 4)
+
+class ProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        profile_store.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.quiz = Quiz.objects.create(title="Sample Quiz", question_count=1)
+        Question.objects.create(quiz=self.quiz, text="Question?", options=["1", "2", "3", "4"], correct_option=2)
+        freeze_quiz_version(self.quiz.id)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+        profile_store.clear()
+        self.directory.cleanup()
+
+    def get_client(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        return client
+
+    def test_disabled_by_default(self):
+        response = self.get_client().get(f'/quiz/api/quizzes/{self.quiz.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(profile_store.snapshot(), {})
+
+    # test the Server-Timing header and the per url name aggregation
+    def test_records_requests(self):
+        config = {'ENABLED': True, 'DUMP_DIR': self.directory.name, 'FLUSH_EVERY': 2}
+        with override_settings(QUIZ_PROFILING=config):
+            client = self.get_client()
+            response = client.get(f'/quiz/api/quizzes/{self.quiz.id}/')
+            client.get(f'/quiz/api/quizzes/{self.quiz.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = {entry.split(';')[0] for entry in response['Server-Timing'].split(', ')}
+        self.assertEqual(timings, {'db', 'app', 'render', 'total'})
+        # the user lookup, then the published quiz payload is loaded with 1 query
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+        histograms = profile_store.snapshot()['retrieve-quiz']
+        self.assertEqual(histograms['total']['count'], 2)
+        self.assertEqual(histograms['queries']['maximum'], 2)
+
+        # dumped after FLUSH_EVERY requests, printed by the report command
+        out = StringIO()
+        call_command('profiling_report', directory=self.directory.name, stdout=out)
+        self.assertIn('retrieve-quiz', out.getvalue())
+
+    # async views are profiled without the middleware being adapted to sync
+    async def test_records_async_requests(self):
+        with override_settings(QUIZ_PROFILING={'ENABLED': True}):
+            response = await self.async_client.get(f'/quiz/api/async/quizzes/{self.quiz.id}/', headers={'Authorization': 'Bearer ' + self.token})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # the user lookup, then the published quiz payload is loaded with 1 query
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        self.assertEqual(profile_store.snapshot()['async-retrieve-quiz']['queries']['maximum'], 2)
+
+    def test_async_capable(self):
+        async def get_response(request):
+            return None
+
+        with override_settings(QUIZ_PROFILING={'ENABLED': True}):
+            self.assertTrue(iscoroutinefunction(ProfilingMiddleware(get_response)))
+            self.assertFalse(iscoroutinefunction(ProfilingMiddleware(lambda request: None)))
@@ -0,0 +1,107 @@
+import datetime
+import decimal
+import io
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from project_quiz_app.parsers import FastJSONParser
+from project_quiz_app.renderers import FastJSONRenderer
+from quiz.models import Question, Quiz
+
+SAMPLE = {
+    'title': "Quiz é ✓ \u2028 \u2029 \"quoted\" </script>",
+    'questions': [{'id': index, 'text': f"Question {index}?", 'options': ["1", "2", "3", "4"]} for index in range(3)],
+    'completed_at': datetime.datetime(2024, 11, 10, 8, 26, 0, 123456, tzinfo=datetime.timezone.utc),
+    'naive': datetime.datetime(2024, 11, 10, 8, 26),
+    'offset': datetime.datetime(2024, 11, 10, 8, 26, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+    'date': datetime.date(2024, 11, 10),
+    'time': datetime.time(8, 26, 1),
+    'duration': datetime.timedelta(minutes=3),
+    'average_score': decimal.Decimal('1.5'),
+    'rate': 0.6667,
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy("Quiz not found."),
+    'tuple': (1, True, None),
+    1: 'integer key',
+}
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    # test that the bytes are the same as DRF's renderer
+    def test_same_output(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertIn(b'\\u2028', FastJSONRenderer().render(SAMPLE))
+
+    def test_indent_and_large_integers(self):
+        data = {'big': 2 ** 70, 'questions': SAMPLE['questions']}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+    # test that NaN and Infinity are handled like DRF's renderer: refused, or emitted without STRICT_JSON
+    def test_non_finite_floats(self):
+        for value in [float('nan'), float('inf'), -float('inf')]:
+            data = {'average_score': None, 'rates': [0.5, value]}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(data)
+
+            renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+            renderer.strict = fast_renderer.strict = False
+            self.assertEqual(fast_renderer.render(data), renderer.render(data))
+
+    # test floats orjson formats with or without an exponent unlike python's repr
+    def test_exponent_floats(self):
+        for value in [1e16, 1e-7, 1.5e300, -2.5e-5, 0.00001, 1e22]:
+            for data in [{'rate': value}, [0.5, value], {value: 'key'}]:
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        data = {'rates': [0.0001, 0.5, 1e15, 123.456]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    # test the stdlib fallback used when orjson is not installed
+    def test_without_orjson(self):
+        with mock.patch('project_quiz_app.renderers.orjson', None), mock.patch('project_quiz_app.parsers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
+
+class FastJSONParserTest(SimpleTestCase):
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body))
+
+    def test_same_documents(self):
+        for body in [b'{"answers": [{"question_id": 1, "selected_option": 2}]}', '"é ✓"'.encode(), b'123456789012345678901234567890', b'[1.5, null, true]']:
+            self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_rejected_documents(self):
+        for body in [b'{"a": ', b'[NaN]', b'[Infinity]', b'\xff']:
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+class FastJSONApiTest(APITestCase):
+
+    # test that the api renders and parses with the configured classes
+    def test_configured(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        quiz = Quiz.objects.create(title="Sample Quiz é")
+        question = Question.objects.create(quiz=quiz, text="Question?", options=["A", "B", "C", "D"], correct_option=2)
+
+        response = client.get(f'/quiz/api/quizzes/{quiz.id}/')
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+        response = client.post('/quiz/api/quizzes/submit/', b'{"question_id": %d, "selected_option": 2}' % question.id, content_type='application/json')
+        self.assertTrue(response.data['is_correct'])
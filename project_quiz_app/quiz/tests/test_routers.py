@@ -0,0 +1,200 @@
+import asyncio
+import random
+import tempfile
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.cache import quiz_payload_cache
+from quiz.models import Answer, Question, Quiz, QuizVersion, Result
+from quiz.routers import ReadReplicaRouter, ReplicaPinningMiddleware, current_request_state, get_pin_cache, pin_key, pin_to_primary
+from quiz.versions import render_quiz_payload
+
+# pins kept in a file based cache, shared between the processes of a host
+def use_shared_pin_cache(test_case):
+    directory = tempfile.TemporaryDirectory()
+    test_case.addCleanup(directory.cleanup)
+    shared = override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pins': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+        },
+        QUIZ_REPLICA_ROUTING={'CACHE_ALIAS': 'pins'},
+    )
+    shared.enable()
+    test_case.addCleanup(shared.disable)
+
+class ReadReplicaRouterTest(SimpleTestCase):
+
+    def setUp(self):
+        use_shared_pin_cache(self)
+        self.router = ReadReplicaRouter()
+
+    # routes the reads made while serving a request of the given user
+    def serve(self, user):
+        state = {'request': SimpleNamespace(user=user), 'wrote': False, 'pinned': None}
+        token = current_request_state.set(state)
+        self.addCleanup(current_request_state.reset, token)
+        return state
+
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'])
+    def test_quiz_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Quiz), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Question), 'replica_1')
+        self.assertIsNone(self.router.db_for_read(Answer))
+        self.assertIsNone(self.router.db_for_read(Result))
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertEqual(self.router.db_for_write(Quiz), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'quiz'))
+
+    @override_settings(QUIZ_READ_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertIsNone(self.router.db_for_read(Quiz))
+
+    # test that replicas are not read without a shared cache, as pins would not reach every worker
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'])
+    def test_without_shared_cache(self):
+        with self.settings(QUIZ_REPLICA_ROUTING={'CACHE_ALIAS': 'default'}):
+            self.assertIsNone(get_pin_cache())
+            self.assertIsNone(self.router.db_for_read(Quiz))
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaPinningMiddleware(lambda request: HttpResponse())
+
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'], QUIZ_REPLICA_ROUTING={'ROUTE_RESULTS': True, 'CACHE_ALIAS': 'pins'})
+    def test_route_results(self):
+        self.assertEqual(self.router.db_for_read(Result), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Answer), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Result.answers.through), 'replica_1')
+
+    # test that the replicas get a share of the reads proportional to their weight
+    @override_settings(QUIZ_READ_REPLICAS={'replica_1': 3, 'replica_2': 1})
+    def test_weighted(self):
+        random.seed(18)
+        counts = Counter(self.router.db_for_read(Quiz) for _ in range(4000))
+
+        self.assertEqual(set(counts), {'replica_1', 'replica_2'})
+        self.assertAlmostEqual(counts['replica_1'] / 4000, 0.75, delta=0.03)
+
+    # test that a request reads from the primary once it wrote
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'])
+    def test_write_in_request(self):
+        state = self.serve(SimpleNamespace(pk=1, is_authenticated=True))
+        self.assertEqual(self.router.db_for_read(Quiz), 'replica_1')
+
+        self.router.db_for_write(Answer)
+
+        self.assertTrue(state['wrote'])
+        self.assertIsNone(self.router.db_for_read(Quiz))
+
+    # test that a user who recently wrote reads from the primary, other users do not
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'])
+    def test_pinned_user(self):
+        pin_to_primary(1)
+
+        self.serve(SimpleNamespace(pk=1, is_authenticated=True))
+        self.assertIsNone(self.router.db_for_read(Quiz))
+
+        self.serve(SimpleNamespace(pk=2, is_authenticated=True))
+        self.assertEqual(self.router.db_for_read(Quiz), 'replica_1')
+
+        self.serve(AnonymousUser())
+        self.assertEqual(self.router.db_for_read(Quiz), 'replica_1')
+
+    # test that the middleware runs natively in an async stack and pins a user who wrote
+    @override_settings(QUIZ_READ_REPLICAS=['replica_1'])
+    def test_async_middleware(self):
+        async def get_response(request):
+            ReadReplicaRouter().db_for_write(Answer)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        asyncio.run(middleware(SimpleNamespace(user=SimpleNamespace(pk=1, is_authenticated=True))))
+        self.assertTrue(get_pin_cache().get(pin_key(1)))
+
+    @override_settings(QUIZ_READ_REPLICAS=[])
+    def test_middleware_unused_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: HttpResponse())
+
+# a second sqlite file serves as replica, filled with different rows than the primary
+# so the rows a response shows tell which database was read
+@override_settings(QUIZ_READ_REPLICAS=['replica_test'])
+class TwoSqliteFilesTest(TransactionTestCase):
+    # includes the replica, registered before the test case collects its databases
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica_test'] = connections.configure_settings({
+            'default': {},
+            'replica_test': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': Path(cls.directory.name) / 'replica.sqlite3'},
+        })['replica_test']
+        with connections['replica_test'].schema_editor() as editor:
+            editor.create_model(Quiz)
+            editor.create_model(Question)
+            editor.create_model(QuizVersion)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica_test'].close()
+        del connections['replica_test']
+        del connections.settings['replica_test']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        use_shared_pin_cache(self)
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Primary Quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="Question?", options=["A", "B"], correct_option=1)
+        replica_quiz = Quiz.objects.using('replica_test').create(id=self.quiz.id, title="Replica Quiz")
+        replica_question = Question.objects.using('replica_test').create(id=self.question.id, quiz=replica_quiz, text="Question?", options=["A", "B"], correct_option=1)
+        QuizVersion.objects.using('replica_test').create(quiz=replica_quiz, number=replica_quiz.version, payload=render_quiz_payload(replica_quiz, [replica_question]))
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+
+    def fetch_title(self):
+        quiz_payload_cache.clear()
+        return self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/').data['title']
+
+    # test read-your-writes: after answering, the user's reads go to the primary until the pin expires
+    def test_pinned_after_write(self):
+        self.assertEqual(self.fetch_title(), "Replica Quiz")
+
+        response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.question.id, 'selected_option': 1}, format='json')
+        self.assertTrue(response.data['is_correct'])
+        self.assertTrue(get_pin_cache().get(pin_key(self.user.id)))
+        self.assertEqual(self.fetch_title(), "Primary Quiz")
+
+        # another user is not pinned
+        other_user = User.objects.create_user(username='otheruser', password='testpassword')
+        other_client = APIClient()
+        other_client.force_authenticate(user=other_user)
+        quiz_payload_cache.clear()
+        self.assertEqual(other_client.get(f'/quiz/api/quizzes/{self.quiz.id}/').data['title'], "Replica Quiz")
+
+        get_pin_cache().delete(pin_key(self.user.id))
+        self.assertEqual(self.fetch_title(), "Replica Quiz")
+
+    # test that reads inside a transaction see the transaction's own writes
+    def test_transaction_reads_primary(self):
+        with transaction.atomic():
+            self.assertEqual(Quiz.objects.get(id=self.quiz.id).title, "Primary Quiz")
+        self.assertEqual(Quiz.objects.get(id=self.quiz.id).title, "Replica Quiz")
@@ -1,9 +1,13 @@
+import random
+
 from django.db import IntegrityError
 from django.test import TestCase
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from quiz.models import Answer, Question, Quiz
-from quiz.serializers import AnswerSummarySerializer, QuestionSerializer, QuizSerializer, SubmitAnswerSerializer
+from quiz.serializers import AnswerSummarySerializer, QuestionSerializer, QuizSerializer, SubmitAnswerSerializer, serialize_answer_summaries
+from quiz.versions import build_quiz_payload, render_quiz_payload
 from django.contrib.auth.models import User
 
 class QuestionSerializerTest(APITestCase):
@@ -226,7 +230,7 @@ class AnswerSummarySerializerTest(APITestCase):
     # Test selected option is incorrect
     def test_invalid_selected_option(self):
         answer = Answer.objects.create(
-            user=self.user,
+            user=User.objects.create(username="otheruser"),
             question=self.question,
             selected_option=3,
             is_correct=False
@@ -241,13 +245,13 @@ class AnswerSummarySerializerTest(APITestCase):
     # Test Create multiple answers
     def test_multiple_answers(self):
         answer1 = Answer.objects.create(
-            user=self.user,
+            user=User.objects.create(username="otheruser1"),
             question=self.question,
             selected_option=4,
             is_correct=True
         )
         answer2 = Answer.objects.create(
-            user=self.user,
+            user=User.objects.create(username="otheruser2"),
             question=self.question,
             selected_option=3,
             is_correct=False
@@ -261,6 +265,15 @@ class AnswerSummarySerializerTest(APITestCase):
         self.assertEqual(serializer.data[0]['selected_option'], 4)
         self.assertEqual(serializer.data[1]['is_correct'], False)
         self.assertEqual(serializer.data[1]['selected_option'], 3)
+    # lightweight serializer returns the same fields as AnswerSummarySerializer
+    def test_serialize_answer_summaries_matches(self):
+        rows = Answer.objects.filter(id=self.answer.id).values_list(
+            'question_id', 'selected_option', 'question__correct_option', 'is_correct'
+        )
+        self.assertEqual(
+            serialize_answer_summaries(rows),
+            [dict(AnswerSummarySerializer(instance=self.answer).data)]
+        )
   
 class SubmitAnswerSerializerTest(APITestCase):
     
@@ -291,4 +304,57 @@ class SubmitAnswerSerializerTest(APITestCase):
         data = {'question_id': 1, 'selected_option': 0}
         serializer = SubmitAnswerSerializer(data=data)
         self.assertFalse(serializer.is_valid())
-        self.assertIn('selected_option', serializer.errors)      
\ No newline at end of file
+        self.assertIn('selected_option', serializer.errors)      
+
+class QuizPayloadFastPathTest(TestCase):
+    ALPHABET = 'abcXYZ 0123456789 \'"\\/<>&é✓ß漢字😀\n\t\u2028\x00'
+
+    def random_text(self, rng):
+        return ''.join(rng.choice(self.ALPHABET) for _ in range(rng.randint(0, 30)))
+
+    # any json value the options field may hold, not only the 4 strings the api accepts
+    def random_option(self, rng):
+        return rng.choice([
+            self.random_text(rng), rng.randint(-10 ** 6, 10 ** 6), rng.random() * 1000,
+            True, None, ['nested', 1], {'key': 'value'},
+        ])
+
+    def serializer_payload(self, quiz_id):
+        quiz = Quiz.objects.get(id=quiz_id)
+        data = QuizSerializer(quiz).data
+        return {'version': quiz.version, 'title': data['title'], 'questions': data['questions']}
+
+    # property test: for random quizzes, the values() based payload renders to the same bytes
+    # as the payload of QuizSerializer
+    def test_same_bytes_as_serializer(self):
+        rng = random.Random(25)
+        for _ in range(40):
+            quiz = Quiz.objects.create(title=self.random_text(rng))
+            Question.objects.bulk_create([
+                Question(
+                    quiz=quiz,
+                    text=self.random_text(rng),
+                    options=[self.random_option(rng) for _ in range(rng.randint(0, 6))],
+                    correct_option=rng.randint(1, 4)
+                )
+                for _ in range(rng.randint(0, 25))
+            ])
+
+            expected = JSONRenderer().render(self.serializer_payload(quiz.id))
+            self.assertEqual(JSONRenderer().render(build_quiz_payload(quiz.id)), expected)
+            questions = Question.objects.filter(quiz=quiz).order_by('id')
+            self.assertEqual(JSONRenderer().render(render_quiz_payload(Quiz.objects.get(id=quiz.id), questions)), expected)
+
+    # test that the payload is read in one query without correct options
+    def test_single_query(self):
+        quiz = Quiz.objects.create(title="Sample Quiz")
+        Question.objects.create(quiz=quiz, text="Question?", options=["A", "B", "C", "D"], correct_option=2)
+
+        with self.assertNumQueries(1) as context:
+            payload = build_quiz_payload(quiz.id)
+        self.assertNotIn('correct_option', context.captured_queries[0]['sql'])
+        self.assertEqual(payload['questions'], [{'id': quiz.questions.get().id, 'text': "Question?", 'options': ["A", "B", "C", "D"]}])
+
+        empty = Quiz.objects.create(title="Empty Quiz")
+        self.assertEqual(build_quiz_payload(empty.id), {'version': 1, 'title': "Empty Quiz", 'questions': []})
+        self.assertIsNone(build_quiz_payload(0))
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.cache import quiz_payload_cache
+from quiz.models import Answer, Question, Quiz
+from quiz.snapshots import QuizSnapshot, compile_snapshot, quiz_snapshot
+from quiz.versions import load_quiz_payload
+
+class SnapshotFileTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'quizzes.snapshot'
+        self.quizzes = [Quiz.objects.create(title=f"Quiz {index} é") for index in range(3)]
+        for quiz in self.quizzes:
+            for index in range(2):
+                Question.objects.create(quiz=quiz, text=f"Question {index}?", options=["A", "B", "C", "D"], correct_option=index + 1)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # test that payloads and answer keys are read back as compiled, found through both indexes
+    def test_round_trip(self):
+        self.assertEqual(compile_snapshot(self.path, chunk_size=2), (3, 6))
+        snapshot = QuizSnapshot(self.path)
+
+        for quiz in self.quizzes:
+            self.assertEqual(snapshot.get_payload(quiz.id), load_quiz_payload(quiz.id))
+            answer_keys = snapshot.get_answer_keys(quiz.id)
+            questions = list(quiz.questions.order_by('id'))
+            self.assertEqual(answer_keys['question_count'], 2)
+            self.assertEqual(answer_keys['answer_keys'], [[question.id, question.correct_option, "AB"[index]] for index, question in enumerate(questions)])
+            self.assertEqual(snapshot.quiz_for_question(questions[1].id), quiz.id)
+
+        self.assertIsNone(snapshot.get_payload(0))
+        self.assertIsNone(snapshot.quiz_for_question(0))
+
+    # test that decoded entries are bounded, evicted ones are decoded again
+    def test_decoded_bounded(self):
+        compile_snapshot(self.path)
+        snapshot = QuizSnapshot(self.path, max_decoded=2)
+
+        for quiz in self.quizzes:
+            snapshot.get_payload(quiz.id)
+            snapshot.get_answer_keys(quiz.id)
+        self.assertEqual(len(snapshot.decoded), 2)
+        self.assertEqual(snapshot.decoded.evictions, 4)
+        self.assertEqual(snapshot.get_payload(self.quizzes[0].id), load_quiz_payload(self.quizzes[0].id))
+
+    # test that a rebuild replaces the file while mappings of the old one stay readable
+    def test_atomic_swap(self):
+        compile_snapshot(self.path)
+        old = QuizSnapshot(self.path)
+        old_inode = os.stat(self.path).st_ino
+
+        Quiz.objects.filter(id=self.quizzes[0].id).delete()
+        compile_snapshot(self.path)
+
+        self.assertNotEqual(os.stat(self.path).st_ino, old_inode)
+        self.assertEqual(os.listdir(self.directory.name), ['quizzes.snapshot'])
+        self.assertIsNone(QuizSnapshot(self.path).get_payload(self.quizzes[0].id))
+        self.assertEqual(old.get_payload(self.quizzes[0].id)['title'], "Quiz 0 é")
+
+    def test_command(self):
+        out = StringIO()
+        call_command('compile_quiz_snapshot', output=str(self.path), stdout=out)
+        self.assertIn("Compiled 3 quizzes and 6 questions", out.getvalue())
+
+class SnapshotReadTest(APITestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'quizzes.snapshot'
+        self.settings = override_settings(QUIZ_SNAPSHOT={'PATH': str(self.path), 'CHECK_INTERVAL': 0})
+        self.settings.enable()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="Question?", options=["A", "B", "C", "D"], correct_option=2)
+        compile_snapshot(self.path)
+
+    def tearDown(self):
+        self.settings.disable()
+        quiz_snapshot.current() # unmaps the snapshot
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+        self.directory.cleanup()
+
+    # test that quizzes are served and graded from the snapshot without reading them from the database
+    def test_served_from_snapshot(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/')
+        self.assertEqual(response.data['title'], "Sample Quiz")
+        self.assertEqual(len(quiz_payload_cache.local), 0)
+
+        # graded without loading the answer keys, only their version is checked against the quiz
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.question.id, 'selected_option': 2}, format='json')
+        self.assertTrue(response.data['is_correct'])
+        self.assertEqual(
+            [query['sql'] for query in queries if 'FROM "quiz_question"' in query['sql'] or 'FROM "quiz_quiz"' in query['sql']],
+            [f'SELECT "quiz_quiz"."version" FROM "quiz_quiz" WHERE "quiz_quiz"."id" = {self.quiz.id} ORDER BY "quiz_quiz"."id" ASC LIMIT 1']
+        )
+        self.assertEqual(Answer.objects.get().quiz_version, self.quiz.version + 1)
+
+        # checked once every max age
+        self.client.force_authenticate(user=User.objects.create_user(username='otheruser', password='testpassword'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.question.id, 'selected_option': 2}, format='json')
+        self.assertFalse([query for query in queries if 'FROM "quiz_question"' in query['sql'] or 'FROM "quiz_quiz"' in query['sql']])
+
+    # test that once the max age passed, a quiz edited by another worker is graded against the database
+    def test_edited_elsewhere(self):
+        self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.question.id, 'selected_option': 2}, format='json')
+        Question.objects.filter(id=self.question.id).update(correct_option=3)
+        Quiz.objects.filter(id=self.quiz.id).update(version=F('version') + 1)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='otheruser', password='testpassword'))
+        with mock.patch.object(answer_key_store, 'max_age', 0):
+            response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.question.id, 'selected_option': 3}, format='json')
+
+        self.assertTrue(response.data['is_correct'])
+        self.assertEqual(Answer.objects.get(user__username='otheruser').quiz_version, self.quiz.version + 2)
+
+    # test that a quiz changed by this process is read from the database until the snapshot is rebuilt
+    def test_changed_quiz_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.text = "Edited?"
+            self.question.save()
+
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/')
+        self.assertEqual(response.data['questions'][0]['text'], "Edited?")
+
+        compile_snapshot(self.path)
+        self.assertEqual(quiz_snapshot.get_payload(self.quiz.id)['questions'][0]['text'], "Edited?")
+
+    # test that entries are decoded once per mapped snapshot
+    def test_decoded_once(self):
+        with mock.patch('quiz.snapshots.json.loads', wraps=json.loads) as loads:
+            for _ in range(3):
+                payload = quiz_snapshot.get_payload(self.quiz.id)
+                quiz_keys = answer_key_store.get_snapshot_quiz(self.quiz.id)
+        self.assertEqual(loads.call_count, 2)
+        self.assertIs(quiz_snapshot.get_payload(self.quiz.id), payload)
+        self.assertIs(answer_key_store.get_snapshot_quiz(self.quiz.id), quiz_keys)
+        self.assertEqual(quiz_keys.answer_keys[self.question.id].correct_option, 2)
+
+    # test that a truncated file is logged and skipped, the mapped snapshot stays in use until a valid one replaces it
+    def test_truncated_file(self):
+        snapshot = quiz_snapshot.current()
+        with open(self.path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        truncated = self.path.with_name('truncated')
+        truncated.write_bytes(data[:-4])
+        os.replace(truncated, self.path)
+
+        with self.assertLogs('quiz.snapshots', 'ERROR'):
+            self.assertIs(quiz_snapshot.current(), snapshot)
+        with self.assertLogs('quiz.snapshots', 'ERROR'):
+            quiz_snapshot.current() # tried again on the next check
+
+        compile_snapshot(self.path)
+        self.assertIsNot(quiz_snapshot.current(), snapshot)
+        self.assertEqual(quiz_snapshot.get_payload(self.quiz.id)['title'], "Sample Quiz")
+
+    def test_unknown_question(self):
+        response = self.client.post('/quiz/api/quizzes/submit/', {'question_id': 0, 'selected_option': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,146 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.models import Answer, PendingAnswer, Question, QuestionOptionStats, Quiz, QuizScoreStats, Result
+from quiz.stats import quiz_stats
+from quiz.submissions import drain_pending_answers
+
+class QuizStatsTest(APITestCase):
+
+    def setUp(self):
+        answer_key_store.clear()
+        self.staff = User.objects.create_user(username='staff', password='testpassword', is_staff=True)
+        self.users = [User.objects.create_user(username=f'user{index}', password='testpassword') for index in range(3)]
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["A", "B", "C", "D"], correct_option=2)
+            for index in range(2)
+        ]
+        self.url = f'/quiz/api/quizzes/{self.quiz.id}/stats/'
+
+    def tearDown(self):
+        answer_key_store.clear()
+
+    def submit_all(self, user, selected_options):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        data = {'answers': [
+            {'question_id': question.id, 'selected_option': selected_option}
+            for question, selected_option in zip(self.questions, selected_options)
+        ]}
+        # counters are incremented once the submission commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(f'/quiz/api/quizzes/{self.quiz.id}/submit/', data, format='json')
+
+    def get_stats(self):
+        client = APIClient()
+        client.force_authenticate(user=self.staff)
+        return client.get(self.url)
+
+    def test_stats(self):
+        self.submit_all(self.users[0], [2, 2])
+        self.submit_all(self.users[1], [2, 3])
+        self.submit_all(self.users[2], [1])
+
+        # quiz, option counters, questions, score histogram
+        with self.assertNumQueries(4):
+            response = self.get_stats()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['completed_results'], 2)
+        self.assertEqual(response.data['average_score'], 1.5)
+        self.assertEqual(response.data['score_histogram'], [{'score': 1, 'results': 1}, {'score': 2, 'results': 1}])
+        first, second = response.data['questions']
+        self.assertEqual((first['attempts'], first['correct'], first['correct_rate']), (3, 2, 0.6667))
+        self.assertEqual([option['answers'] for option in first['options']], [1, 2, 0, 0])
+        self.assertEqual((second['attempts'], second['correct'], second['correct_rate']), (2, 1, 0.5))
+        self.assertEqual(second['options'][2], {'option': 3, 'text': 'C', 'answers': 1})
+
+    def test_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        self.assertEqual(client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.get_stats().status_code, status.HTTP_200_OK)
+
+        client.force_authenticate(user=self.staff)
+        self.assertEqual(client.get('/quiz/api/quizzes/0/stats/').status_code, status.HTTP_404_NOT_FOUND)
+
+    # test that answers stored by the write-behind drain are counted too
+    @override_settings(QUIZ_ANSWER_INGESTION={'MODE': 'write-behind', 'BATCH_SIZE': 500})
+    def test_counted_on_drain(self):
+        self.submit_all(self.users[0], [2, 1])
+        self.assertFalse(QuestionOptionStats.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            drain_pending_answers()
+
+        stats = quiz_stats(self.quiz.id)
+        self.assertFalse(PendingAnswer.objects.exists())
+        self.assertEqual([question['attempts'] for question in stats['questions']], [1, 1])
+        self.assertEqual(stats['score_histogram'], [{'score': 1, 'results': 1}])
+
+    # test that on sqlite the counters are incremented inside the grading transaction
+    def test_counted_in_transaction(self):
+        with self.captureOnCommitCallbacks():
+            client = APIClient()
+            client.force_authenticate(user=self.users[0])
+            client.post('/quiz/api/quizzes/submit/', {'question_id': self.questions[0].id, 'selected_option': 2}, format='json')
+            self.assertEqual(QuestionOptionStats.objects.get().answer_count, 1)
+
+    # test that the counters are not touched inside the grading transaction
+    @override_settings(QUIZ_STATS={'AFTER_COMMIT': True})
+    def test_counted_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            client = APIClient()
+            client.force_authenticate(user=self.users[0])
+            client.post('/quiz/api/quizzes/submit/', {'question_id': self.questions[0].id, 'selected_option': 2}, format='json')
+        self.assertFalse(QuestionOptionStats.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(QuestionOptionStats.objects.get().answer_count, 1)
+
+    # test that a failing increment after the commit is logged, the submission stands
+    @override_settings(QUIZ_STATS={'AFTER_COMMIT': True})
+    def test_failed_increment_after_commit(self):
+        with mock.patch('quiz.stats.increment_counters', side_effect=DatabaseError("locked")):
+            with self.assertLogs('django', 'ERROR'):
+                response = self.submit_all(self.users[0], [2, 2])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Result.objects.get(user=self.users[0]).score, 2)
+        self.assertFalse(QuestionOptionStats.objects.exists())
+
+    # test that deleted answers and results leave the counters
+    def test_deletions(self):
+        self.submit_all(self.users[0], [2, 2])
+        self.submit_all(self.users[1], [1, 2])
+
+        Answer.objects.filter(user=self.users[1], question=self.questions[0]).delete()
+        Result.objects.filter(user=self.users[0]).delete()
+
+        stats = quiz_stats(self.quiz.id)
+        self.assertEqual([option['answers'] for option in stats['questions'][0]['options']], [0, 1, 0, 0])
+        self.assertEqual(stats['score_histogram'], [{'score': 1, 'results': 1}])
+
+    # test that a rebuild from answers and results matches the incremental counters
+    def test_rebuild_command(self):
+        self.submit_all(self.users[0], [2, 2])
+        self.submit_all(self.users[1], [4, 2])
+        self.submit_all(self.users[2], [3])
+        expected = quiz_stats(self.quiz.id)
+
+        QuestionOptionStats.objects.all().delete()
+        QuizScoreStats.objects.update(result_count=7)
+        out = StringIO()
+        call_command('rebuild_quiz_stats', stdout=out)
+
+        self.assertIn("Rebuilt the statistics of 1 quizzes.", out.getvalue())
+        self.assertEqual(quiz_stats(self.quiz.id), expected)
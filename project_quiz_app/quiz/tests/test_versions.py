@@ -0,0 +1,153 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.cache import quiz_payload_cache
+from quiz.models import Answer, Question, Quiz, QuizVersion, Result
+from quiz.serializers import QuizSerializer
+from quiz.versions import freeze_quiz_version, load_quiz_payload
+
+class QuizVersionPublishTest(TestCase):
+
+    def setUp(self):
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="Question?", options=["A", "B", "C", "D"], correct_option=1)
+
+    # test that a version is frozen once and matches the serializer output
+    def test_frozen_once(self):
+        payload = load_quiz_payload(self.quiz.id)
+        self.quiz.refresh_from_db()
+
+        self.assertEqual(payload['version'], self.quiz.version)
+        self.assertEqual(payload['title'], QuizSerializer(self.quiz).data['title'])
+        self.assertEqual(payload['questions'], [dict(question) for question in QuizSerializer(self.quiz).data['questions']])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(load_quiz_payload(self.quiz.id), payload)
+        self.assertEqual(freeze_quiz_version(self.quiz.id), payload)
+        self.assertEqual(QuizVersion.objects.count(), 1)
+
+    # test that an edit publishes a new version and leaves the old one unchanged
+    def test_edit_creates_version(self):
+        first = load_quiz_payload(self.quiz.id)
+        self.question.text = "Edited?"
+        self.question.save()
+
+        second = load_quiz_payload(self.quiz.id)
+
+        self.assertEqual(second['version'], first['version'] + 1)
+        self.assertEqual(second['questions'][0]['text'], "Edited?")
+        stored = QuizVersion.objects.get(quiz=self.quiz, number=first['version'])
+        self.assertEqual(stored.payload['questions'][0]['text'], "Question?")
+
+    def test_unknown_quiz(self):
+        self.assertIsNone(load_quiz_payload(0))
+
+class QuizVersionViewTest(APITestCase):
+
+    def setUp(self):
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/quiz/api/quizzes/create/', {
+            'title': "Sample Quiz",
+            'questions': [
+                {'text': f"Question {index}?", 'options': ["A", "B", "C", "D"], 'correct_option': 2}
+                for index in range(2)
+            ]
+        }, format='json')
+        self.quiz = Quiz.objects.get(id=response.data['quiz_id'])
+
+    def tearDown(self):
+        quiz_payload_cache.clear()
+        answer_key_store.clear()
+
+    def get_version(self, version, **extra):
+        return self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/versions/{version}/', **extra)
+
+    # test that created quizzes are published right away, so a fetch is a single query
+    def test_published_on_create(self):
+        self.assertTrue(QuizVersion.objects.filter(quiz=self.quiz, number=1).exists())
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/')
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(len(response.data['questions']), 2)
+
+    # test that an old version is still served after an edit, with long-lived caching headers
+    def test_old_version_served(self):
+        question = self.quiz.questions.order_by('id').first()
+        question.text = "Edited?"
+        question.save()
+
+        response = self.get_version(1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['questions'][0]['text'], "Question 0?")
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], f'"quiz-{self.quiz.id}-v1"')
+
+        # the current version is published on request, versions never published are not found
+        self.assertEqual(self.get_version(2).data['questions'][0]['text'], "Edited?")
+        self.assertEqual(self.get_version(3).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.get_version(1, HTTP_IF_NONE_MATCH=response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_version(1)
+
+        with self.assertNumQueries(0):
+            response = self.get_version(1)
+        self.assertEqual(response.data['version'], 1)
+
+    # test that answers and results record the version they were graded against
+    def test_answers_record_version(self):
+        first, second = self.quiz.questions.order_by('id')
+        self.client.post('/quiz/api/quizzes/submit/', {'question_id': first.id, 'selected_option': 2}, format='json')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.title = "Renamed Quiz"
+            self.quiz.save()
+        self.client.post(f'/quiz/api/quizzes/{self.quiz.id}/submit/', {'answers': [{'question_id': second.id, 'selected_option': 1}]}, format='json')
+
+        self.assertEqual(list(Answer.objects.order_by('id').values_list('quiz_version', flat=True)), [1, 2])
+        self.assertEqual(Result.objects.get(user=self.user).quiz_version, 1)
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/users/{self.user.id}/results/')
+        self.assertEqual(response.data['quiz_version'], 1)
+
+    # test that the version an answer was graded against after an edit can be fetched after later edits
+    def test_graded_version_published(self):
+        question = self.quiz.questions.order_by('id').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            question.text = "Edited?"
+            question.save()
+        self.client.post('/quiz/api/quizzes/submit/', {'question_id': question.id, 'selected_option': 2}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            question.text = "Edited again?"
+            question.save()
+
+        recorded = Answer.objects.get().quiz_version
+        response = self.get_version(recorded)
+
+        self.assertEqual(recorded, 2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['questions'][0]['text'], "Edited?")
+
+class QuizVersionAdminTest(TestCase):
+
+    # test that published versions can be viewed but not edited or deleted in the admin
+    def test_read_only(self):
+        admin_user = User.objects.create_superuser(username='admin', password='adminpassword')
+        self.client.force_login(admin_user)
+        quiz = Quiz.objects.create(title="Sample Quiz")
+        freeze_quiz_version(quiz.id)
+        version = QuizVersion.objects.get()
+        url = f'/admin/quiz/quizversion/{version.id}/change/'
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.post(url, {'quiz': quiz.id, 'number': 9, 'payload': '{}'})
+        self.assertEqual(QuizVersion.objects.get().number, version.number)
+        self.assertEqual(self.client.get(f'/admin/quiz/quizversion/{version.id}/delete/').status_code, 403)
+        self.assertEqual(self.client.get('/admin/quiz/quizversion/add/').status_code, 403)
@@ -1,4 +1,6 @@
+import json
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth.models import User
@@ -44,6 +46,7 @@ class QuizCreateViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['message'], "Quiz created successfully.")
         self.assertIn('quiz_id', response.data)
+        self.assertEqual(Quiz.objects.get(id=response.data['quiz_id']).question_count, 2)
 
     def test_create_quiz_with_invalid_data(self):
         response = self.client.post(self.url, data=self.invalid_payload, format='json')
@@ -149,6 +152,197 @@ class SubmitAnswerViewTest(APITestCase):
         self.assertIn('message', response.data)
         self.assertEqual(response.data['message'], "Incorrect. The correct answer is 2: Option 2.")
 
+    def test_submit_duplicate_answer(self):
+        data = {
+            'question_id': self.question.id,
+            'selected_option': 2
+        }
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.client.post(self.url, data, format='json')
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Answer.objects.filter(question=self.question, user=self.user).count(), 1)
+
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(result.score, 1)
+        self.assertEqual(result.answers.count(), 1)
+
+    def test_submit_answers_updates_score(self):
+        question2 = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample Question 2?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=1
+        )
+        question3 = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample Question 3?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=1
+        )
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.client.post(self.url, {'question_id': self.question.id, 'selected_option': 2}, format='json')
+        self.client.post(self.url, {'question_id': question2.id, 'selected_option': 1}, format='json')
+        self.client.post(self.url, {'question_id': question3.id, 'selected_option': 4}, format='json')
+
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(result.score, 2)
+        self.assertEqual(result.answers.count(), 3)
+
+    # query count of a submission must not depend on earlier answers
+    def test_submit_answer_query_count(self):
+        self.client.force_authenticate(user=self.user)
+        questions = [
+            Question.objects.create(
+                quiz=self.quiz,
+                text=f"Question {index}?",
+                options=["Option 1", "Option 2", "Option 3", "Option 4"],
+                correct_option=1
+            )
+            for index in range(5)
+        ]
+        # the first answer creates the result inside its own savepoint
+        with self.assertNumQueries(10):
+            self.client.post(self.url, {'question_id': self.question.id, 'selected_option': 2}, format='json')
+
+        # savepoint + release, answer keys, answer insert, result lookup,
+        # score update, result-answer link, option stats,
+        # and the score histogram for the answer completing the result
+        for index, question in enumerate(questions):
+            with self.assertNumQueries(9 if index == len(questions) - 1 else 8):
+                response = self.client.post(self.url, {'question_id': question.id, 'selected_option': 1}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(Result.objects.get(quiz=self.quiz, user=self.user).score, 6)
+
+    # answered count and completion are maintained on submission
+    def test_submit_answers_tracks_completion(self):
+        question2 = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample Question 2?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=1
+        )
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.question_count, 2)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.client.post(self.url, {'question_id': self.question.id, 'selected_option': 2}, format='json')
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(result.answered_count, 1)
+        self.assertIsNone(result.completed_at)
+
+        self.client.post(self.url, {'question_id': question2.id, 'selected_option': 3}, format='json')
+        result.refresh_from_db()
+        self.assertEqual(result.answered_count, 2)
+        self.assertIsNotNone(result.completed_at)
+
+class BulkSubmitAnswerViewTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(
+                quiz=self.quiz,
+                text=f"Question {index}?",
+                options=["Option 1", "Option 2", "Option 3", "Option 4"],
+                correct_option=2
+            )
+            for index in range(3)
+        ]
+        self.url = f'/quiz/api/quizzes/{self.quiz.id}/submit/'
+
+    def test_bulk_submit(self):
+        data = {'answers': [
+            {'question_id': self.questions[0].id, 'selected_option': 2},
+            {'question_id': self.questions[1].id, 'selected_option': 2},
+            {'question_id': self.questions[2].id, 'selected_option': 3},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['accepted'], 3)
+        self.assertEqual(response.data['rejected'], 0)
+        self.assertEqual(response.data['answers'][0], {
+            'question_id': self.questions[0].id,
+            'status': 'accepted',
+            'is_correct': True,
+            'correct_option': 2,
+            'message': "Correct answer!"
+        })
+        self.assertEqual(response.data['answers'][2]['message'], "Incorrect. The correct answer is 2: Option 2.")
+
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(result.score, 2)
+        self.assertEqual(result.answers.count(), 3)
+
+    # duplicates and unknown questions are reported per item, the rest is stored
+    def test_bulk_submit_partial_failures(self):
+        other_question = Question.objects.create(
+            quiz=Quiz.objects.create(title="Other Quiz"),
+            text="Other question?",
+            options=["Option 1", "Option 2", "Option 3", "Option 4"],
+            correct_option=1
+        )
+        self.client.post('/quiz/api/quizzes/submit/', {'question_id': self.questions[0].id, 'selected_option': 2}, format='json')
+
+        data = {'answers': [
+            {'question_id': self.questions[0].id, 'selected_option': 2},
+            {'question_id': self.questions[1].id, 'selected_option': 2},
+            {'question_id': self.questions[1].id, 'selected_option': 1},
+            {'question_id': other_question.id, 'selected_option': 1},
+        ]}
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in response.data['answers']],
+            ['duplicate', 'accepted', 'duplicate', 'not_found']
+        )
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual(response.data['rejected'], 3)
+
+        result = Result.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(result.score, 2)
+        self.assertEqual(result.answers.count(), 2)
+        self.assertFalse(Answer.objects.filter(question=other_question).exists())
+
+    def test_bulk_submit_invalid_data(self):
+        response = self.client.post(self.url, {'answers': [{'question_id': self.questions[0].id, 'selected_option': 5}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {'answers': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_submit_unknown_quiz(self):
+        response = self.client.post('/quiz/api/quizzes/99999/submit/', {'answers': [{'question_id': 1, 'selected_option': 1}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['error'], "Quiz not found.")
+
+    # query count does not depend on the number of answers
+    def test_bulk_submit_query_count(self):
+        more_questions = [
+            Question.objects.create(
+                quiz=self.quiz,
+                text=f"Question {index}?",
+                options=["Option 1", "Option 2", "Option 3", "Option 4"],
+                correct_option=2
+            )
+            for index in range(20)
+        ]
+        data = {'answers': [{'question_id': question.id, 'selected_option': 2} for question in self.questions + more_questions]}
+        # answer keys of the quiz, savepoint + release, answered check, answer insert,
+        # result lookup, result insert (in its own savepoint), result-answer links,
+        # option stats and score histogram
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.data['accepted'], 23)
+
 class GetResultsViewTest(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='testpassword')
@@ -161,12 +355,18 @@ class GetResultsViewTest(APITestCase):
             correct_option=4,
             options=["2", "3", "4", "5"]
         )
+        self.question2 = Question.objects.create(
+            quiz=self.quiz,
+            text="Sample question 2?",
+            correct_option=4,
+            options=["2", "3", "4", "5"]
+        )
 
         self.answer1 = Answer.objects.create(
             user=self.user, question=self.question, selected_option=2, is_correct=False
         )
         self.answer2 = Answer.objects.create(
-            user=self.user, question=self.question, selected_option=4, is_correct=True
+            user=self.user, question=self.question2, selected_option=4, is_correct=True
         )
 
         self.result = Result.objects.create(quiz=self.quiz, user=self.user, score=3)
@@ -189,6 +389,8 @@ class GetResultsViewTest(APITestCase):
         self.assertEqual(response.data['total_score'], self.result.score)
 
         self.assertEqual(len(response.data['answers']), 2)
+        self.assertEqual(response.data['question_count'], 2)
+        self.assertFalse(response.data['completed'])
 
         answer_data = response.data['answers']
         self.assertEqual(answer_data[0]['selected_option'], 2)
@@ -196,6 +398,31 @@ class GetResultsViewTest(APITestCase):
         self.assertEqual(answer_data[1]['selected_option'], 4)
         self.assertEqual(answer_data[1]['is_correct'], True)
 
+    # query count does not depend on the number of answers
+    def test_get_results_query_count(self):
+        for index in range(30):
+            question = Question.objects.create(
+                quiz=self.quiz,
+                text=f"Question {index}?",
+                correct_option=1,
+                options=["2", "3", "4", "5"]
+            )
+            self.result.answers.add(Answer.objects.create(
+                user=self.user, question=question, selected_option=1, is_correct=True
+            ))
+
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data['answers']), 32)
+        self.assertEqual(response.data['answers'][0], {
+            'question_id': self.question.id,
+            'selected_option': 2,
+            'correct_option': 4,
+            'is_correct': False
+        })
+
     def test_get_results_no_result(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.token)
         response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/users/123/results/')
@@ -262,4 +489,109 @@ class DeleteResultAndAnswerViewTest(APITestCase):
         response = self.client.delete(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
-        self.assertEqual(response.data['detail'], "Authentication credentials were not provided.")
\ No newline at end of file
+        self.assertEqual(response.data['detail'], "Authentication credentials were not provided.")
+class QuizListViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = '/quiz/api/quizzes/'
+
+        self.quizzes = [Quiz.objects.create(title=f"Quiz {index}") for index in range(5)]
+        self.python_quiz = Quiz.objects.create(title="Python Basics")
+        Result.objects.create(quiz=self.quizzes[0], user=self.user, score=0, completed_at=timezone.now())
+
+    def test_list_excludes_completed_quizzes(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [quiz['id'] for quiz in response.data]
+        self.assertNotIn(self.quizzes[0].id, ids)
+        self.assertEqual(ids, [quiz.id for quiz in self.quizzes[1:]] + [self.python_quiz.id])
+        self.assertNotIn('Link', response)
+
+    def test_list_keyset_pagination(self):
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual([quiz['id'] for quiz in response.data], [self.quizzes[1].id, self.quizzes[2].id])
+        self.assertIn(f'cursor={self.quizzes[2].id}', response['Link'])
+        self.assertIn('rel="next"', response['Link'])
+
+        response = self.client.get(self.url, {'limit': 2, 'cursor': self.quizzes[2].id})
+        self.assertEqual([quiz['id'] for quiz in response.data], [self.quizzes[3].id, self.quizzes[4].id])
+
+        response = self.client.get(self.url, {'limit': 2, 'cursor': self.quizzes[4].id})
+        self.assertEqual([quiz['id'] for quiz in response.data], [self.python_quiz.id])
+        self.assertNotIn('Link', response)
+
+    def test_list_title_prefix_search(self):
+        response = self.client.get(self.url, {'search': 'Python'})
+        self.assertEqual(response.data, [{'id': self.python_quiz.id, 'title': "Python Basics", 'question_count': 0, 'answered_count': 0}])
+
+    # quizzes in progress stay listed with their progress
+    def test_list_reports_progress(self):
+        self.quizzes[1].question_count = 3
+        self.quizzes[1].save()
+        Result.objects.create(quiz=self.quizzes[1], user=self.user, score=1, answered_count=2)
+
+        response = self.client.get(self.url, {'limit': 1})
+        self.assertEqual(response.data, [{'id': self.quizzes[1].id, 'title': "Quiz 1", 'question_count': 3, 'answered_count': 2}])
+
+    def test_list_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'limit': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'limit': 1000}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_query_count(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'limit': 2})
+
+class ExportResultsViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='adminpassword', is_staff=True)
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+        self.quiz = Quiz.objects.create(title="Sample Quiz", question_count=2)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["1", "2", "3", "4"], correct_option=1)
+            for index in range(2)
+        ]
+        self.result = Result.objects.create(quiz=self.quiz, user=self.user, score=1, answered_count=2)
+        self.result.answers.set([
+            Answer.objects.create(user=self.user, question=self.questions[0], selected_option=1, is_correct=True),
+            Answer.objects.create(user=self.user, question=self.questions[1], selected_option=3, is_correct=False),
+        ])
+
+    def test_export_csv(self):
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/results/export/csv/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'result_id,user_id,username,score,answered_count,completed_at,question_id,selected_option,correct_option,is_correct')
+        self.assertEqual(lines[1], f'{self.result.id},{self.user.id},testuser,1,2,,{self.questions[0].id},1,1,True')
+        self.assertEqual(len(lines), 3)
+
+    def test_export_ndjson(self):
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/results/export/ndjson/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['username'], 'testuser')
+        self.assertFalse(record['completed'])
+        self.assertEqual([answer['is_correct'] for answer in record['answers']], [True, False])
+
+    def test_export_invalid_format_or_quiz(self):
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/results/export/xml/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/quiz/api/quizzes/99999/results/export/csv/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/quiz/api/quizzes/{self.quiz.id}/results/export/csv/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,160 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from quiz.answer_keys import answer_key_store
+from quiz.models import Answer, PendingAnswer, Question, Quiz, Result
+from quiz.submissions import add_answers_to_result, drain_pending_answers
+
+@override_settings(QUIZ_ANSWER_INGESTION={'MODE': 'write-behind', 'BATCH_SIZE': 500})
+class WriteBehindIngestionTest(APITestCase):
+
+    def setUp(self):
+        answer_key_store.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {index}?", options=["A", "B", "C", "D"], correct_option=2)
+            for index in range(3)
+        ]
+
+    def tearDown(self):
+        answer_key_store.clear()
+
+    def submit(self, question, selected_option=2):
+        return self.client.post('/quiz/api/quizzes/submit/', {'question_id': question.id, 'selected_option': selected_option}, format='json')
+
+    def queue(self, user, question, selected_option=2):
+        return PendingAnswer.objects.create(
+            quiz=self.quiz, question=question, user=user,
+            selected_option=selected_option, is_correct=selected_option == question.correct_option
+        )
+
+    # test that a submission is graded and queued without touching answers and results
+    def test_submit_queues_answer(self):
+        # savepoint + release, answer keys, answered check, journal insert
+        with self.assertNumQueries(5):
+            response = self.submit(self.questions[0], selected_option=1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], "Incorrect. The correct answer is 2: B.")
+        self.assertFalse(Answer.objects.exists())
+        self.assertFalse(Result.objects.exists())
+        pending = PendingAnswer.objects.get()
+        self.assertEqual((pending.user, pending.question, pending.quiz), (self.user, self.questions[0], self.quiz))
+        self.assertFalse(pending.is_correct)
+
+    # test that a question can only be answered once, pending or stored
+    def test_duplicate_rejected(self):
+        self.submit(self.questions[0])
+        self.assertEqual(self.submit(self.questions[0]).status_code, status.HTTP_409_CONFLICT)
+
+        drain_pending_answers()
+        self.assertEqual(self.submit(self.questions[0]).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Answer.objects.count(), 1)
+        self.assertFalse(PendingAnswer.objects.exists())
+
+    def test_bulk_submit_queues_answers(self):
+        self.submit(self.questions[0])
+        data = {'answers': [{'question_id': question.id, 'selected_option': 2} for question in self.questions]}
+
+        response = self.client.post(f'/quiz/api/quizzes/{self.quiz.id}/submit/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual(response.data['answers'][0]['status'], 'duplicate')
+        self.assertEqual(PendingAnswer.objects.count(), 3)
+        self.assertFalse(Answer.objects.exists())
+
+    # test that draining stores answers and results like the synchronous path
+    def test_drain(self):
+        for question in self.questions:
+            self.submit(question)
+        self.queue(self.other_user, self.questions[0], selected_option=1)
+
+        summary = drain_pending_answers(batch_size=2)
+
+        self.assertEqual(summary, {'stored': 4, 'dropped': 0, 'batches': 2})
+        self.assertFalse(PendingAnswer.objects.exists())
+        result = Result.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual((result.score, result.answered_count), (3, 3))
+        self.assertIsNotNone(result.completed_at)
+        self.assertEqual(result.answers.count(), 3)
+        other_result = Result.objects.get(user=self.other_user, quiz=self.quiz)
+        self.assertEqual((other_result.score, other_result.answered_count), (0, 1))
+        self.assertIsNone(other_result.completed_at)
+
+    # a question answered synchronously while its answer was pending keeps the stored answer
+    def test_drain_drops_already_answered(self):
+        Answer.objects.create(question=self.questions[0], user=self.user, selected_option=1, is_correct=False)
+        self.queue(self.user, self.questions[0])
+
+        self.assertEqual(drain_pending_answers(), {'stored': 0, 'dropped': 1, 'batches': 1})
+        self.assertFalse(Answer.objects.get().is_correct)
+
+    # test that a crash while draining loses nothing and leaves no partial writes
+    def test_crash_recovery(self):
+        for question in self.questions:
+            self.queue(self.user, question)
+        self.queue(self.other_user, self.questions[0])
+
+        calls = []
+        def crash_on_second_result(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("worker crashed")
+            return add_answers_to_result(*args)
+
+        with mock.patch('quiz.submissions.add_answers_to_result', side_effect=crash_on_second_result):
+            with self.assertRaises(RuntimeError):
+                drain_pending_answers()
+
+        # the whole batch was rolled back and is still queued
+        self.assertEqual(PendingAnswer.objects.count(), 4)
+        self.assertFalse(Answer.objects.exists())
+        self.assertFalse(Result.objects.exists())
+
+        self.assertEqual(drain_pending_answers(), {'stored': 4, 'dropped': 0, 'batches': 1})
+        self.assertEqual(Result.objects.get(user=self.user, quiz=self.quiz).score, 3)
+        self.assertEqual(Result.objects.get(user=self.other_user, quiz=self.quiz).score, 1)
+
+    # test that batches committed before a crash are not stored twice
+    def test_crash_between_batches(self):
+        for question in self.questions:
+            self.queue(self.user, question)
+
+        calls = []
+        def crash_on_second_batch(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("worker crashed")
+            return add_answers_to_result(*args)
+
+        with mock.patch('quiz.submissions.add_answers_to_result', side_effect=crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                drain_pending_answers(batch_size=1)
+
+        self.assertEqual(Answer.objects.count(), 1)
+        self.assertEqual(PendingAnswer.objects.count(), 2)
+
+        drain_pending_answers(batch_size=1)
+        result = Result.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual((result.score, result.answered_count), (3, 3))
+        self.assertEqual(Answer.objects.count(), 3)
+
+    def test_drain_answers_command(self):
+        self.submit(self.questions[0])
+
+        out = StringIO()
+        call_command('drain_answers', stdout=out)
+
+        self.assertIn("Stored 1 answers in 1 batches", out.getvalue())
+        self.assertIn("0 still pending", out.getvalue())
+        self.assertEqual(Answer.objects.count(), 1)
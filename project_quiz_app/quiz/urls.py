@@ -1,11 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import DeleteResultAndAnswerView, GetResultsView, QuizCreateView, QuizDetailView, SubmitAnswerView, QuizListView
+from .async_views import AsyncGetResultsView, AsyncQuizDetailView, AsyncQuizListView
+from .views import BulkSubmitAnswerView, DeleteResultAndAnswerView, ExportResultsView, GetResultsView, LeaderboardView, QuizCreateView, QuizImportView, QuizDetailView, QuizStatsView, QuizVersionDetailView, SubmitAnswerView, QuizListView
+
+# the read endpoints are served by their async variants when
+# QUIZ_ASYNC_READ_VIEWS is enabled (ASGI deployments)
+if getattr(settings, 'QUIZ_ASYNC_READ_VIEWS', False):
+    QuizListView, QuizDetailView, GetResultsView = AsyncQuizListView, AsyncQuizDetailView, AsyncGetResultsView
 
 urlpatterns = [
     path('api/quizzes/', QuizListView.as_view(), name='list-quizzes'),
     path('api/quizzes/create/', QuizCreateView.as_view(), name='create-quiz'),
+    path('api/quizzes/import/', QuizImportView.as_view(), name='import-quizzes'),
     path('api/quizzes/<int:quiz_id>/', QuizDetailView.as_view(), name='retrieve-quiz'),
+    path('api/quizzes/<int:quiz_id>/versions/<int:version>/', QuizVersionDetailView.as_view(), name='retrieve-quiz-version'),
     path('api/quizzes/submit/', SubmitAnswerView.as_view(), name='submit-answer'),
+    path('api/quizzes/<int:quiz_id>/submit/', BulkSubmitAnswerView.as_view(), name='bulk-submit-answers'),
     path('api/quizzes/<int:quiz_id>/users/<int:user_id>/results/', GetResultsView.as_view(), name='get-results'),
+    path('api/quizzes/<int:quiz_id>/leaderboard/', LeaderboardView.as_view(), name='quiz-leaderboard'),
+    path('api/quizzes/<int:quiz_id>/stats/', QuizStatsView.as_view(), name='quiz-stats'),
+    path('api/quizzes/<int:quiz_id>/results/export/<str:export_format>/', ExportResultsView.as_view(), name='export-results'),
     path('api/quizzes/<int:quiz_id>/users/<int:user_id>/delete/', DeleteResultAndAnswerView.as_view(), name='delete-results-and-answers'),
+
+    # async variants, always reachable for comparison
+    path('api/async/quizzes/', AsyncQuizListView.as_view(), name='async-list-quizzes'),
+    path('api/async/quizzes/<int:quiz_id>/', AsyncQuizDetailView.as_view(), name='async-retrieve-quiz'),
+    path('api/async/quizzes/<int:quiz_id>/users/<int:user_id>/results/', AsyncGetResultsView.as_view(), name='async-get-results'),
 ]
\ No newline at end of file
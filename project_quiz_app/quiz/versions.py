@@ -0,0 +1,94 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Subquery
+
+from .models import Quiz, QuizVersion
+from .serializers import serialize_question_payloads
+
+# published quiz versions: the answer-stripped payload served by the quiz detail endpoint
+# is frozen in a QuizVersion per Quiz.version, edits bump the version and publish
+# the new one once committed (see signals.py), so a version payload never changes and can be
+# cached indefinitely, answers and results record the version they were graded against
+
+# payload of a quiz as plain python objects, questions ordered by id,
+# the same data QuizSerializer renders, without its per-field machinery
+def render_quiz_payload(quiz, questions):
+    return {
+        'version': quiz.version,
+        'title': str(quiz.title),
+        'questions': serialize_question_payloads((question.id, question.text, question.options) for question in questions),
+    }
+
+# payload of a quiz built from a single (left joined) values query, None for an unknown quiz,
+# correct options are never loaded, lock=True locks the quiz row (postgresql) but not its questions
+def build_quiz_payload(quiz_id, lock=False):
+    quizzes = Quiz.objects.filter(id=quiz_id)
+    if lock:
+        quizzes = quizzes.select_for_update(of=('self',))
+    rows = list(
+        quizzes.order_by('questions__id')
+        .values_list('version', 'title', 'questions__id', 'questions__text', 'questions__options')
+    )
+    if not rows:
+        return None
+    version, title = rows[0][:2]
+    return {
+        'version': version,
+        'title': str(title),
+        'questions': serialize_question_payloads(row[2:] for row in rows if row[2] is not None),
+    }
+
+# publishes the current version of quizzes whose questions are at hand
+# (quiz creation, imports, seeding), in one insert
+def publish_quiz_versions(quizzes, questions):
+    questions_by_quiz = {}
+    for question in sorted(questions, key=lambda question: question.id):
+        questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+    QuizVersion.objects.bulk_create(
+        [
+            QuizVersion(quiz=quiz, number=quiz.version, payload=render_quiz_payload(quiz, questions_by_quiz.get(quiz.id, [])))
+            for quiz in quizzes
+        ],
+        ignore_conflicts=True
+    )
+
+# publishes the current version of a quiz and returns its payload, None for an unknown quiz
+# the quiz row is locked (postgresql) while the snapshot is taken, so the version bump
+# of a concurrent edit waits for it, a version published concurrently has the same payload
+def freeze_quiz_version(quiz_id):
+    with transaction.atomic():
+        payload = build_quiz_payload(quiz_id, lock=True)
+        if payload is None:
+            return None
+        QuizVersion.objects.bulk_create(
+            [QuizVersion(quiz_id=quiz_id, number=payload['version'], payload=payload)],
+            ignore_conflicts=True
+        )
+    return payload
+
+# publishes the version created by an edit once the edit commits, so the version
+# answers are graded against until the next edit can always be fetched afterwards,
+# a failure is logged, the version is then published on its first read while it is current
+def freeze_quiz_version_on_commit(quiz_id):
+    transaction.on_commit(lambda: freeze_quiz_version(quiz_id), robust=True)
+
+def get_version_payload(quiz_id, number):
+    return QuizVersion.objects.filter(quiz_id=quiz_id, number=number).values_list('payload', flat=True).first()
+
+def current_version_payload(quiz_id):
+    current = Quiz.objects.filter(id=quiz_id).values('version')
+    return QuizVersion.objects.filter(quiz_id=quiz_id, number=Subquery(current)).values_list('payload', flat=True)
+
+# payload of the current version of a quiz in one query,
+# published first when the quiz was edited since its last publication
+def load_quiz_payload(quiz_id):
+    payload = current_version_payload(quiz_id).first()
+    if payload is None:
+        payload = freeze_quiz_version(quiz_id)
+    return payload
+
+async def aload_quiz_payload(quiz_id):
+    payload = await current_version_payload(quiz_id).afirst()
+    if payload is None:
+        payload = await sync_to_async(freeze_quiz_version)(quiz_id)
+    return payload
@@ -1,9 +1,24 @@
+import io
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
-from .models import Answer, Quiz, Question, Result
-from .serializers import AnswerFeedbackSerializer, AnswerSummarySerializer, QuizListSerializer, QuizSerializer, SubmitAnswerSerializer
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .answer_keys import answer_key_store, quiz_from_answer_keys
+from .cache import quiz_payload_cache
+from .conditional import add_cache_headers, get_http_cache_config, is_not_modified, quiz_etag, result_etag
+from .exports import EXPORT_FORMATS, iter_export
+from .importers import IMPORT_FORMATS, check_utf8, import_quizzes, iter_records
+from .leaderboards import get_leaderboard, leaderboard_response_data
+from .models import Answer, PendingAnswer, Quiz, Question, Result
+from .serializers import AnswerFeedbackSerializer, BulkSubmitAnswerSerializer, QuizListSerializer, QuizSerializer, SubmitAnswerSerializer, serialize_answer_summaries
+from .stats import quiz_stats
+from .submissions import add_answers_to_result, enqueue_answers, grade_answer, is_write_behind
+from .versions import freeze_quiz_version, get_version_payload, load_quiz_payload, publish_quiz_versions
 
 # view for creating quiz
 class QuizCreateView(APIView):
@@ -13,23 +28,31 @@ class QuizCreateView(APIView):
         serializer = QuizSerializer(data = request.data)
         if serializer.is_valid():
             try:
-                quiz_data = serializer.validated_data
-                quiz = Quiz.objects.create(title = quiz_data['title'])
-
-                # loop through questions list
-                # and store to question table with 
-                # current quiz object 
-                question_objects = []
-                for question_data in quiz_data['questions']:
-                    question = Question(
-                        quiz = quiz,
-                        text = question_data['text'],
-                        options = question_data['options'],
-                        correct_option = question_data['correct_option']
+                # quiz, questions and the published first version are created together
+                with transaction.atomic():
+                    quiz_data = serializer.validated_data
+                    quiz = Quiz.objects.create(
+                        title = quiz_data['title'],
+                        question_count = len(quiz_data['questions'])
                     )
-                    question_objects.append(question)
-                # bulk create for inserting all questions at once
-                Question.objects.bulk_create(question_objects)
+
+                    # loop through questions list
+                    # and store to question table with 
+                    # current quiz object 
+                    question_objects = []
+                    for question_data in quiz_data['questions']:
+                        question = Question(
+                            quiz = quiz,
+                            text = question_data['text'],
+                            options = question_data['options'],
+                            correct_option = question_data['correct_option']
+                        )
+                        question_objects.append(question)
+                    # bulk create for inserting all questions at once
+                    Question.objects.bulk_create(question_objects)
+                    publish_quiz_versions([quiz], question_objects)
+                    # bulk_create does not send save signals
+                    quiz_payload_cache.invalidate_on_commit(quiz.id)
 
                 return Response(
                     {"message": "Quiz created successfully.", "quiz_id": quiz.id},
@@ -46,129 +69,313 @@ class QuizCreateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+# imports quizzes from an uploaded json-lines or csv file (multipart field "file"),
+# the format is taken from the file extension or the "file_format" field
+class QuizImportView(APIView):
+    permission_classes = [IsAdminUser] # bulk content loads are restricted to staff users
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"Unsupported file format, use one of: {', '.join(IMPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # the encoding is checked over the whole upload first, as batches are committed one by one,
+        # then the upload is decoded and parsed line by line
+        try:
+            check_utf8(upload.file)
+        except UnicodeDecodeError:
+            return Response({"error": "File must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        report = import_quizzes(iter_records(lines, import_format))
+
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED if report.quizzes else status.HTTP_400_BAD_REQUEST)
+
 # view for fetching quiz
 class QuizDetailView(APIView):
     permission_classes = [IsAuthenticated] # restricting access without authentication
     
     def get(self, request, quiz_id):
-        try:
-            quiz = Quiz.objects.get(id=quiz_id)
-            quiz_serializer = QuizSerializer(quiz)
-
-            return Response(quiz_serializer.data, status=status.HTTP_200_OK)
-        except Quiz.DoesNotExist:
+        cache_control = get_http_cache_config()['QUIZ_CACHE_CONTROL']
+        # served from the payload cache, only rendered on a miss,
+        # revalidating an uncached quiz reads its version but none of its questions
+        payload = quiz_payload_cache.get(quiz_id)
+        if payload is None and request.META.get('HTTP_IF_NONE_MATCH'):
+            version = Quiz.objects.filter(id=quiz_id).values_list('version', flat=True).first()
+            if version is not None and is_not_modified(request, quiz_etag(quiz_id, version)):
+                return add_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), quiz_etag(quiz_id, version), cache_control)
+        if payload is None:
+            payload = quiz_payload_cache.load(quiz_id, load_quiz_payload)
+        if payload is None:
             return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
 
+        etag = quiz_etag(quiz_id, payload['version'])
+        if is_not_modified(request, etag):
+            return add_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, cache_control)
+        return add_cache_headers(Response(payload, status=status.HTTP_200_OK), etag, cache_control)
+
+# view for fetching a published version of a quiz, which never changes,
+# so it is served with long-lived caching headers (VERSION_CACHE_CONTROL)
+# edits publish the version they create once committed (see signals.py),
+# the current version is also published on its first read
+class QuizVersionDetailView(APIView):
+    permission_classes = [IsAuthenticated] # restricting access without authentication
+
+    def get(self, request, quiz_id, version):
+        payload = quiz_payload_cache.get_payload(quiz_id, version)
+        if payload is None:
+            payload = get_version_payload(quiz_id, version)
+            if payload is None and Quiz.objects.filter(id=quiz_id, version=version).exists():
+                payload = freeze_quiz_version(quiz_id)
+            if payload is None or payload['version'] != version:
+                return Response({"error": "Quiz version not found."}, status=status.HTTP_404_NOT_FOUND)
+            transaction.on_commit(lambda: quiz_payload_cache.set_payload(quiz_id, payload))
+
+        etag = quiz_etag(quiz_id, version)
+        cache_control = get_http_cache_config()['VERSION_CACHE_CONTROL']
+        if is_not_modified(request, etag):
+            return add_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, cache_control)
+        return add_cache_headers(Response(payload, status=status.HTTP_200_OK), etag, cache_control)
+
 # view for submitting single answer
 class SubmitAnswerView(APIView):
     permission_classes = [IsAuthenticated] # restricting access without authentication
     
     def post(self, request):
         serializer = SubmitAnswerSerializer(data=request.data)
-        if serializer.is_valid():
-            question_id = serializer.validated_data['question_id']
-            selected_option = serializer.validated_data['selected_option']
-            user = request.user
-            
-            # check if an answer already exists for this user and question
-            existing_answer = Answer.objects.filter(question_id=question_id, user=user).first()
-            if existing_answer:
-                return Response(
-                    {"error": "Answer already exists for this question. Please delete it before resubmitting."},
-                    status=status.HTTP_409_CONFLICT
-                )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                question = Question.objects.get(id=question_id)
-            except Question.DoesNotExist:
-                return Response({"error": "Question not found."}, status=status.HTTP_404_NOT_FOUND)
+        question_id = serializer.validated_data['question_id']
+        selected_option = serializer.validated_data['selected_option']
+
+        # answer, result and score are written in a single transaction,
+        # a duplicate answer is rejected by the unique constraint on (question, user)
+        try:
+            with transaction.atomic():
+                feedback = self.record_answer(request.user, question_id, selected_option)
+        except Question.DoesNotExist:
+            return Response({"error": "Question not found."}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            return Response(
+                {"error": "Answer already exists for this question. Please delete it before resubmitting."},
+                status=status.HTTP_409_CONFLICT
+            )
 
-            correct_option = question.correct_option
-            is_correct = selected_option == correct_option
-            correct_answer_index = correct_option - 1
-            message = "Correct answer!" if is_correct else f"Incorrect. The correct answer is {correct_option}: {question.options[correct_answer_index]}."
+        # feedback response
+        feedback_serializer = AnswerFeedbackSerializer(data=feedback)
+        feedback_serializer.is_valid(raise_exception=True)
+        return Response(feedback_serializer.data, status=status.HTTP_200_OK)
 
-            # create the answer object in db
-            try:
-                answer = Answer.objects.create(
-                    question=question,
+    # grades the answer and stores it with a fixed number of queries:
+    # answer keys of the question's quiz (only when not in the answer key store), answer insert,
+    # result lookup, result create or score increment, and the result-answer link
+    # in write-behind mode the answer is only checked and queued, see enqueue_answers
+    def record_answer(self, user, question_id, selected_option):
+        quiz_keys = answer_key_store.get_for_question(question_id)
+        if quiz_keys is None:
+            raise Question.DoesNotExist
+        feedback = grade_answer(quiz_keys.answer_keys[question_id], selected_option)
+
+        answer = Answer(
+            question_id=question_id,
+            user=user,
+            selected_option=selected_option,
+            is_correct=feedback['is_correct'],
+            quiz_version=quiz_keys.version
+        )
+        if is_write_behind():
+            enqueue_answers(user, quiz_keys.quiz_id, [answer])
+            return feedback
+
+        answer.save()
+        add_answers_to_result(user, quiz_from_answer_keys(quiz_keys), [answer])
+        return feedback
+
+# view for submitting all answers of a quiz at once
+class BulkSubmitAnswerView(APIView):
+    permission_classes = [IsAuthenticated] # restricting access without authentication
+
+    def post(self, request, quiz_id):
+        serializer = BulkSubmitAnswerSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        quiz_keys = answer_key_store.get_quiz(quiz_id)
+        if quiz_keys is None:
+            return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        submitted = serializer.validated_data['answers']
+        question_ids = {item['question_id'] for item in submitted}
+
+        try:
+            with transaction.atomic():
+                items = self.record_answers(request.user, quiz_keys, submitted, question_ids)
+        except IntegrityError:
+            # an answer was stored by a concurrent request after the duplicate check
+            return Response(
+                {"error": "Answers were submitted concurrently for this quiz. Please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        accepted = sum(1 for item in items if item['status'] == 'accepted')
+        return Response({
+            "quiz_id": quiz_keys.quiz_id,
+            "accepted": accepted,
+            "rejected": len(items) - accepted,
+            "answers": items
+        }, status=status.HTTP_200_OK)
+
+    # grades all answers against the quiz's answer keys and stores them in bulk,
+    # returns per-item feedback in the submitted order
+    def record_answers(self, user, quiz_keys, submitted, question_ids):
+        answered = set(
+            Answer.objects.filter(user=user, question_id__in=question_ids).values_list('question_id', flat=True)
+        )
+        write_behind = is_write_behind()
+        if write_behind:
+            # answers waiting in the journal count as answered too
+            answered.update(
+                PendingAnswer.objects.filter(user=user, question_id__in=question_ids).values_list('question_id', flat=True)
+            )
+
+        items = []
+        answers = []
+        for entry in submitted:
+            question_id = entry['question_id']
+            item = {'question_id': question_id}
+            answer_key = quiz_keys.answer_keys.get(question_id)
+            if answer_key is None:
+                item.update(status='not_found', error="Question not found in this quiz.")
+            elif question_id in answered:
+                item.update(status='duplicate', error="Answer already exists for this question.")
+            else:
+                answered.add(question_id) # repeated ids in the same request are duplicates too
+                feedback = grade_answer(answer_key, entry['selected_option'])
+                item.update(status='accepted', **AnswerFeedbackSerializer(feedback).data)
+                answers.append(Answer(
+                    question_id=question_id,
                     user=user,
-                    selected_option=selected_option,
-                    is_correct=is_correct
-                )
-            except Exception as e:
-                return Response({"error": "Failed to create answer entry."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            quiz = question.quiz
-            
-            # creating entry in result table here
-            # if entry already present
-            # updating the score based on answer is right or wrong
-            try:
-                result, created = Result.objects.get_or_create(user=user, quiz=quiz, defaults={'score': 0})
-                if not created:
-                    # update score if answer is correct
-                    if is_correct:
-                        result.score += 1
-                else:
-                    # if new result was created, 
-                    # set score to 1 or 0
-                    result.score = 1 if is_correct else 0
-            except Exception as e:
-                return Response({"error": "Failed to retrieve or create result."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            # add answer to the result answers list
-            result.answers.add(answer)
-            
-            try:
-                # save the result after updating the score and answer to list
-                result.save()
-            except Exception as e:
-                return Response({"error": "Failed to save result."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            # feedback response
-            feedback_serializer = AnswerFeedbackSerializer(data={
-                'is_correct': is_correct,
-                'correct_option': correct_option,
-                'message': message
-            })
-            
-            if feedback_serializer.is_valid():
-                return Response(feedback_serializer.data, status=status.HTTP_200_OK)
+                    selected_option=entry['selected_option'],
+                    is_correct=feedback['is_correct'],
+                    quiz_version=quiz_keys.version
+                ))
+            items.append(item)
+
+        if answers and write_behind:
+            enqueue_answers(user, quiz_keys.quiz_id, answers)
+        elif answers:
+            Answer.objects.bulk_create(answers)
+            add_answers_to_result(user, quiz_from_answer_keys(quiz_keys), answers)
+        return items
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+# result row of a user in a quiz with the progress fields of the results view
+def result_summary_queryset(quiz_id, user_id):
+    return (
+        Result.objects.filter(quiz_id=quiz_id, user_id=user_id)
+        .values('id', 'score', 'answered_count', 'completed_at', 'quiz__question_count', 'quiz__version', 'quiz_version')
+    )
+
+# all answers of a result with their correct option, in a single joined query
+def result_answers_queryset(result_id):
+    return (
+        Answer.objects.filter(result=result_id)
+        .order_by('id')
+        .values_list('question_id', 'selected_option', 'question__correct_option', 'is_correct')
+    )
+
+def results_response_data(quiz_id, user_id, result, answers):
+    return {
+        "quiz_id": quiz_id,
+        "user_id": user_id,
+        "total_score": result['score'],
+        "question_count": result['quiz__question_count'],
+        "answered_count": result['answered_count'],
+        "completed": result['completed_at'] is not None,
+        "completed_at": result['completed_at'],
+        "quiz_version": result['quiz_version'],
+        "answers": serialize_answer_summaries(answers)
+    }
 
 # view for final results for specific user and quiz
 class GetResultsView(APIView):
     permission_classes = [IsAuthenticated] # restricting access without authentication
 
     def get(self, request, quiz_id, user_id):
-        # fetch requested quiz
-        try:
-            quiz = Quiz.objects.get(id=quiz_id)
-        except Quiz.DoesNotExist:
-            return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        # fetch result associated with user and quiz
-        try:
-            result = Result.objects.get(quiz=quiz, user_id=user_id)
-        except Result.DoesNotExist:
+        # fetch result associated with user and quiz,
+        # the quiz itself is only looked up to tell which one is missing
+        result = result_summary_queryset(quiz_id, user_id).first()
+        if result is None:
+            if not Quiz.objects.filter(id=quiz_id).exists():
+                return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
             return Response({"error": "Results not found for the user in this quiz."}, status=status.HTTP_404_NOT_FOUND)
 
-        # response data
-        answers = result.answers.all()
-        answers_list = AnswerSummarySerializer(answers, many=True).data
-        total_score = result.score
-        
-        response_data = {
-            "quiz_id": quiz.id,
-            "user_id": user_id,
-            "total_score": total_score,
-            "answers": answers_list
-        }
-
-        return Response(response_data, status=status.HTTP_200_OK)
+        # an unchanged result is answered before its answers are read
+        etag = result_etag(result)
+        cache_control = get_http_cache_config()['RESULTS_CACHE_CONTROL']
+        if is_not_modified(request, etag):
+            return add_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, cache_control)
+
+        answers = result_answers_queryset(result['id'])
+        return add_cache_headers(Response(results_response_data(quiz_id, user_id, result, answers), status=status.HTTP_200_OK), etag, cache_control)
    
+# view for the leaderboard of a quiz: the best ?limit=<n> participants (10 by default)
+# and the rank of the requesting user, ranked from the in-process board of the quiz
+class LeaderboardView(APIView):
+    permission_classes = [IsAuthenticated] # restricting access without authentication
+    default_limit = 10
+    max_limit = 100
+
+    def get(self, request, quiz_id):
+        _, limit, error = parse_page_params(request.query_params, self.default_limit, self.max_limit)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        # existence is checked against the answer key store, usually without a query
+        if answer_key_store.get_quiz(quiz_id) is None:
+            return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        leaderboard = get_leaderboard(quiz_id, request.user.id, limit)
+        return Response(leaderboard_response_data(quiz_id, leaderboard), status=status.HTTP_200_OK)
+
+# view for the statistics of a quiz, restricted to staff users:
+# answers, correctness and option distribution per question, histogram and average of the scores,
+# read from the counters maintained on submission (see stats.py)
+class QuizStatsView(APIView):
+    permission_classes = [IsAdminUser] # answers of all users are aggregated
+
+    def get(self, request, quiz_id):
+        stats = quiz_stats(quiz_id)
+        if stats is None:
+            return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(stats, status=status.HTTP_200_OK)
+
+# streams every result of a quiz as csv (one line per answer)
+# or ndjson (one object per result), restricted to staff users
+class ExportResultsView(APIView):
+    permission_classes = [IsAdminUser] # results of all users are exported
+
+    def get(self, request, quiz_id, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Unsupported export format, use one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not Quiz.objects.filter(id=quiz_id).exists():
+            return Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(
+            iter_export(quiz_id, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="quiz-{quiz_id}-results.{export_format}"'
+        return response
+
 # Deletes the result for a specific quiz and user 
 # Deletes the answers for a specific quiz and user 
 class DeleteResultAndAnswerView(APIView):
@@ -189,15 +396,64 @@ class DeleteResultAndAnswerView(APIView):
         except Exception as e:
             return Response({"error": "An error occurred while deleting the result.", "message": e}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-# view for fetching all quiz list
+# parses the keyset pagination parameters of the quiz list,
+# returns (cursor, limit, error message)
+def parse_page_params(params, default_limit=50, max_limit=200):
+    try:
+        cursor = int(params.get('cursor', 0))
+        limit = int(params.get('limit', default_limit))
+    except ValueError:
+        return None, None, "cursor and limit must be integers."
+    if cursor < 0 or not 1 <= limit <= max_limit:
+        return None, None, f"cursor must be positive and limit between 1 and {max_limit}."
+    return cursor, limit, None
+
+# quizzes after the cursor the user has not completed, ordered by id
+# NOT EXISTS anti-join against the user's completed results,
+# the cost is bounded by the page size instead of the catalogue size
+# quizzes in progress stay listed with the number of answers given so far
+def unfinished_quizzes(user, cursor, search=None):
+    results = Result.objects.filter(user=user, quiz=OuterRef('pk'))
+    quizzes = (
+        Quiz.objects.filter(~Exists(results.filter(completed_at__isnull=False)), id__gt=cursor)
+        .only('id', 'title', 'question_count')
+        .annotate(answered_count=Coalesce(Subquery(results.values('answered_count')[:1]), 0))
+        .order_by('id')
+    )
+    if search:
+        quizzes = quizzes.filter(title__startswith=search)
+    return quizzes
+
+# value of the Link header pointing to the page after last_id
+def next_page_link(request, last_id, limit):
+    params = request.GET.copy()
+    params['cursor'] = last_id
+    params['limit'] = limit
+    next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+    return f'<{next_url}>; rel="next"'
+
+# view for fetching the quizzes the user has not completed yet
+# keyset paginated over quiz id: ?cursor=<last seen id>&limit=<page size>,
+# optional ?search=<title prefix>, the next page is announced in the Link header
 class QuizListView(APIView):
     permission_classes = [IsAuthenticated] # restricting access without authentication
+    default_limit = 50
+    max_limit = 200
     
     def get(self, request):
-        try:
-            user = request.user
-            quizzes = Quiz.objects.exclude(id__in=Result.objects.filter(user=user).values('quiz_id'))
-            serializer = QuizListSerializer(quizzes, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Quiz.DoesNotExist:
-            raise Response({"error": "Quiz not found."}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        cursor, limit, error = parse_page_params(request.query_params, self.default_limit, self.max_limit)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        quizzes = unfinished_quizzes(request.user, cursor, request.query_params.get('search'))
+
+        # one extra row tells whether there is a next page
+        page = list(quizzes[:limit + 1])
+        has_next = len(page) > limit
+        page = page[:limit]
+
+        serializer = QuizListSerializer(page, many=True)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        if has_next:
+            response['Link'] = next_page_link(request, page[-1].id, limit)
+        return response
@@ -0,0 +1,155 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from quiz.cache import LRUCache
+
+# user fields copied into every token, enough for the quiz API
+# to authenticate a request without loading the user,
+# is_active and is_staff are only trusted from the user state (see TokenClaimsAuthentication)
+USER_CLAIMS = ('username', 'is_active', 'is_staff')
+
+# process local backends would only see the changes made by their own worker
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+# cache (an entry of CACHES) holding the is_active/is_staff of users for JWT_USER_STATE_TIMEOUT seconds,
+# it has to be shared between workers (e.g. redis or memcached) so a deactivation made in one worker
+# is seen by all of them, None (or a process local backend) reads the state from the database
+# once the copy of the process expired
+def get_user_state_cache():
+    alias = getattr(settings, 'JWT_USER_STATE_CACHE', None)
+    if alias is None:
+        return None
+    cache = caches[alias]
+    return None if isinstance(cache, LOCAL_CACHE_BACKENDS) else cache
+
+def get_user_state_timeout():
+    return getattr(settings, 'JWT_USER_STATE_TIMEOUT', 60)
+
+# seconds a worker trusts its own copy of a user state (5), a deactivation made in another
+# worker is seen after at most that long, 0 disables the per process copies
+def get_user_state_local_max_age():
+    return getattr(settings, 'JWT_USER_STATE_LOCAL_MAX_AGE', 5)
+
+def user_state_key(user_id):
+    return f'jwt-user-state:{user_id}'
+
+# per process copies of user states as (state, stored at), in front of the shared cache and the database,
+# so the requests a user sends in a row are authenticated without a query
+local_user_states = LRUCache(10000)
+
+def get_local_user_state(user_id):
+    entry = local_user_states.get(user_id)
+    if entry is None:
+        return None
+    state, stored_at = entry
+    if time.monotonic() - stored_at >= get_user_state_local_max_age():
+        local_user_states.delete(user_id)
+        return None
+    return state
+
+def set_local_user_state(user_id, state):
+    local_user_states.set(user_id, (state, time.monotonic()))
+
+# stores the state of a saved user once committed, replacing the cached one,
+# the copy of this process is dropped right away so the previous state is not served meanwhile
+def remember_user_state(user_id, is_active, is_staff):
+    local_user_states.delete(user_id)
+    state = {'is_active': is_active, 'is_staff': is_staff}
+    cache = get_user_state_cache()
+
+    def store():
+        set_local_user_state(user_id, state)
+        if cache is not None:
+            cache.set(user_state_key(user_id), state, get_user_state_timeout())
+
+    transaction.on_commit(store)
+
+# refresh token (and the access tokens derived from it) carrying USER_CLAIMS
+class UserClaimsRefreshToken(RefreshToken):
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        # the user was just loaded, the first requests with the token need not read the state again
+        set_local_user_state(user.pk, {'is_active': user.is_active, 'is_staff': user.is_staff})
+        return token
+
+# authentication trusting the signed claims of the token instead of loading the user:
+# the user is built from the claims with every other field deferred,
+# so it is only read from the database when a view accesses one of them
+# is_active and is_staff come from the copy of this process (at most JWT_USER_STATE_LOCAL_MAX_AGE seconds old),
+# the user state cache, or the database when the state is not cached,
+# so deactivated or demoted users are never trusted from older claims
+# tokens minted without the claims fall back to loading the user
+class TokenClaimsAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if not self.has_user_claims(validated_token):
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        state = get_local_user_state(user_id)
+        if state is not None:
+            return self.build_user(validated_token, user_id, state)
+        cache = get_user_state_cache()
+        state = None if cache is None else cache.get(user_state_key(user_id))
+        if state is None:
+            state = self.user_state_query(user_id).first()
+            # add, so a state remembered by a concurrent save is not replaced
+            if state is not None and cache is not None:
+                cache.add(user_state_key(user_id), state, get_user_state_timeout())
+        if state is not None:
+            set_local_user_state(user_id, state)
+        return self.build_user(validated_token, user_id, state)
+
+    # async variant for the ASGI views, None when the token has no claims
+    async def aget_user_from_claims(self, validated_token):
+        if not self.has_user_claims(validated_token):
+            return None
+        user_id = self.get_user_id(validated_token)
+        state = get_local_user_state(user_id)
+        if state is not None:
+            return self.build_user(validated_token, user_id, state)
+        cache = get_user_state_cache()
+        state = None if cache is None else await cache.aget(user_state_key(user_id))
+        if state is None:
+            state = await self.user_state_query(user_id).afirst()
+            if state is not None and cache is not None:
+                await cache.aadd(user_state_key(user_id), state, get_user_state_timeout())
+        if state is not None:
+            set_local_user_state(user_id, state)
+        return self.build_user(validated_token, user_id, state)
+
+    # state of the user as {'is_active', 'is_staff'}
+    def user_state_query(self, user_id):
+        return self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values('is_active', 'is_staff')
+
+    def has_user_claims(self, validated_token):
+        return all(claim in validated_token for claim in USER_CLAIMS)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def build_user(self, validated_token, user_id, state):
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        values = {'username': validated_token['username'], **state}
+        if not values['is_active']:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        values[api_settings.USER_ID_FIELD] = user_id
+        # from_db expects the values in the order of the model's fields
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in values]
+        return self.user_model.from_db(None, field_names, [values[name] for name in field_names])
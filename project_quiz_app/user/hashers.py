@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# PBKDF2 hasher with the work factor taken from settings.PASSWORD_HASH_ITERATIONS
+# (django's default when unset), keeps the pbkdf2_sha256 algorithm name
+# so existing hashes are verified by it, and those with another iteration count
+# are reported as outdated and re-hashed by check_password on the next login
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import UserClaimsRefreshToken
 
 # validates registration of user
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -17,14 +18,12 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             is_active=True
         )
         user.password = make_password(validated_data['password']) # password hashing before saving
-        user.save()
-        
-        user_from_db = User.objects.filter(username=user).first()
-        
-        refresh = RefreshToken.for_user(user)
+        user.save() # the id is set on the instance by the insert, no need to read the user back
+
+        refresh = UserClaimsRefreshToken.for_user(user)
         return {
-                "user_id": str(user_from_db.id),
-                "username": str(user_from_db.username),
+                "user_id": str(user.id),
+                "username": str(user.username),
                 "access": str(refresh.access_token),
                 "refresh": str(refresh),
         }
@@ -38,11 +37,12 @@ class UserLoginSerializer(serializers.Serializer):
         username = data.get("username")
         password = data.get("password")
 
-        # check if user exists and password matches
-        user = User.objects.filter(username=username).first()
+        # check if user exists and password matches, in a single query loading only what is needed
+        # check_password() re-hashes and saves the password when the configured hasher or its cost changed
+        user = User.objects.filter(username=username, is_active=True).only('id', 'username', 'password', 'is_active', 'is_staff').first()
         if user and user.check_password(password): # hashing password entered with db hased password with check_password() 
             # generate token if credentials are valid
-            refresh = RefreshToken.for_user(user)
+            refresh = UserClaimsRefreshToken.for_user(user)
             return {
                 "user_id": str(user.id),
                 "username": str(user.username),
@@ -50,3 +50,7 @@ class UserLoginSerializer(serializers.Serializer):
                 "refresh": str(refresh),
             }
         raise serializers.ValidationError("Invalid credentials")
+
+# token pair of the token obtain API, carrying the same user claims as the login API
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserClaimsRefreshToken
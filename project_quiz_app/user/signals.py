@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import remember_user_state
+
+# keeps the user state cache of TokenClaimsAuthentication up to date,
+# so tokens of deactivated or demoted users stop being trusted right away
+# (queryset updates do not send signals, they are seen once the cached states expire)
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def remember_saved_user_state(sender, instance, update_fields=None, **kwargs):
+    # saves of other fields (e.g. the password re-hash on login) leave the state unchanged
+    if update_fields is not None and not {'is_active', 'is_staff'} & set(update_fields):
+        return
+    remember_user_state(instance.pk, instance.is_active, instance.is_staff)
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remember_deleted_user_state(sender, instance, **kwargs):
+    remember_user_state(instance.pk, False, False)
@@ -1,3 +1,230 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from quiz.models import Quiz
+from user.authentication import (TokenClaimsAuthentication, UserClaimsRefreshToken, get_user_state_cache,
+                                 local_user_states, user_state_key)
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class UserRegistrationViewTest(APITestCase):
+
+    # test that registering reads nothing back after the insert
+    def test_register(self):
+        # username uniqueness check and insert
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('register'), {'username': 'newuser', 'password': 'testpassword'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username='newuser')
+        self.assertEqual(response.data['data']['user_id'], str(user.id))
+        self.assertEqual(response.data['data']['username'], 'newuser')
+        self.assertIn('access', response.data['data'])
+        self.assertTrue(user.check_password('testpassword'))
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginViewTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def login(self, password='testpassword'):
+        return self.client.post(reverse('login'), {'username': 'testuser', 'password': password}, format='json')
+
+    def test_login_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_id'], str(self.user.id))
+        self.assertIn('access', response.data)
+        self.assertIn('refresh', response.data)
+
+    def test_login_invalid_credentials(self):
+        response = self.login(password='wrongpassword')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_inactive_user(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # test that the password is re-hashed with the new cost on the next login
+    def test_login_rehashes_on_cost_change(self):
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            # the user lookup and the password update
+            with self.assertNumQueries(2):
+                response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        encoded = self.user.password
+        self.assertEqual(identify_hasher(encoded).decode(encoded)['iterations'], 2000)
+
+        # unchanged cost, nothing to update
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            with self.assertNumQueries(1):
+                self.login()
+
+class TokenClaimsAuthenticationTest(APITestCase):
+
+    def setUp(self):
+        local_user_states.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword', email='test@example.com')
+        self.quiz = Quiz.objects.create(title="Sample Quiz")
+
+    def tearDown(self):
+        local_user_states.clear()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token))
+
+    # test that the user is built from the claims and the state read from the database, other fields deferred
+    def test_user_from_claims(self):
+        token = UserClaimsRefreshToken.for_user(self.user).access_token
+        local_user_states.clear()
+
+        with self.assertNumQueries(1):
+            user = TokenClaimsAuthentication().get_user(token)
+            self.assertEqual((user.id, user.username, user.is_active, user.is_staff), (self.user.id, 'testuser', True, False))
+
+        # other fields are loaded on access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'test@example.com')
+
+        # the state is then taken from the copy of this process
+        with self.assertNumQueries(0):
+            self.assertEqual(TokenClaimsAuthentication().get_user(token).id, self.user.id)
+
+    # test that requests in a row run without a user query, without a shared cache
+    def test_request_without_user_query(self):
+        self.authenticate(UserClaimsRefreshToken.for_user(self.user).access_token)
+        self.client.get(reverse('list-quizzes'))
+
+        # only the quiz list query
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('list-quizzes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # tokens minted without the claims still authenticate by loading the user
+    def test_token_without_claims(self):
+        self.authenticate(RefreshToken.for_user(self.user).access_token)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('list-quizzes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_user(self):
+        token = UserClaimsRefreshToken.for_user(self.user).access_token
+        self.user.delete()
+
+        with self.assertRaisesMessage(AuthenticationFailed, "User not found"):
+            TokenClaimsAuthentication().get_user(token)
+
+    # test that a process local cache is not trusted with the state
+    @override_settings(JWT_USER_STATE_CACHE='default')
+    def test_local_cache_ignored(self):
+        self.assertIsNone(get_user_state_cache())
+
+    def test_deactivated_user(self):
+        self.authenticate(UserClaimsRefreshToken.for_user(self.user).access_token)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(reverse('list-quizzes'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # test that staff access is not granted from the claims of a demoted user
+    def test_revoked_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.authenticate(UserClaimsRefreshToken.for_user(self.user).access_token)
+        export_url = reverse('export-results', args=[self.quiz.id, 'csv'])
+
+        self.assertEqual(self.client.get(export_url).status_code, status.HTTP_200_OK)
+
+        self.user.is_staff = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['is_staff'])
+
+        self.assertEqual(self.client.get(export_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    # test that a change made elsewhere (another worker, a queryset update)
+    # is seen once the copy of this process expired
+    def test_expired_local_state(self):
+        self.authenticate(UserClaimsRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(self.client.get(reverse('list-quizzes')).status_code, status.HTTP_200_OK)
+
+        # trusted until the copy expires
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('list-quizzes')).status_code, status.HTTP_200_OK)
+
+        with override_settings(JWT_USER_STATE_LOCAL_MAX_AGE=0):
+            self.assertEqual(self.client.get(reverse('list-quizzes')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_obtain_pair_claims(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'testuser', 'password': 'testpassword'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data['access'])
+        self.assertEqual((token['username'], token['is_active'], token['is_staff']), ('testuser', True, False))
+
+# user states cached in a cache shared between workers (a file based one here)
+class SharedUserStateTest(APITestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+            },
+            JWT_USER_STATE_CACHE='shared',
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        # the copies of this process are left out, as if every request hit another worker
+        self.local_max_age = override_settings(JWT_USER_STATE_LOCAL_MAX_AGE=0)
+        self.local_max_age.enable()
+        self.addCleanup(self.local_max_age.disable)
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate(UserClaimsRefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(token))
+
+    # test that the state is read once, then requests run without a user query
+    def test_request_without_user_query(self):
+        self.client.get(reverse('list-quizzes'))
+
+        # only the quiz list query
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('list-quizzes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_user_state_cache().get(user_state_key(self.user.id)), {'is_active': True, 'is_staff': False})
+
+    # test that a saved state replaces the cached one for every worker
+    def test_deactivated_user(self):
+        self.client.get(reverse('list-quizzes'))
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(reverse('list-quizzes'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)